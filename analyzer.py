@@ -1,10 +1,120 @@
 """Text analysis via OpenRouter API (default: Gemini 2.0 Flash)."""
 
+import concurrent.futures
+import contextlib
+import email.utils
+import hashlib
+import importlib.util
+import os
+import random
+import re
+import threading
+import time
+
 DEFAULT_MODEL = "google/gemini-2.0-flash-001"
 
+# Any OpenAI-compatible endpoint works (e.g. benchmarks/mock_openai.py)
+DEFAULT_BASE_URL = os.environ.get("COPYSIGHT_LLM_BASE_URL", "https://openrouter.ai/api/v1")
+
+# Long transcripts (analyze_long): token budget per chunk and parallel requests
+DEFAULT_CHUNK_TOKENS = 24000
+DEFAULT_CONCURRENCY = 4
+
+# Prepend context about source material type
+VIDEO_CONTEXT = (
+    "Source material: transcription of a YouTube video recording. "
+    "The language is spoken (not written) — expect informal tone, "
+    "filler words, and conversational structure.\n\n"
+)
+
+# Map pass: condense one part of a long transcript with the final task in mind
+MAP_PROMPT = (
+    "This is part {index} of {total} of a long transcript. Another pass will "
+    "combine notes from all parts, so do not write the final answer yet. "
+    "Extract every concrete point from this part that could serve the task "
+    "below (tips, ideas, references, facts, numbers, names), as short "
+    "bullet points in the transcript's language. Skip filler.\n\n"
+    "Task:\n{prompt}"
+)
+
+# Reduce pass: the user's prompt, applied to the merged notes
+REDUCE_CONTEXT = (
+    "Source material: notes extracted, part by part, from the transcription "
+    "of a long video recording. Together they cover the whole recording. "
+    "Merge duplicates and pick the strongest points across all parts.\n\n"
+)
+
+
+class Cancelled(Exception):
+    """Raised by a stream_fn to stop an analysis (e.g. the job was
+    cancelled). Not retried and not counted as an API error."""
+
+
+def prompt_fingerprint(text: str, prompt: str,
+                       max_chunk_tokens: int = DEFAULT_CHUNK_TOKENS) -> str:
+    """SHA-256 of the system prompt(s) analyze_long() would send for this text
+    (VIDEO_CONTEXT + prompt, or the map/reduce prompts for long texts).
+    Used with the transcript hash and model as the analysis cache key."""
+    if len(split_text(text or "", max_chunk_tokens)) <= 1:
+        system = VIDEO_CONTEXT + prompt
+    else:
+        system = "\n".join([VIDEO_CONTEXT, MAP_PROMPT, REDUCE_CONTEXT, prompt,
+                            str(max_chunk_tokens)])
+    return hashlib.sha256(system.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def split_text(text: str, max_tokens: int = DEFAULT_CHUNK_TOKENS) -> list[str]:
+    """
+    Split text into chunks of at most ~max_tokens, cutting at paragraph
+    breaks, then line breaks, then sentence ends (transcripts are often a
+    single line), and only as a last resort between words.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    max_chars = max_tokens * 4
+
+    def pieces(block, separators):
+        if len(block) <= max_chars:
+            return [block]
+        if not separators:
+            words = block.split(" ")
+            out, cur = [], ""
+            for word in words:
+                if cur and len(cur) + len(word) + 1 > max_chars:
+                    out.append(cur)
+                    cur = word
+                else:
+                    cur = f"{cur} {word}" if cur else word
+            return out + [cur] if cur else out
+        parts = re.split(separators[0], block)
+        return [p for part in parts for p in pieces(part, separators[1:])]
+
+    units = pieces(text.strip(), [r"\n\s*\n", r"\n", r"(?<=[.!?…])\s+"])
+
+    # Greedily pack units back together up to the budget
+    chunks, cur = [], ""
+    for unit in units:
+        unit = unit.strip()
+        if not unit:
+            continue
+        if cur and len(cur) + len(unit) + 1 > max_chars:
+            chunks.append(cur)
+            cur = unit
+        else:
+            cur = f"{cur} {unit}" if cur else unit
+    if cur:
+        chunks.append(cur)
+    return chunks
+
 
 def analyze_text(text: str, prompt: str, api_key: str,
-                 model: str = DEFAULT_MODEL, log_fn=print) -> str | None:
+                 model: str = DEFAULT_MODEL, log_fn=print,
+                 stream_fn=None, stats_fn=None, base_url: str | None = None) -> str | None:
     """
     Send text to an LLM via OpenRouter and return the analysis.
     OpenAI SDK import is deferred to first call for faster app startup.
@@ -14,11 +124,14 @@ def analyze_text(text: str, prompt: str, api_key: str,
     :param api_key: OpenRouter API key.
     :param model: Model ID on OpenRouter.
     :param log_fn: Progress logging callback.
+    :param stream_fn: Optional callback(partial_text) — enables streaming; called
+                      with the full text so far as tokens arrive.
+    :param stats_fn: Optional callback(stats) with ttft_s (time to first token),
+                     total_s, tokens and tokens_per_s (generation rate after
+                     the first token), prompt_tokens and completion_tokens.
+    :param base_url: OpenAI-compatible endpoint (default: DEFAULT_BASE_URL).
     :return: Analysis text or None on error.
     """
-    from openai import OpenAI
-    import httpx
-
     if not api_key:
         log_fn("Missing API key.")
         return None
@@ -27,33 +140,325 @@ def analyze_text(text: str, prompt: str, api_key: str,
         log_fn("No text to analyze.")
         return None
 
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key,
-        timeout=httpx.Timeout(connect=10.0, read=120.0, write=10.0, pool=5.0),
-    )
+    client = _make_client(api_key, base_url)
+    log_fn(f"Sending to {model.split('/')[-1]}...")
+
+    t0 = time.time()
+    try:
+        result, stats = _complete(client, model, VIDEO_CONTEXT + prompt, text, stream_fn)
+    except Cancelled:
+        log_fn("Analysis cancelled.")
+        return None
+    except Exception as e:
+        log_fn(f"API error: {e}")
+        return None
+
+    stats["total_s"] = round(time.time() - t0, 3)
+    if stats_fn:
+        stats_fn(stats)
+    log_fn("Response received.")
+    return result
 
-    # Prepend context about source material type
-    VIDEO_CONTEXT = (
-        "Source material: transcription of a YouTube video recording. "
-        "The language is spoken (not written) — expect informal tone, "
-        "filler words, and conversational structure.\n\n"
-    )
-    system_prompt = VIDEO_CONTEXT + prompt
 
-    log_fn(f"Sending to {model.split('/')[-1]}...")
+def analyze_long(text: str, prompt: str, api_key: str,
+                 model: str = DEFAULT_MODEL, log_fn=print,
+                 stream_fn=None, stats_fn=None, base_url: str | None = None,
+                 max_chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+                 concurrency: int = DEFAULT_CONCURRENCY, cancel=None) -> str | None:
+    """
+    Map-reduce analysis for transcripts longer than one chunk.
+
+    The text is split to max_chunk_tokens (split_text); every chunk is
+    condensed to notes concurrently, at most `concurrency` requests at a
+    time (map), then the notes are analyzed with the original prompt in one
+    final, streamed call (reduce) — so the output keeps the prompt's format.
+    Latency grows with chunks / concurrency, not with transcript length.
+    Short texts go straight to analyze_text().
+
+    Same parameters and return value as analyze_text(); stats additionally
+    hold chunks, concurrency and map_s, and the token counts cover every call.
+    cancel: optional threading.Event; once set, chunks not yet started are
+    skipped and the reduce call is not made (returns None).
+    """
+    chunks = split_text(text or "", max_chunk_tokens)
+    if len(chunks) <= 1:
+        return analyze_text(text, prompt, api_key, model, log_fn, stream_fn, stats_fn,
+                            base_url)
+    if not api_key:
+        log_fn("Missing API key.")
+        return None
+
+    client = _make_client(api_key, base_url)
+    workers = max(1, min(int(concurrency or 1), len(chunks)))
+    log_fn(f"Long transcript: {len(chunks)} chunks · {workers} parallel requests")
+
+    t0 = time.time()
+    map_tokens = []
+
+    def map_chunk(index):
+        if cancel is not None and cancel.is_set():
+            raise Cancelled()
+        system = VIDEO_CONTEXT + MAP_PROMPT.format(index=index + 1, total=len(chunks),
+                                                   prompt=prompt)
+        notes, map_stats = _complete(client, model, system, chunks[index], None)
+        map_tokens.append(map_stats)
+        return notes
 
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": text},
-            ],
-        )
-        result = response.choices[0].message.content
-        log_fn("Response received.")
-        return result
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            notes = list(pool.map(map_chunk, range(len(chunks))))
+    except Cancelled:
+        log_fn("Analysis cancelled.")
+        return None
+    except Exception as e:
+        log_fn(f"API error: {e}")
+        return None
+    map_s = time.time() - t0
+    if cancel is not None and cancel.is_set():
+        log_fn("Analysis cancelled.")
+        return None
+
+    merged = "\n\n".join(f"### Part {i + 1}/{len(chunks)}\n{part.strip()}"
+                         for i, part in enumerate(notes) if part)
+    log_fn(f"Map done in {map_s:.1f}s — reducing...")
+
+    t_reduce = time.time()
+    try:
+        result, stats = _complete(client, model, REDUCE_CONTEXT + prompt, merged, stream_fn)
+    except Cancelled:
+        log_fn("Analysis cancelled.")
+        return None
     except Exception as e:
         log_fn(f"API error: {e}")
         return None
+
+    if stats.get("ttft_s") is not None:
+        # Time to first token of the final answer, from the start of the job
+        stats["ttft_s"] = round(stats["ttft_s"] + (t_reduce - t0), 3)
+    for key in ("prompt_tokens", "completion_tokens"):
+        stats[key] = (stats.get(key) or 0) + sum(m.get(key) or 0 for m in map_tokens)
+    stats.update({
+        "chunks": len(chunks),
+        "concurrency": workers,
+        "map_s": round(map_s, 3),
+        "total_s": round(time.time() - t0, 3),
+    })
+    if stats_fn:
+        stats_fn(stats)
+    log_fn("Response received.")
+    return result
+
+
+# ── Shared HTTP client ──
+#
+# One OpenAI client per (api_key, base_url) for the whole process: its httpx
+# pool keeps connections alive across jobs (HTTP/2 when the h2 package is
+# installed), so only the first request pays the TCP+TLS handshake.
+# The SDK's own retries are off; _complete() retries with jittered
+# exponential backoff that honours Retry-After, under a process-wide
+# in-flight limit.
+
+DEFAULT_MAX_INFLIGHT = 4
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0   # seconds; attempt n waits up to BACKOFF_BASE * 2**n
+BACKOFF_MAX = 30.0
+
+_clients = {}
+_clients_lock = threading.Lock()
+_inflight = threading.BoundedSemaphore(DEFAULT_MAX_INFLIGHT)
+_metrics_lock = threading.Lock()
+_metrics = {"requests": 0, "connections_opened": 0, "retries": 0, "errors": 0,
+            "http_versions": {}}
+
+
+def set_max_inflight(n):
+    """Limit concurrent LLM requests across all jobs (takes effect for new requests)."""
+    global _inflight
+    _inflight = threading.BoundedSemaphore(max(1, int(n or 1)))
+
+
+def http_metrics():
+    """Counters since start: requests, connections_opened, reused_connections
+    (requests served on an already open connection), retries, errors and
+    responses per HTTP version."""
+    with _metrics_lock:
+        metrics = {**_metrics, "http_versions": dict(_metrics["http_versions"])}
+    metrics["reused_connections"] = max(0, metrics["requests"] - metrics["connections_opened"])
+    return metrics
+
+
+def _bump(key, n=1):
+    with _metrics_lock:
+        _metrics[key] += n
+
+
+def _trace(event, info):
+    # httpcore trace hook: one connect_tcp per newly opened connection
+    if event == "connection.connect_tcp.complete":
+        _bump("connections_opened")
+
+
+def _on_request(request):
+    _bump("requests")
+    request.extensions["trace"] = _trace
+
+
+def _on_response(response):
+    with _metrics_lock:
+        versions = _metrics["http_versions"]
+        versions[response.http_version] = versions.get(response.http_version, 0) + 1
+
+
+def _make_client(api_key, base_url=None):
+    """Process-wide client for an API key and endpoint (created on first use)."""
+    key = (api_key, base_url or DEFAULT_BASE_URL)
+    with _clients_lock:
+        if key in _clients:
+            return _clients[key]
+        from openai import OpenAI
+        import httpx
+
+        http_client = httpx.Client(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=httpx.Timeout(connect=10.0, read=120.0, write=10.0, pool=5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10,
+                                keepalive_expiry=120),
+            event_hooks={"request": [_on_request], "response": [_on_response]},
+        )
+        _clients[key] = OpenAI(base_url=key[1], api_key=api_key, max_retries=0,
+                               http_client=http_client)
+        return _clients[key]
+
+
+def _retry_delay(exc, attempt):
+    """Seconds to wait before retrying exc, or None if it is not transient."""
+    import openai
+
+    if isinstance(exc, openai.APIStatusError):
+        status = exc.status_code
+        if status not in (408, 409, 429) and status < 500:
+            return None
+    elif not isinstance(exc, openai.APIConnectionError):  # includes timeouts
+        return None
+
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    retry_after = headers.get("retry-after-ms")
+    if retry_after:
+        try:
+            return min(float(retry_after) / 1000, BACKOFF_MAX)
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return min(max(0.0, float(retry_after)), BACKOFF_MAX)
+        except ValueError:
+            try:
+                when = email.utils.parsedate_to_datetime(retry_after).timestamp()
+                return min(max(0.0, when - time.time()), BACKOFF_MAX)
+            except (TypeError, ValueError):
+                pass
+    # Full jitter: spreads retries from parallel chunk requests apart
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _complete(client, model, system_prompt, text, stream_fn=None):
+    """One chat completion. Returns (text, stats); raises on API errors.
+    Transient errors (429, 5xx, timeouts, dropped connections) are retried
+    up to MAX_RETRIES times — for streams only before the first token.
+    """
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": text},
+    ]
+    attempt = 0
+    while True:
+        t0 = time.time()
+        streamed = []
+
+        def on_text(partial):
+            streamed.append(True)
+            stream_fn(partial)
+
+        try:
+            with _inflight_slot():
+                if stream_fn:
+                    return _stream(client, model, messages, on_text, t0)
+                response = client.chat.completions.create(model=model, messages=messages)
+        except Cancelled:
+            raise
+        except Exception as e:
+            delay = None if streamed or attempt >= MAX_RETRIES else _retry_delay(e, attempt)
+            if delay is None:
+                _bump("errors")
+                raise
+            _bump("retries")
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        usage = getattr(response, "usage", None)
+        content = response.choices[0].message.content
+        return content, {
+            "ttft_s": None,
+            "tokens": usage.completion_tokens if usage else None,
+            **_token_counts(usage, messages, content),
+        }
+
+
+def _token_counts(usage, messages, content):
+    """prompt_tokens / completion_tokens from the usage report, estimated
+    from the text when the server sends none."""
+    if usage:
+        return {"prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens}
+    return {"prompt_tokens": sum(estimate_tokens(m["content"]) for m in messages),
+            "completion_tokens": estimate_tokens(content or "")}
+
+
+@contextlib.contextmanager
+def _inflight_slot():
+    sem = _inflight
+    with sem:
+        yield
+
+
+def _stream(client, model, messages, stream_fn, t0):
+    """Consume a streaming completion. Returns (text, stats).
+    The response is closed on every exit (errors, Cancelled from stream_fn),
+    so its connection goes back to the shared pool."""
+    text = ""
+    chunks = 0
+    usage = None
+    first = last = None
+    with client.chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
+    ) as stream:
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            last = time.time()
+            if first is None:
+                first = last
+            text += delta
+            chunks += 1
+            stream_fn(text)
+
+    # Servers without usage reporting: one content chunk ~ one token
+    tokens = (usage.completion_tokens if usage else None) or chunks
+    gen_s = (last - first) if first is not None else 0.0
+    stats = {
+        "ttft_s": round(first - t0, 3) if first is not None else None,
+        "tokens": tokens,
+        "tokens_per_s": round((tokens - 1) / gen_s, 1) if gen_s > 0 and tokens > 1 else None,
+        **_token_counts(usage, messages, text),
+    }
+    return text, stats
@@ -4,7 +4,11 @@ PyWebView entry point: opens a native macOS window with WebKit WebView,
 serving the HTML/CSS/JS frontend from ui/ folder. Python API is exposed
 to JavaScript via the pywebview bridge.
 
-Backend modules (downloader, transcriber, analyzer, vault) are unchanged.
+The Api class runs every URL as a job through a three-stage pipeline
+(jobs.Pipeline: download -> transcribe -> analyze) and wires in the backend
+modules: downloader/captions, transcriber in worker processes
+(transcribe_worker, chunker), analyzer, the SQLite caches and library
+index (cache, library), segment files (segments) and the metrics log.
 """
 
 import warnings
@@ -23,31 +27,60 @@ for _p in _BREW_PATHS:
 
 import webview
 import threading
+import contextlib
+import importlib
 import json
-import re
+import hashlib
 import time
 from datetime import datetime
 
 import subprocess
-import sys
-import tempfile
+import cache
+import captions
+import chunker
 import downloader
+import jobs
+import library
+import metrics
+import segments
 import transcriber
+import transcribe_worker
 import analyzer
 import vault
 
 # ── Paths ──
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DOWNLOADS_DIR = os.path.join(BASE_DIR, "downloads")
+# Output, settings and .env live next to the app unless COPYSIGHT_HOME points
+# elsewhere (benchmarks/bench_pipeline.py runs against a throwaway home)
+DATA_DIR = os.environ.get("COPYSIGHT_HOME") or BASE_DIR
+DOWNLOADS_DIR = os.path.join(DATA_DIR, "downloads")
 TRANSCRIPTS_DIR = os.path.join(DOWNLOADS_DIR, "transcripts")
 ANALYSES_DIR = os.path.join(DOWNLOADS_DIR, "analyses")
-SETTINGS_PATH = os.path.join(BASE_DIR, "settings.json")
+PARTIAL_DIR = os.path.join(TRANSCRIPTS_DIR, ".partial")
+INDEX_DB = os.path.join(DOWNLOADS_DIR, "index.db")
+METRICS_LOG = os.path.join(DOWNLOADS_DIR, "metrics.jsonl")
+SETTINGS_PATH = os.path.join(DATA_DIR, "settings.json")
 UI_DIR = os.path.join(BASE_DIR, "ui")
 
-# Ensure output directories exist
-os.makedirs(TRANSCRIPTS_DIR, exist_ok=True)
-os.makedirs(ANALYSES_DIR, exist_ok=True)
+# Library folders and the kind of entry each holds
+_LIBRARY_DIRS = [
+    (ANALYSES_DIR, "analysis"),
+    (TRANSCRIPTS_DIR, "transcript"),
+]
+
+# Playlist entries queued by start_batch() when no limit is given
+BATCH_LIMIT = 50
+
+# Slow imports (parsed on first use) loaded on a background thread once the
+# window is up, so the first job doesn't pay for them
+_WARMUP_MODULES = ["openai", "httpx"]
+
+
+def _ensure_output_dirs():
+    """Create the output directories (on first write, not at import)."""
+    os.makedirs(TRANSCRIPTS_DIR, exist_ok=True)
+    os.makedirs(ANALYSES_DIR, exist_ok=True)
 
 # ── Default analysis prompt (3-paragraph editorial structure) ──
 
@@ -79,6 +112,92 @@ Zasady:
 - Kazda sekcja to JEDEN ciagly akapit, nie lista. Lacznie 9 insightow w 3 akapitach."""
 
 
+# ── Preferences stored in settings.json (key -> default) ──
+
+_PREF_DEFAULTS = {
+    "language": "auto",
+    "model": "turbo",
+    "context": "",
+    "analysis_prompt": "",
+    # Per-stage worker counts for the job queue (see jobs.DEFAULT_LIMITS)
+    "concurrency": dict(jobs.DEFAULT_LIMITS),
+    # Parallel chunked transcription: worker count (0/1 = single pass) and
+    # minimum recording length in minutes before chunking kicks in
+    "chunk_workers": 0,
+    "chunk_min_minutes": 20,
+    # Seconds before an idle transcription worker exits and frees the model
+    "worker_idle_timeout": transcribe_worker.DEFAULT_IDLE_TIMEOUT,
+    # Transcription engine: "auto" (mlx on Apple Silicon, else cpu), "mlx" or
+    # "cpu"; compute type and thread count (0 = auto) apply to the cpu engine
+    "backend": "auto",
+    "compute_type": "int8",
+    "cpu_threads": 0,
+    # Cut silences out before transcribing (segment times map back). Off by
+    # default: costs an ffmpeg silencedetect pass per job, and only pays off
+    # on recordings with long pauses
+    "vad_trim": False,
+    # Also keep a 192 kbps MP3 copy (off: transcribe the native m4a/webm/opus)
+    "keep_mp3": False,
+    # Video captions vs. Whisper: "captions_first", "whisper_only" or
+    # "captions_then_upgrade" (Whisper transcript follows in the background)
+    "captions_policy": captions.DEFAULT_POLICY,
+    # Long-transcript analysis: token budget per chunk and parallel requests
+    "analysis_chunk_tokens": analyzer.DEFAULT_CHUNK_TOKENS,
+    "analysis_concurrency": analyzer.DEFAULT_CONCURRENCY,
+    # Max LLM requests in flight across all jobs (shared pooled client)
+    "llm_max_inflight": analyzer.DEFAULT_MAX_INFLIGHT,
+    # Size bound of the analysis cache (least recently used entries go first)
+    "analysis_cache_mb": cache.DEFAULT_ANALYSIS_CACHE_BYTES // (1024 * 1024),
+    # Total download bandwidth cap in Mbit/s across concurrent downloads (0 = off)
+    "bandwidth_limit_mbps": 0,
+    # Fragments of a DASH/HLS stream fetched in parallel per download (1 = serial)
+    "download_fragments": downloader.DEFAULT_FRAGMENTS,
+    # Hours a resolved URL is reused without contacting the site (0 = forever)
+    "url_cache_ttl_hours": cache.DEFAULT_URL_TTL // 3600,
+}
+
+
+def _load_partial(path):
+    """Segments saved by an interrupted transcription (JSON lines), or []."""
+    segments = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    segments.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # torn last line after a crash
+    except OSError:
+        pass
+    return segments
+
+
+def _engine_options(settings):
+    """Engine settings passed through to transcriber.transcribe_segments()."""
+    return {
+        "backend": settings.get("backend", "auto"),
+        "compute_type": settings.get("compute_type", "int8"),
+        "cpu_threads": int(settings.get("cpu_threads", 0) or 0),
+        "vad": bool(settings.get("vad_trim", False)),
+    }
+
+
+def _whisper_args(settings):
+    """(language or None, model, initial prompt or None) of a job's settings."""
+    language = settings.get("language", "auto")
+    if language == "auto":
+        language = None
+    return language, settings.get("model", "turbo"), settings.get("context", "").strip() or None
+
+
+def _format_clock(seconds):
+    """Format seconds as M:SS or H:MM:SS."""
+    seconds = int(seconds)
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+
 def _versioned_path(base_path, suffix="", output_dir=None):
     """Generate a versioned file path: <dir>/<name><suffix>_YYYYMMDD_HHmm.txt"""
     name = os.path.splitext(os.path.basename(base_path))[0]
@@ -89,6 +208,12 @@ def _versioned_path(base_path, suffix="", output_dir=None):
     return os.path.join(os.path.dirname(base_path), filename)
 
 
+def _inside(path, *dirs):
+    """True if path resolves to a file under one of dirs."""
+    real_path = os.path.realpath(path)
+    return any(real_path.startswith(os.path.realpath(d)) for d in dirs)
+
+
 # ══════════════════════════════════════════
 #  Python API exposed to JavaScript
 # ══════════════════════════════════════════
@@ -101,273 +226,638 @@ class Api:
     """
 
     def __init__(self):
+        prefs = self._load_prefs()
         self._lock = threading.Lock()
-        self._cancel = threading.Event()
-        self._pipeline_status = {
-            "step": "idle",
-            "stamps": [],
-            "progress": 0,
-            "error": None,
-            "done": False,
-        }
-        self._current_transcript = ""
-        self._current_analysis = ""
-        self._last_mp3 = ""
-        self._video_meta = {}
+        self._jobs = jobs.JobRegistry()
+        self._metrics = metrics.MetricsLog(METRICS_LOG)
+        self._pipeline = jobs.Pipeline(
+            [
+                ("download", self._stage_download),
+                ("transcribe", self._stage_transcribe),
+                ("analyze", self._stage_analyze),
+            ],
+            limits=prefs.get("concurrency"),
+            on_finish=self._metrics.record,
+        )
+        self._workers = transcribe_worker.WorkerPool(
+            cwd=BASE_DIR,
+            idle_timeout=prefs.get("worker_idle_timeout",
+                                   transcribe_worker.DEFAULT_IDLE_TIMEOUT),
+        )
+        self._transcript_cache = cache.TranscriptCache(INDEX_DB)
+        analyzer.set_max_inflight(
+            prefs.get("llm_max_inflight", analyzer.DEFAULT_MAX_INFLIGHT))
+        self._analysis_cache = cache.AnalysisCache(
+            INDEX_DB,
+            max_bytes=prefs.get("analysis_cache_mb", 50) * 1024 * 1024)
+        self._url_cache = cache.UrlCache(
+            INDEX_DB, ttl=prefs.get("url_cache_ttl_hours", 168) * 3600)
+        self._library = library.LibraryIndex(INDEX_DB)
+        # The stores open index.db on first use; nothing above touches disk
         self._current_entry_path = ""
-        self._is_processing = False
+        self._current_transcript_path = ""
+        self._downloads_active = 0
+        self._startup = {}  # warm-up time and errors, reported by get_metrics()
+
+        # Files added or deleted outside the app since last launch are picked
+        # up by _reconcile_library(), started by the warm-up or the first
+        # library call, whichever comes first
+        self._library_ready = threading.Event()
+        self._reconcile_started = False
 
     # ── Pipeline ──
 
-    def start_pipeline(self, url):
+    def start_pipeline(self, url, force_analyze=False, start=None, end=None):
         """One-click pipeline: Download -> Transcribe -> Analyze.
-        Runs in a background thread. Poll get_pipeline_status() for updates.
+        Queues a new job and returns its ID. Poll get_pipeline_status(job_id).
+        force_analyze: skip the analysis cache and call the LLM again.
+        start/end: only this part of the video (seconds or "H:MM:SS"; end
+        empty = to the end). The URL may carry it as well: "...#t=40:00,1:10:00".
         """
-        with self._lock:
-            if self._is_processing:
-                return {"started": False, "reason": "Already processing"}
-
-            url = (url or "").strip()
-            if not url:
-                return {"started": False, "reason": "No URL"}
-
-            self._is_processing = True
-            self._cancel.clear()
-            self._pipeline_status = {
-                "step": "connecting",
-                "stamps": [],
-                "progress": 0,
-                "error": None,
-                "done": False,
-            }
-            self._current_transcript = ""
-            self._current_analysis = ""
-            self._video_meta = {}
-            self._current_entry_path = ""
+        url = (url or "").strip()
+        if not url:
+            return {"started": False, "reason": "No URL"}
+        if start is not None or end is not None:
+            section_start = downloader.parse_clock(start) or 0.0
+            section_end = downloader.parse_clock(end)
+            if section_end is not None and section_end <= section_start:
+                return {"started": False, "reason": "Range ends before it starts"}
+            url = downloader.with_section(url, (section_start, section_end))
 
         settings = self._load_prefs()
-
-        def work():
-            try:
-                # Step 1: Download
-                self._add_stamp("Connecting...")
-
-                download_log = []
-
-                def on_progress(pct, msg):
-                    with self._lock:
-                        if self._pipeline_status["stamps"] and msg:
-                            self._pipeline_status["stamps"][-1] = msg
-
-                def on_log(msg):
-                    if msg:
-                        download_log.append(str(msg))
-
-                dl_result = downloader.download_audio_as_mp3(
-                    url,
-                    output_path=DOWNLOADS_DIR,
-                    log_fn=on_log,
-                    progress_fn=on_progress,
-                )
-                if not dl_result:
-                    # Find most informative log entry
-                    detail = "Unknown error"
-                    for entry in reversed(download_log):
-                        if "error" in entry.lower() or "not found" in entry.lower():
-                            detail = entry
-                            break
-                    if detail == "Unknown error" and download_log:
-                        detail = download_log[-1]
-                    self._set_status(step="error", error=detail)
-                    self._add_stamp(f"Error: {detail[:80]}")
-                    return
-                mp3 = dl_result["mp3"]
-                self._last_mp3 = mp3
-                self._video_meta = dl_result.get("meta", {})
-                self._add_stamp("Downloading... done.")
-
-                if self._cancel.is_set():
-                    self._add_stamp("Cancelled.")
-                    self._set_status(step="idle")
-                    return
-
-                self._set_status(step="transcribing")
-
-                # Step 2: Transcribe (with cache)
-                # Check if a transcript already exists for this audio file
-                mp3_base = os.path.splitext(os.path.basename(mp3))[0]
-                cached_transcript = self._find_cached_transcript(mp3_base)
-
-                if cached_transcript:
-                    self._add_stamp("Transcript found in library.")
-                    text = cached_transcript["text"]
-                    txt_path = cached_transcript["path"]
-                else:
-                    lang_val = settings.get("language", "auto")
-                    if lang_val == "auto":
-                        lang_val = None
-                    ctx = settings.get("context", "").strip() or None
-                    model = settings.get("model", "turbo")
-
-                    self._add_stamp("Transcribing...")
-
-                    # Run in subprocess to isolate Metal/GPU crashes
-                    text = self._transcribe_in_subprocess(mp3, lang_val, model, ctx)
-                    if not text:
-                        if self._cancel.is_set():
-                            # Cancellation handled — don't show error
-                            pass
-                        else:
-                            self._set_status(step="error", error="Transcription failed")
-                            self._add_stamp("Error: Transcription failed")
-                        return
-                    self._add_stamp("Transcribing... done.")
-
-                    # Auto-save transcript
-                    txt_path = _versioned_path(mp3, output_dir=TRANSCRIPTS_DIR)
-                    with open(txt_path, "w", encoding="utf-8") as f:
-                        f.write(text)
-
-                self._current_transcript = text
-                self._current_entry_path = txt_path
-
-                if self._cancel.is_set():
-                    self._add_stamp("Cancelled.")
-                    self._set_status(step="idle")
-                    return
-
-                # Step 3: Analyze (if API key available)
-                api_key = vault.load_key()
-                if api_key:
-                    self._set_status(step="analyzing")
-                    self._add_stamp("Analyzing...")
-                    prompt = settings.get("analysis_prompt", "").strip()
-                    if not prompt:
-                        prompt = DEFAULT_ANALYSIS_PROMPT
-
-                    result = analyzer.analyze_text(text, prompt, api_key)
-                    if result:
-                        self._current_analysis = result
-                        self._add_stamp("Analyzing... done.")
-                        # Auto-save analysis with source header
-                        path = _versioned_path(mp3, "_analiza", output_dir=ANALYSES_DIR)
-                        with open(path, "w", encoding="utf-8") as f:
-                            meta = self._video_meta
-                            if meta.get("url"):
-                                f.write(f"<!-- source: {meta['url']} -->\n")
-                            f.write(result)
-                        self._current_entry_path = path
-                    else:
-                        self._add_stamp("Analysis: API error (transcript saved)")
-                else:
-                    self._add_stamp("No API key -- transcript only.")
-
-                self._set_status(step="done", done=True)
-
-            except Exception as exc:
-                self._set_status(step="error", error=str(exc)[:120])
-                self._add_stamp(f"Error: {str(exc)[:80]}")
-            finally:
-                with self._lock:
-                    self._is_processing = False
-
-        threading.Thread(target=work, daemon=True).start()
-        return {"started": True}
-
-    def get_pipeline_status(self):
-        """Returns current pipeline status for JS polling."""
-        with self._lock:
-            status = self._pipeline_status.copy()
-            status["stamps"] = list(status["stamps"])
-            return status
-
-    def get_result(self):
-        """Returns the current transcript and/or analysis text + metadata."""
+        if force_analyze:
+            settings["force_analyze"] = True
+        return {"started": True, "job_id": self._submit(url, settings)}
+
+    def _submit(self, url, settings, note=None):
+        """Queue a job; note: an extra first stamp. Returns the job ID."""
+        job = jobs.Job(url, settings=settings)
+        if note:
+            job.add_stamp(note)
+        job.add_stamp("Connecting...")
+        self._jobs.add(job)
+        self._pipeline.submit(job)
+        return job.id
+
+    def submit_urls(self, urls):
+        """Queue several URLs at once (list or whitespace-separated string).
+        Returns {"job_ids": [...]}.
+        """
+        if isinstance(urls, str):
+            urls = urls.split()
+        job_ids = []
+        for url in urls or []:
+            result = self.start_pipeline(url)
+            if result.get("started"):
+                job_ids.append(result["job_id"])
+        return {"job_ids": job_ids}
+
+    def start_batch(self, url, limit=None):
+        """Expand a playlist or channel (one flat extraction) and queue one job
+        per entry, at most `limit` of them (default BATCH_LIMIT). Entries
+        whose transcript is already in the library are skipped. Each item
+        moves on to transcription as soon as its own download finishes.
+        Returns {"started", "job_id" (first), "job_ids", "skipped", "title",
+        "capped"} — capped: the playlist had more entries than the limit, also
+        the first job's first stamp — or {"started": False, "reason"} when the
+        playlist cannot be read.
+        """
+        url = (url or "").strip()
+        if not url:
+            return {"started": False, "reason": "No URL"}
+        limit = max(1, int(limit or BATCH_LIMIT))
+        batch_log = []
+        # One entry past the limit tells whether the playlist was cut short
+        playlist = downloader.expand_playlist(url, log_fn=batch_log.append, limit=limit + 1)
+        if playlist is None:
+            # Not a playlist: a single video
+            return self.start_pipeline(url)
+        if "error" in playlist:
+            return {"started": False, "reason": f"Could not read playlist: {playlist['error']}"}
+
+        entries = playlist["entries"]
+        capped = len(entries) > limit
+        note = f"Playlist capped at its first {limit} videos." if capped else None
+        settings = self._load_prefs()
+        job_ids = []
+        skipped = 0
+        for entry in entries[:limit]:
+            if self._transcript_cache.has_media(entry["source"], entry["id"]):
+                skipped += 1
+                continue
+            job_ids.append(self._submit(entry["url"], dict(settings),
+                                        None if job_ids else note))
+
+        if not job_ids:
+            reason = (f"All {skipped} items already in library" if skipped
+                      else "Playlist is empty")
+            if capped:
+                reason += f" (first {limit} checked)"
+            return {"started": False, "reason": reason, "skipped": skipped}
+        return {"started": True, "job_id": job_ids[0], "job_ids": job_ids,
+                "skipped": skipped, "title": playlist["title"], "capped": capped}
+
+    def reanalyze(self, job_id=None):
+        """Re-run a job's video with a fresh LLM analysis (the transcript comes
+        from the cache). Returns the new job like start_pipeline()."""
+        job = self._jobs.get(job_id)
+        if not job:
+            return {"started": False, "reason": "No job"}
+        return self.start_pipeline(job.url, force_analyze=True)
+
+    def get_pipeline_status(self, job_id=None):
+        """Returns status of a job (default: most recently submitted) for JS polling."""
+        job = self._jobs.get(job_id)
+        if not job:
+            return {"step": "idle", "stamps": [], "progress": 0,
+                    "error": None, "done": False, "job_id": None}
+        return job.snapshot()
+
+    def wait_for_status(self, job_id=None, since_version=0, timeout=25):
+        """Long-poll: blocks until the job's status changes after since_version
+        (or timeout seconds pass) and returns only what changed — see
+        Job.wait_for_changes. pywebview runs each JS call on its own thread."""
+        job = self._jobs.get(job_id)
+        if not job:
+            return {"job_id": None, "version": 0, "stamps_from": 0, "stamps": [],
+                    "changes": {"step": "idle", "progress": 0, "error": None,
+                                "done": False}}
+        try:
+            timeout = min(max(float(timeout), 0), 60)
+        except (TypeError, ValueError):
+            timeout = 25
+        return job.wait_for_changes(int(since_version or 0), timeout)
+
+    def get_result(self, job_id=None):
+        """Returns the transcript and/or analysis text + metadata of a job."""
+        job = self._jobs.get(job_id)
+        if not job:
+            return {"transcript": "", "analysis": "", "meta": {}}
+        if job.entry_path:
+            self._current_entry_path = job.entry_path
+            self._current_transcript_path = job.transcript_path
         return {
-            "transcript": self._current_transcript,
-            "analysis": self._current_analysis,
-            "meta": self._video_meta,
+            "job_id": job.id,
+            "transcript": job.transcript,
+            "analysis": job.analysis,
+            "meta": job.meta,
+            "timings": job.timings,
+            "stages": job.stage_times,
         }
 
-    def cancel_pipeline(self):
-        """Request cancellation of the running pipeline."""
-        self._cancel.set()
-        return {"cancelled": True}
+    def list_jobs(self):
+        """Status of all known jobs (queued, running and recently finished)."""
+        return {
+            "jobs": [job.snapshot() for job in self._jobs.all()],
+            "queues": self._pipeline.queue_depths(),
+            "limits": self._pipeline.get_limits(),
+        }
 
-    def _add_stamp(self, text):
-        with self._lock:
-            self._pipeline_status["stamps"].append(text)
+    def cancel_pipeline(self, job_id=None):
+        """Request cancellation of a job (default: most recently submitted)."""
+        job = self._jobs.get(job_id)
+        if job:
+            job.cancel.set()
+        return {"cancelled": bool(job)}
+
+    # ── Pipeline stages (run on jobs.Pipeline worker threads) ──
+
+    def _stage_download(self, job):
+        job.set_status(step="connecting")
+        keep_mp3 = bool(job.settings.get("keep_mp3"))
+
+        # A time range ("#t=start,end") is part of every cache key
+        url, section = downloader.split_section(job.url)
+        fragment = downloader.with_section("", section)
+
+        # Repeat URL: reuse metadata and audio on disk, no network at all
+        policy = captions.resolve_policy(job.settings.get("captions_policy"))
+        url_key = downloader.normalize_url(url) + fragment
+        cached = self._url_cache.lookup(url_key)
+        if cached and cached["captions"]:
+            if policy != "whisper_only":
+                # Transcribed from captions before: reuse that transcript
+                job.meta = cached["meta"]
+                if section:
+                    job.meta["section"] = list(section)
+                job.captions = {"name": library.parse_base(
+                    os.path.basename(cached["captions"])) + ".txt"}
+                job.timings["download"] = {"url_cache": True}
+                job.add_stamp("Downloading... cached.")
+                return "analyze" if self._use_captions(job, cached["captions"]) else False
+            cached = None
+        if cached and (not keep_mp3 or cached["audio"].endswith(".mp3")):
+            job.audio = cached["audio"]
+            job.meta = cached["meta"]
+            if section:
+                job.meta["section"] = list(section)
+            job.timings["download"] = {"url_cache": True}
+            job.add_stamp("Downloading... cached.")
+            return True
+
+        download_log = []
+
+        def on_progress(pct, msg):
+            job.update_stamp(msg)
+
+        def on_log(msg):
+            if msg:
+                download_log.append(str(msg))
+
+        with self._active_download() as active:
+            dl_result = downloader.download_audio(
+                url,
+                output_path=DOWNLOADS_DIR,
+                log_fn=on_log,
+                progress_fn=on_progress,
+                keep_mp3=keep_mp3,
+                ratelimit=self._download_ratelimit(job.settings, active),
+                use_captions=policy != "whisper_only",
+                language=_whisper_args(job.settings)[0],
+                section=section,
+                fragments=int(job.settings.get("download_fragments")
+                              or downloader.DEFAULT_FRAGMENTS),
+                cancel=job.cancel,
+            )
+        if not dl_result and job.cancel.is_set():
+            # The .part file stays: the next run of this URL resumes it
+            job.mark_cancelled()
+            return False
+        if not dl_result:
+            # Find most informative log entry
+            detail = "Unknown error"
+            for entry in reversed(download_log):
+                if "error" in entry.lower() or "not found" in entry.lower():
+                    detail = entry
+                    break
+            if detail == "Unknown error" and download_log:
+                detail = download_log[-1]
+            job.fail(detail)
+            return False
+        job.meta = dl_result.get("meta", {})
+        job.timings["download"] = dl_result.get("stats", {})
+        if dl_result.get("captions"):
+            # Captions instead of audio: transcription is skipped entirely
+            job.captions = dl_result["captions"]
+            advance = self._use_captions(job)
+            for key in self._url_keys(job):
+                self._url_cache.put(key, job.meta, job.entry_path, kind="captions")
+            return "analyze" if advance else False
+        job.audio = dl_result["audio"]
+        for key in self._url_keys(job):
+            self._url_cache.put(key, job.meta, job.audio)
+        stats = dl_result.get("stats", {})
+        if stats.get("download_s") and stats.get("downloaded_bytes"):
+            mb_per_s = stats["downloaded_bytes"] / stats["download_s"] / 1e6
+            resumed = (f", resumed at {stats['resumed_bytes'] / 1e6:.0f} MB"
+                       if stats.get("resumed_bytes") else "")
+            job.add_stamp(f"Downloading... done ({mb_per_s:.1f} MB/s{resumed}).")
+        else:
+            job.add_stamp("Downloading... done.")
+        return True
 
-    def _set_status(self, **kwargs):
+    @staticmethod
+    def _url_keys(job):
+        """URL cache keys of a job: the submitted URL and the page URL yt-dlp
+        reported, normalized, each with the job's time range."""
+        url, section = downloader.split_section(job.url)
+        fragment = downloader.with_section("", section)
+        keys = {downloader.normalize_url(url) + fragment}
+        if job.meta.get("url"):
+            keys.add(downloader.normalize_url(job.meta["url"]) + fragment)
+        return keys
+
+    @contextlib.contextmanager
+    def _active_download(self):
+        """Count a running download; yields how many run now (this one included)."""
         with self._lock:
-            self._pipeline_status.update(kwargs)
-
-    # ── Transcription subprocess (Metal crash isolation) ──
-
-    def _transcribe_in_subprocess(self, mp3, lang, model, ctx):
-        """Run mlx-whisper in a subprocess to isolate Metal/GPU crashes.
-        If Metal SIGABRT occurs, only the subprocess dies — the main app survives.
-        Returns transcript text or None.
-        """
-        out_fd, out_path = tempfile.mkstemp(suffix=".txt", prefix="copysight_")
-        os.close(out_fd)
-
-        # Build a small script that imports transcriber and writes result to file
-        script = (
-            f"import transcriber, sys\n"
-            f"text = transcriber.transcribe_audio(\n"
-            f"    {mp3!r},\n"
-            f"    language={lang!r},\n"
-            f"    model_size={model!r},\n"
-            f"    initial_prompt={ctx!r},\n"
-            f")\n"
-            f"if text:\n"
-            f"    with open({out_path!r}, 'w', encoding='utf-8') as f:\n"
-            f"        f.write(text)\n"
-            f"    sys.exit(0)\n"
-            f"else:\n"
-            f"    sys.exit(1)\n"
-        )
-
-        proc = subprocess.Popen(
-            [sys.executable, "-c", script],
-            cwd=BASE_DIR,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env=os.environ.copy(),
-        )
+            self._downloads_active += 1
+            active = self._downloads_active
+        try:
+            yield active
+        finally:
+            with self._lock:
+                self._downloads_active -= 1
 
-        # Poll for completion while checking cancel
-        while proc.poll() is None:
-            if self._cancel.is_set():
-                proc.terminate()
-                try:
-                    proc.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    proc.kill()
-                self._safe_unlink(out_path)
-                return None
-            time.sleep(0.5)
-
-        if proc.returncode != 0:
-            stderr = proc.stderr.read().decode("utf-8", errors="replace")[:200]
-            if proc.returncode < 0:
-                # Negative return = killed by signal (e.g. -6 = SIGABRT)
-                self._add_stamp(f"GPU error (signal {-proc.returncode}). Try again.")
-            elif stderr:
-                self._add_stamp(f"Error: {stderr[:80]}")
-            self._safe_unlink(out_path)
+    @staticmethod
+    def _download_ratelimit(settings, active=1):
+        """Per-download speed cap (bytes/s): the global bandwidth cap split
+        across the downloads running when this one starts, or None. A lone
+        download gets the whole cap; the rate is fixed for its duration."""
+        mbps = float(settings.get("bandwidth_limit_mbps", 0) or 0)
+        if mbps <= 0:
             return None
+        return mbps * 125_000 / max(1, active)
+
+    def _stage_transcribe(self, job):
+        job.set_status(step="transcribing")
+        settings = job.settings
+        audio_path = job.audio
+        lang_val, model, ctx = _whisper_args(settings)
+
+        # Check the transcript cache (same media, model, language and prompt)
+        extractor, media_id = cache.media_identity(job.meta, audio_path)
+        cache_args = (extractor, media_id, model, lang_val, ctx)
+        cached_transcript = self._transcript_cache.lookup(*cache_args)
+
+        if cached_transcript:
+            job.add_stamp("Transcript found in library.")
+            job.timings["transcribe"] = {"cached": True}
+            text = cached_transcript["text"]
+            txt_path = cached_transcript["path"]
+        else:
+            job.add_stamp("Transcribing...")
+
+            # Segments are appended to a partial file as they stream in, so a
+            # crash or cancel can resume where it stopped
+            partial_key = (cache.TranscriptCache.make_key(*cache_args) if extractor
+                           else hashlib.sha1(audio_path.encode("utf-8")).hexdigest())
+            partial_path = os.path.join(PARTIAL_DIR, partial_key + ".jsonl")
+
+            # Long recordings: parallel chunks across several workers (opt-in)
+            chunk_workers = int(settings.get("chunk_workers", 0) or 0)
+            duration = (transcriber._get_audio_duration(audio_path)
+                        if chunk_workers > 1 else None)
+            if duration and duration >= settings.get("chunk_min_minutes", 20) * 60:
+                result = self._transcribe_chunked(job, audio_path, lang_val, model, ctx,
+                                                  chunk_workers)
+            else:
+                # Run in worker process to isolate Metal/GPU crashes
+                result = self._transcribe_in_worker(job, audio_path, lang_val, model, ctx,
+                                                    partial_path)
+            if not result:
+                if job.cancel.is_set():
+                    job.mark_cancelled()
+                else:
+                    job.fail("Transcription failed")
+                return False
+            job.add_stamp("Transcribing... done.")
+
+            text, timed = result
+            txt_path = self._save_transcript(audio_path, text, cache_args, timed,
+                                             origin=self._section_start(job))
+            self._safe_unlink(partial_path)
+
+        job.transcript = text
+        job.entry_path = job.transcript_path = txt_path
+        return self._transcript_ready(job)
+
+    def _use_captions(self, job, saved_path=None):
+        """Transcript from the video's own captions (fetched instead of the
+        audio), or the captions transcript an earlier run of the URL saved
+        (saved_path, from the URL cache). A Whisper transcript of the video
+        already in the library wins. Returns True when the job goes on to
+        analysis."""
+        found = job.captions
+        lang_val, model, ctx = _whisper_args(job.settings)
+        extractor, media_id = cache.media_identity(job.meta)
+        cached = self._transcript_cache.lookup(extractor, media_id, model, lang_val, ctx)
+        if cached:
+            job.add_stamp("Transcript found in library.")
+            job.timings["transcribe"] = {"cached": True}
+        elif saved_path:
+            with open(saved_path, "r", encoding="utf-8") as f:
+                cached = {"text": f.read(), "path": saved_path}
+            job.add_stamp("Captions transcript found in library.")
+            job.timings["transcribe"] = {"captions": "cached", "cached": True}
+            if captions.resolve_policy(job.settings.get("captions_policy")) \
+                    == "captions_then_upgrade":
+                self._queue_upgrade(job)
+        else:
+            label = "uploaded" if found["kind"] == "subtitles" else "auto-generated"
+            job.add_stamp(f"Captions found ({label}, {found['language']}).")
+            cache_args = (extractor, media_id, "captions", found["language"], None)
+            cached = self._transcript_cache.lookup(*cache_args)
+            job.timings["transcribe"] = {"captions": found["kind"], "cached": bool(cached),
+                                         "language": found["language"]}
+            if not cached:
+                text = found["text"]
+                path = self._save_transcript(found["name"], text, cache_args,
+                                             found["segments"],
+                                             origin=self._section_start(job))
+                cached = {"text": text, "path": path}
+            if captions.resolve_policy(job.settings.get("captions_policy")) \
+                    == "captions_then_upgrade":
+                self._queue_upgrade(job)
+        job.transcript = cached["text"]
+        job.entry_path = job.transcript_path = cached["path"]
+        return self._transcript_ready(job)
+
+    def _queue_upgrade(self, job):
+        """Background job that replaces a captions transcript with a Whisper
+        one: downloads the audio and transcribes it, no analysis."""
+        for other in self._jobs.active():
+            if other.url == job.url and other.settings.get("upgrade_of"):
+                return  # already on its way
+        settings = {**job.settings, "captions_policy": "whisper_only",
+                    "transcript_only": True, "upgrade_of": job.id}
+        settings.pop("force_analyze", None)
+        upgrade = jobs.Job(job.url, settings=settings)
+        upgrade.add_stamp("Upgrading captions to a Whisper transcript...")
+        self._jobs.add(upgrade, latest=False)
+        self._pipeline.submit(upgrade)
+        job.add_stamp("Whisper transcript queued in the background.")
+
+    def _save_transcript(self, base_path, text, cache_args, timed=None, origin=0.0):
+        """Auto-save a transcript, cache and index it. Its timed segments go
+        to a .seg file next to it (segments.py). Returns the file path."""
+        path = _versioned_path(base_path, output_dir=TRANSCRIPTS_DIR)
+        _ensure_output_dirs()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if timed:
+            try:
+                segments.write(segments.path_for(path), timed, text=text, origin=origin)
+            except OSError:
+                pass  # the transcript itself is saved; only timing is lost
+        self._transcript_cache.put(*cache_args, path)
+        self._library.add(path, "transcript", text=text)
+        return path
 
-        # Read result
+    @staticmethod
+    def _section_start(job):
+        """Where a time-range job's audio starts in the video (0 otherwise)."""
+        section = job.meta.get("section")
+        return float(section[0] or 0.0) if section else 0.0
+
+    def _transcript_ready(self, job):
+        """The job has its transcript. Returns True to go on to analysis;
+        without an API key (or for a transcript-only job) it ends here."""
+        if job.settings.get("transcript_only"):
+            job.add_stamp("Transcript saved.")
+            job.set_status(step="done", done=True)
+            return False
+        if not vault.load_key():
+            job.add_stamp("No API key -- transcript only.")
+            job.set_status(step="done", done=True)
+            return False
+        return True
+
+    def _stage_analyze(self, job):
+        job.set_status(step="analyzing")
+        job.add_stamp("Analyzing...")
+        prompt = job.settings.get("analysis_prompt", "").strip()
+        if not prompt:
+            prompt = DEFAULT_ANALYSIS_PROMPT
+        chunk_tokens = int(job.settings.get("analysis_chunk_tokens")
+                           or analyzer.DEFAULT_CHUNK_TOKENS)
+
+        # Same transcript, system prompt and model → reuse the stored answer
+        cache_args = (cache.text_hash(job.transcript),
+                      analyzer.prompt_fingerprint(job.transcript, prompt, chunk_tokens),
+                      analyzer.DEFAULT_MODEL)
+        cached = None
+        if not job.settings.get("force_analyze"):
+            cached = self._analysis_cache.lookup(*cache_args)
+        if cached:
+            job.analysis = cached["text"]
+            job.add_stamp("Analysis found in library.")
+            job.timings["analysis"] = {"cached": True}
+            job.entry_path = cached["path"] or self._save_analysis(job, cached["text"])
+            job.set_status(step="done", done=True)
+            return True
+
+        # Stream tokens into the status so the reader renders as they arrive
+        def on_partial(text):
+            if job.cancel.is_set():
+                raise analyzer.Cancelled()
+            job.set_status(partial_analysis=text)
+
+        # Long transcripts are map-reduced in parallel chunks (short ones: one call)
+        result = analyzer.analyze_long(
+            job.transcript, prompt, vault.load_key(),
+            stream_fn=on_partial,
+            stats_fn=lambda stats: job.timings.__setitem__("analysis", stats),
+            max_chunk_tokens=chunk_tokens,
+            concurrency=int(job.settings.get("analysis_concurrency")
+                            or analyzer.DEFAULT_CONCURRENCY),
+            cancel=job.cancel,
+        )
+        job.set_status(partial_analysis=None)
+        if job.cancel.is_set():
+            job.mark_cancelled()
+            return False
+        if result:
+            job.analysis = result
+            job.add_stamp("Analyzing... done.")
+            job.entry_path = self._save_analysis(job, result)
+            self._analysis_cache.put(*cache_args, result, job.entry_path)
+        else:
+            job.add_stamp("Analysis: API error (transcript saved)")
+
+        job.set_status(step="done", done=True)
+        return True
+
+    def _save_analysis(self, job, text):
+        """Auto-save analysis with source header. Returns the file path."""
+        base = job.audio or (job.captions or {}).get("name", "")
+        path = _versioned_path(base, "_analiza", output_dir=ANALYSES_DIR)
+        _ensure_output_dirs()
+        with open(path, "w", encoding="utf-8") as f:
+            if job.meta.get("url"):
+                source = downloader.with_section(job.meta["url"], job.meta.get("section"))
+                f.write(f"<!-- source: {source} -->\n")
+            f.write(text)
+        self._library.add(path, "analysis", source if job.meta.get("url") else "", text=text)
+        return path
+
+    # ── Transcription worker (Metal crash isolation, warm model) ──
+
+    def _transcribe_in_worker(self, job, audio_path, lang, model, ctx, partial_path):
+        """Run the transcription engine in a persistent worker process.
+        If Metal SIGABRT occurs, only the worker dies — the main app survives
+        and the next job respawns it. Returns (text, segments) or None.
+
+        Segments stream into partial_path (JSON lines) and job.transcript;
+        an existing partial file is resumed from its last segment.
+        """
+        segments = _load_partial(partial_path)
+        resumed = list(segments)
+        resume_at = segments[-1]["end"] if segments else None
+        if resume_at:
+            job.update_stamp(f"Transcribing... resuming at {_format_clock(resume_at)}")
+        job.transcript = "".join(seg["text"] for seg in segments)
+        prefix_text = job.transcript
+
+        # Rewrite what was recovered (drops a torn last line), then append
+        os.makedirs(PARTIAL_DIR, exist_ok=True)
+        partial = open(partial_path, "w", encoding="utf-8")
+        for seg in segments:
+            partial.write(json.dumps(seg, ensure_ascii=False) + "\n")
+
+        def on_event(msg):
+            event = msg.get("event")
+            if event == "phase" and msg.get("msg"):
+                job.set_status(phase=msg["msg"])
+            elif event == "segment":
+                seg = {"start": msg["start"], "end": msg["end"], "text": msg["text"]}
+                partial.write(json.dumps(seg, ensure_ascii=False) + "\n")
+                partial.flush()
+                segments.append(seg)
+                job.transcript += seg["text"]
+                if msg.get("progress") is not None:
+                    pct = round(msg["progress"], 1)
+                    job.set_status(progress=pct)
+                    job.update_stamp(f"Transcribing... {pct:.0f}%")
+
+        worker = self._workers.acquire()
         try:
-            with open(out_path, "r", encoding="utf-8") as f:
-                text = f.read()
-            self._safe_unlink(out_path)
-            return text if text.strip() else None
-        except OSError:
-            self._safe_unlink(out_path)
+            result = worker.transcribe(audio_path, language=lang, model=model, prompt=ctx,
+                                       cancel=job.cancel, on_event=on_event,
+                                       start=resume_at,
+                                       options=_engine_options(job.settings))
+        finally:
+            self._workers.release(worker)
+            partial.close()
+
+        if not result:
+            return None
+        if result.get("error"):
+            if result.get("signal"):
+                job.add_stamp(f"GPU error (signal {result['signal']}). Try again.")
+            else:
+                job.add_stamp(f"Error: {result['error'][:80]}")
+            return None
+        job.timings["transcribe"] = result.get("timings", {})
+        job.set_status(progress=100)
+        text = prefix_text + (result.get("text") or "")
+        return (text, resumed + result.get("segments", [])) if text.strip() else None
+
+    def _transcribe_chunked(self, job, audio_path, lang, model, ctx, workers):
+        """Split at silences and transcribe chunks on `workers` worker processes.
+        Returns (text, segments) or None.
+        """
+        def run_chunk(clip_path):
+            worker = self._workers.acquire()
+            try:
+                result = worker.transcribe(clip_path, language=lang, model=model,
+                                           prompt=ctx, cancel=job.cancel,
+                                           options=_engine_options(job.settings))
+            finally:
+                self._workers.release(worker)
+            if result and result.get("error"):
+                job.add_stamp(f"Error: {result['error'][:80]}")
+                return None
+            return result
+
+        def on_segment(seg):
+            job.transcript += seg["text"]
+            pct = round(seg["progress"], 1)
+            job.set_status(progress=pct)
+            job.update_stamp(f"Transcribing... {pct:.0f}%")
+
+        job.transcript = ""
+        result = chunker.transcribe_chunked(
+            audio_path, workers=workers, language=lang, model_size=model, initial_prompt=ctx,
+            log_fn=lambda msg: None, segment_fn=on_segment, run_chunk=run_chunk,
+            cancel=job.cancel,
+        )
+        if not result:
             return None
+        job.timings["chunked"] = result["stats"]
+        job.set_status(progress=100)
+        text = result["text"]
+        return (text, result["segments"]) if text.strip() else None
 
     @staticmethod
     def _safe_unlink(path):
@@ -378,55 +868,63 @@ class Api:
 
     # ── Cache ──
 
-    def _find_cached_transcript(self, mp3_base):
-        """Check if a transcript already exists for the given audio base name.
-        Returns {"text": ..., "path": ...} or None.
-        Picks the most recent transcript matching the base name.
-        """
-        if not os.path.exists(TRANSCRIPTS_DIR):
-            return None
-
-        candidates = []
-        for fname in os.listdir(TRANSCRIPTS_DIR):
-            if not fname.endswith(".txt"):
-                continue
-            # Strip timestamp suffix: Name_YYYYMMDD_HHMM.txt → Name
-            base = re.sub(r"_\d{8}_\d{4}\.txt$", "", fname)
-            if base == mp3_base:
-                fpath = os.path.join(TRANSCRIPTS_DIR, fname)
-                try:
-                    mtime = os.stat(fpath).st_mtime
-                    candidates.append((mtime, fpath))
-                except OSError:
-                    continue
+    def get_cache_stats(self):
+        """Transcript cache size and hit/miss counters since launch, plus the
+        same for the resolved-URL and analysis caches under "urls"/"analyses"."""
+        stats = self._transcript_cache.stats()
+        stats["urls"] = self._url_cache.stats()
+        stats["analyses"] = self._analysis_cache.stats()
+        return stats
+
+    def get_metrics(self, limit=500):
+        """Performance of recent jobs, from the metrics log: aggregates over the
+        last `limit` finished jobs (percentiles of stage waits, download
+        throughput, transcription RTF per model, LLM latency and tokens), the
+        20 newest records, current queue depths, LLM HTTP counters and the
+        startup warm-up ({"warmup_s", "warmup_errors"} once it has run)."""
+        records = self._metrics.read(limit)
+        return {
+            "summary": metrics.summarize(records),
+            "recent": records[-20:],
+            "queues": self._pipeline.queue_depths(),
+            "llm": analyzer.http_metrics(),
+            "startup": dict(self._startup),
+        }
 
-        if not candidates:
-            return None
+    def get_llm_metrics(self):
+        """HTTP counters of the shared LLM client: requests, connections opened
+        and reused, retries, errors, responses per HTTP version."""
+        return analyzer.http_metrics()
 
-        # Use most recent transcript
-        candidates.sort(reverse=True)
-        best_path = candidates[0][1]
-        try:
-            with open(best_path, "r", encoding="utf-8") as f:
-                text = f.read()
-            if text.strip():
-                return {"text": text, "path": best_path}
-        except OSError:
-            pass
-        return None
+    def invalidate_transcript(self, job_id=None):
+        """Forget cached transcripts (and the resolved URL) for a job's video so
+        the next run re-resolves the URL and re-transcribes.
+        Files on disk are kept. Returns {"removed": n}.
+        """
+        job = self._jobs.get(job_id)
+        if not job:
+            return {"removed": 0}
+        extractor, media_id = cache.media_identity(job.meta, job.audio)
+        if not (extractor and media_id):
+            return {"removed": 0}
+        if job.meta.get("source") and job.meta.get("id"):
+            self._url_cache.invalidate(extractor=job.meta["source"],
+                                       media_id=str(job.meta["id"]))
+        else:
+            # Identified by the audio hash only: forget just this job's URLs
+            for key in self._url_keys(job):
+                self._url_cache.invalidate(url=key)
+        return {"removed": self._transcript_cache.invalidate(extractor, media_id)}
 
     # ── Settings ──
 
     def load_settings(self):
         """Load all settings (API key from vault, rest from settings.json)."""
         prefs = self._load_prefs()
-        return {
-            "api_key": vault.load_key(),
-            "language": prefs.get("language", "auto"),
-            "model": prefs.get("model", "turbo"),
-            "context": prefs.get("context", ""),
-            "analysis_prompt": prefs.get("analysis_prompt", ""),
-        }
+        settings = {"api_key": vault.load_key()}
+        for key, default in _PREF_DEFAULTS.items():
+            settings[key] = prefs.get(key, default)
+        return settings
 
     def save_settings(self, data):
         """Save settings. API key goes to .env, rest to settings.json."""
@@ -443,11 +941,22 @@ class Api:
 
         # Other prefs -> settings.json
         prefs = self._load_prefs()
-        for key in ("language", "model", "context", "analysis_prompt"):
+        for key in _PREF_DEFAULTS:
             if key in data:
                 prefs[key] = data[key]
         self._save_prefs(prefs)
 
+        if "concurrency" in data:
+            self._pipeline.set_limits(data["concurrency"] or {})
+        if "worker_idle_timeout" in data:
+            self._workers.set_idle_timeout(data["worker_idle_timeout"])
+        if "llm_max_inflight" in data:
+            analyzer.set_max_inflight(data["llm_max_inflight"])
+        if "analysis_cache_mb" in data:
+            self._analysis_cache.max_bytes = float(data["analysis_cache_mb"] or 0) * 1024 * 1024
+        if "url_cache_ttl_hours" in data:
+            self._url_cache.ttl = float(data["url_cache_ttl_hours"] or 0) * 3600
+
         return {"saved": True}
 
     def _load_prefs(self):
@@ -463,70 +972,74 @@ class Api:
         with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
             json.dump(prefs, f, indent=2, ensure_ascii=False)
 
+    # ── Startup ──
+
+    def _warmup(self):
+        """Background warm-up after the window is shown: output folders, the
+        library reconcile and the heavy imports deferred at startup (yt-dlp,
+        the OpenAI client)."""
+        t0 = time.time()
+        _ensure_output_dirs()
+        self._start_reconcile()
+        errors = []
+        try:
+            downloader.warmup()
+        except Exception as e:
+            errors.append(f"yt-dlp: {e}")
+        for name in _WARMUP_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+        elapsed = time.time() - t0
+        self._startup.update(warmup_s=round(elapsed, 3), warmup_errors=errors)
+        return elapsed
+
     # ── Library ──
 
-    def get_library(self, bracket="fresh"):
-        """Scan analyses/ and transcripts/ folders, filter by age bracket.
-        Returns list of {title, date_str, path, bracket, kind}.
-        kind: "analysis" or "transcript".
+    def _start_reconcile(self):
+        with self._lock:
+            if self._reconcile_started:
+                return
+            self._reconcile_started = True
+        threading.Thread(target=self._reconcile_library, daemon=True).start()
+
+    def _wait_library(self):
+        """Block until the startup reconcile is done (starting it if needed)."""
+        self._start_reconcile()
+        self._library_ready.wait(timeout=30)
+
+    def _reconcile_library(self):
+        try:
+            self._library.reconcile(_LIBRARY_DIRS)
+        finally:
+            self._library_ready.set()
+        # Then catch up the search index (new/edited files; first run after
+        # upgrading indexes the whole library once)
+        self._library.update_search_index()
+
+    def get_library(self, bracket="fresh", limit=None, offset=0):
+        """List library entries (newest first), filtered by age bracket.
+        Returns list of {title, date_str, path, bracket, kind, source_url, size}.
+        kind: "analysis" or "transcript". limit/offset page through large brackets.
         """
-        entries = []
-        now = datetime.now()
-
-        # Scan both directories
-        dirs = [
-            (ANALYSES_DIR, "analysis"),
-            (TRANSCRIPTS_DIR, "transcript"),
-        ]
-        # Track analysis base names to avoid duplicating transcripts
-        analysis_bases = set()
-
-        for scan_dir, kind in dirs:
-            if not os.path.exists(scan_dir):
-                continue
-            for filename in os.listdir(scan_dir):
-                if not filename.endswith(".txt"):
-                    continue
-                filepath = os.path.join(scan_dir, filename)
-                try:
-                    mtime = datetime.fromtimestamp(os.stat(filepath).st_mtime)
-                except OSError:
-                    continue
-
-                # Parse base name (video title without suffix/timestamp)
-                base = filename
-                base = re.sub(r"_analiza_\d{8}_\d{4}\.txt$", "", base)
-                base = re.sub(r"_\d{8}_\d{4}\.txt$", "", base)
-
-                if kind == "analysis":
-                    analysis_bases.add(base)
-                elif kind == "transcript" and base in analysis_bases:
-                    # Skip transcript if analysis exists for same video
-                    continue
-
-                age_days = (now - mtime).days
-                file_bracket = (
-                    "fresh" if age_days <= 7
-                    else "recent" if age_days <= 30
-                    else "settled" if age_days <= 180
-                    else "gold"
-                )
-
-                if bracket and file_bracket != bracket:
-                    continue
-
-                title = base.replace("_", " ")
-
-                entries.append({
-                    "title": title,
-                    "date_str": mtime.strftime("%d %b"),
-                    "path": filepath,
-                    "bracket": file_bracket,
-                    "kind": kind,
-                })
-
-        entries.sort(key=lambda x: os.stat(x["path"]).st_mtime, reverse=True)
-        return entries
+        self._wait_library()
+        return self._library.entries(bracket or None, limit=limit, offset=offset)
+
+    def search(self, query, limit=20, kind=None):
+        """Full-text search over saved transcripts and analyses (SQLite FTS5).
+        Every word must match; the last one also as a prefix. kind: optional
+        "transcript" or "analysis". Returns {"results": [{path, title, kind,
+        source_url, date_str, snippet, score}, ...], "took_ms"} — best match
+        first, snippet hits wrapped in library.SNIPPET_OPEN/CLOSE.
+        {"error"} without FTS5.
+        """
+        self._wait_library()
+        if not self._library.searchable:
+            return {"error": "Full-text search unavailable (SQLite built without FTS5)"}
+        t0 = time.time()
+        results = self._library.search(query, limit=limit, kind=kind or None)
+        return {"results": results, "took_ms": round((time.time() - t0) * 1000, 1)}
 
     def get_entry(self, path):
         """Read a library entry file and return its content.
@@ -534,16 +1047,78 @@ class Api:
         """
         try:
             # Security: only allow reading from ANALYSES_DIR or TRANSCRIPTS_DIR
-            real_path = os.path.realpath(path)
-            allowed = [os.path.realpath(ANALYSES_DIR), os.path.realpath(TRANSCRIPTS_DIR)]
-            if not any(real_path.startswith(d) for d in allowed):
+            if not _inside(path, ANALYSES_DIR, TRANSCRIPTS_DIR):
                 return {"error": "Access denied"}
             self._current_entry_path = path
+            self._current_transcript_path = self._transcript_for(path) or ""
             with open(path, "r", encoding="utf-8") as f:
                 return {"content": f.read()}
         except (OSError, IOError) as exc:
             return {"error": str(exc)}
 
+    def _transcript_for(self, path):
+        """Transcript behind a library entry: the entry itself, or for an
+        analysis the newest transcript of the same video. None outside the
+        library."""
+        if _inside(path, TRANSCRIPTS_DIR):
+            return path
+        if _inside(path, ANALYSES_DIR):
+            self._wait_library()
+            return self._library.transcript_for(path)
+        return None
+
+    def get_segments(self, path=None, start=None, end=None, offset=None):
+        """Timed segments of a saved transcript (default: the current entry;
+        for an analysis, the transcript it was made from).
+        start/end: seconds, the segments overlapping that window; offset: a
+        character offset in the transcript, the one segment containing it.
+        Returns {"segments": [{index, start, end, text, offset, avg_logprob,
+        no_speech_prob}, ...], "count", "duration", "origin"} — origin is where
+        a time-range transcript starts in the video — or {"error"}.
+        """
+        if path and not _inside(path, ANALYSES_DIR, TRANSCRIPTS_DIR):
+            return {"error": "Access denied"}
+        path = self._transcript_for(path) if path else self._current_transcript_path
+        if not path:
+            return {"error": "No transcript for this entry"}
+        try:
+            with segments.SegmentFile(segments.path_for(path)) as segfile:
+                if offset is not None:
+                    found = segfile.at_offset(int(offset))
+                    found = [found] if found else []
+                else:
+                    found = segfile.range(start, end)
+                return {"segments": found, "count": len(segfile),
+                        "duration": round(segfile.duration, 3), "origin": segfile.origin}
+        except FileNotFoundError:
+            return {"error": "No timing saved for this transcript"}
+        except (OSError, ValueError) as exc:
+            return {"error": str(exc)}
+
+    def export_segments(self, fmt="srt", path=None, start=None, end=None):
+        """Write a transcript's segments as .srt, .vtt or .json next to it
+        (start/end: only that window, re-timed to start at 0). path: default
+        the current entry; an analysis exports its transcript's timing.
+        Returns {"path", "filename"} or {"error"}.
+        """
+        if fmt not in segments.FORMATS:
+            return {"error": f"Unknown format: {fmt}"}
+        if path and not _inside(path, ANALYSES_DIR, TRANSCRIPTS_DIR):
+            return {"error": "Access denied"}
+        path = self._transcript_for(path) if path else self._current_transcript_path
+        if not path:
+            return {"error": "No transcript for this entry"}
+        try:
+            data = segments.export(segments.path_for(path), fmt, start, end)
+            out_path = os.path.splitext(path)[0] + "." + fmt
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(data)
+        except FileNotFoundError:
+            return {"error": "No timing saved for this transcript"}
+        except (OSError, ValueError) as exc:
+            return {"error": str(exc)}
+        return {"path": out_path, "filename": os.path.basename(out_path)}
+
     # ── Actions ──
 
     def reveal_in_finder(self):
@@ -556,13 +1131,8 @@ class Api:
 
     def get_library_counts(self):
         """Return entry count per bracket for all tabs."""
-        counts = {"fresh": 0, "recent": 0, "settled": 0, "gold": 0}
-        all_entries = self.get_library(bracket=None)
-        for entry in all_entries:
-            b = entry.get("bracket")
-            if b in counts:
-                counts[b] += 1
-        return counts
+        self._wait_library()
+        return self._library.counts()
 
     def has_api_key(self):
         """Check if an API key is saved (for first-run detection)."""
@@ -573,6 +1143,25 @@ class Api:
 #  Entry point
 # ══════════════════════════════════════════
 
+def _on_shown(api, window):
+    """Window is visible: warm the backends. With COPYSIGHT_STARTUP_PROBE set
+    (benchmarks/bench_startup.py), report the timestamps and close."""
+    probe = os.environ.get("COPYSIGHT_STARTUP_PROBE")
+    if probe:
+        # Last field: whether downloads/ exists yet (it should not: the
+        # stores open on first use, the folders are made by the warm-up)
+        print(f"startup-probe shown {time.time():.6f} {int(os.path.exists(DOWNLOADS_DIR))}",
+              flush=True)
+
+    def warm():
+        api._warmup()
+        if probe:
+            print(f"startup-probe warm {time.time():.6f}", flush=True)
+            window.destroy()
+
+    threading.Thread(target=warm, name="warmup", daemon=True).start()
+
+
 if __name__ == "__main__":
     api = Api()
     window = webview.create_window(
@@ -583,4 +1172,5 @@ if __name__ == "__main__":
         resizable=False,
         js_api=api,
     )
+    window.events.shown += lambda: _on_shown(api, window)
     webview.start()
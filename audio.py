@@ -0,0 +1,133 @@
+"""FFmpeg helpers: silence detection and clip extraction.
+
+Everything shells out to the ffmpeg/ffprobe binaries already required by
+yt-dlp, so no audio libraries are needed in-process.
+"""
+
+import bisect
+import re
+import subprocess
+
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*([\d.]+)")
+
+
+def detect_silences(audio_path, noise_db=-35, min_silence=0.5, timeout=600):
+    """Find silent stretches with ffmpeg's silencedetect filter.
+    Returns a sorted list of (start, end) seconds, or [] on failure.
+    """
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-nostats', '-i', audio_path,
+             '-af', f'silencedetect=noise={noise_db}dB:d={min_silence}',
+             '-f', 'null', '-'],
+            capture_output=True, text=True, timeout=timeout,
+        )
+    except Exception:
+        return []
+
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        match = _SILENCE_START.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = _SILENCE_END.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def extract_clip(audio_path, out_path, start=None, end=None, timeout=600):
+    """Decode [start, end) of an audio file to 16 kHz mono 16-bit WAV — the
+    exact format Whisper resamples to, so the engine does no further work.
+    Returns True on success.
+    """
+    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y']
+    if start:
+        cmd += ['-ss', f'{start:.3f}']
+    if end is not None:
+        cmd += ['-to', f'{end:.3f}']
+    cmd += ['-i', audio_path, '-ac', '1', '-ar', '16000', '-c:a', 'pcm_s16le', out_path]
+    try:
+        subprocess.run(cmd, capture_output=True, timeout=timeout, check=True)
+        return True
+    except Exception:
+        return False
+
+
+# ── Speech regions (VAD pre-pass) ──
+
+# Only silences at least this long are cut out, and each cut keeps this much
+# padding on both sides so word onsets and trailing consonants survive
+VAD_MIN_SILENCE = 1.0
+VAD_PAD = 0.25
+
+
+def speech_regions(silences, duration, pad=VAD_PAD):
+    """Complement of detect_silences() output over [0, duration]: the spans
+    to keep, each silence shrunk by `pad` at both ends. Returns a sorted
+    list of (start, end) seconds."""
+    regions = []
+    pos = 0.0
+    for start, end in silences:
+        cut_start, cut_end = start + pad, min(end, duration) - pad
+        if cut_end <= cut_start or cut_start <= pos:
+            continue
+        regions.append((pos, cut_start))
+        pos = cut_end
+    if pos < duration:
+        regions.append((pos, duration))
+    return regions
+
+
+def extract_speech(audio_path, out_path, regions, timeout=600):
+    """Decode only `regions` of an audio file, back to back, to 16 kHz mono
+    16-bit WAV (aselect + asetpts: one ffmpeg pass). Returns True on success.
+    """
+    select = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in regions)
+    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', '-i', audio_path,
+           '-af', f"aselect='{select}',asetpts=N/SR/TB",
+           '-ac', '1', '-ar', '16000', '-c:a', 'pcm_s16le', out_path]
+    try:
+        subprocess.run(cmd, capture_output=True, timeout=timeout, check=True)
+        return True
+    except Exception:
+        return False
+
+
+class Timeline:
+    """Maps times in audio cut down to `regions` (extract_speech) back to
+    the original recording, and the other way round."""
+
+    def __init__(self, regions):
+        self.regions = list(regions)
+        self._starts = [start for start, _ in self.regions]
+        self._offsets = []  # where each region starts in the trimmed audio
+        pos = 0.0
+        for start, end in self.regions:
+            self._offsets.append(pos)
+            pos += end - start
+        self.duration = pos
+
+    def to_original(self, t, end=False):
+        """Original time of trimmed time t. A segment end that falls exactly
+        on a cut (end=True) stays in the region before it."""
+        find = bisect.bisect_left if end else bisect.bisect_right
+        i = max(0, find(self._offsets, t) - 1)
+        start, stop = self.regions[i]
+        original = start + t - self._offsets[i]
+        # The trimmed file may run a few ms past the last region
+        return min(original, stop) if i + 1 < len(self.regions) else original
+
+    def to_trimmed(self, t):
+        """Trimmed time of original time t (cut-out spans map to the next
+        region's start)."""
+        i = bisect.bisect_right(self._starts, t) - 1
+        if i < 0:
+            return 0.0
+        start, stop = self.regions[i]
+        return self._offsets[i] + min(t, stop) - start
@@ -0,0 +1,247 @@
+"""Offline end-to-end pipeline benchmark: Api.start_pipeline without the network.
+
+Everything the pipeline talks to is replaced by a local stand-in:
+  - media: generated WAV files served over local HTTP; yt-dlp's generic
+    extractor downloads them like any direct media link
+  - transcription: benchmarks/fake_engine.py (backend "fake", loaded into the
+    worker process via COPYSIGHT_PRELOAD) with a configurable real-time factor
+  - analysis: benchmarks/mock_openai.py with configurable latency and errors
+
+The app runs against a throwaway COPYSIGHT_HOME, so the real library,
+settings and .env are untouched. N jobs are submitted at once; the report
+has per-stage latency percentiles (queue wait and run time), end-to-end
+latency, throughput and peak RSS of the app and of its worker processes.
+
+Usage:
+    python benchmarks/bench_pipeline.py --jobs 8
+    python benchmarks/bench_pipeline.py --jobs 16 --audio-seconds 600 --rtf 0.01 \\
+        --concurrency '{"download": 4, "analyze": 4}' --out after.json --baseline before.json
+    python benchmarks/bench_pipeline.py --passes 2     # second pass: warm caches
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import resource
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mock_openai  # noqa: E402
+from metrics import percentiles  # noqa: E402
+
+STAGES = ("download", "transcribe", "analyze")
+
+
+def write_wav(path, seconds, rate=16000):
+    """Mono 16-bit WAV: a quiet tone, so the file is not trivially compressible."""
+    frame = struct.pack("<h", 0)
+    tone = b"".join(struct.pack("<h", 800 if (i // 20) % 2 else -800) for i in range(rate))
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        for _ in range(int(seconds)):
+            w.writeframes(tone)
+        w.writeframes(frame * int((seconds - int(seconds)) * rate))
+
+
+def serve_media(directory):
+    """Static HTTP server on a background thread. Returns (server, base_url)."""
+    class Quiet(SimpleHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                 functools.partial(Quiet, directory=directory))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _max_rss_mb(who):
+    rss = resource.getrusage(who).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def wait_done(api, job_id, timeout):
+    """Follow the job through the long-poll API. Returns its final step."""
+    deadline = time.time() + timeout
+    version, step = 0, "queued"
+    while time.time() < deadline:
+        delta = api.wait_for_status(job_id, version, 5)
+        version = delta["version"]
+        changes = delta["changes"]
+        step = changes.get("step", step)
+        if changes.get("done"):
+            return "done"
+        if step in ("error", "idle"):
+            return step
+    return "timeout"
+
+
+def run_pass(api, urls, timeout):
+    """Submit all URLs at once and wait for every job. Returns the pass report."""
+    t0 = time.time()
+    job_ids = api.submit_urls(urls)["job_ids"]
+    finished = {}
+
+    def follow(job_id):
+        step = wait_done(api, job_id, timeout)
+        finished[job_id] = (step, time.time() - t0)
+
+    threads = [threading.Thread(target=follow, args=(job_id,)) for job_id in job_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.time() - t0
+
+    stage_wait = {name: [] for name in STAGES}
+    stage_run = {name: [] for name in STAGES}
+    e2e, failed = [], 0
+    for job_id in job_ids:
+        step, done_at = finished[job_id]
+        if step != "done":
+            failed += 1
+            continue
+        e2e.append(done_at)
+        for name, times in api.get_result(job_id).get("stages", {}).items():
+            stage_wait[name].append(times["wait_s"])
+            stage_run[name].append(times["run_s"])
+
+    return {
+        "jobs": len(job_ids),
+        "failed": failed,
+        "wall_s": round(wall, 3),
+        "throughput_jobs_per_min": round(len(e2e) / wall * 60, 2) if wall else 0,
+        "e2e_s": percentiles(e2e),
+        "stages": {name: {"wait_s": percentiles(stage_wait[name]),
+                          "run_s": percentiles(stage_run[name])} for name in STAGES},
+    }
+
+
+def _lookup(report, path):
+    for key in path:
+        try:
+            report = report[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return report
+
+
+def compare(results, baseline):
+    """One line per headline number: baseline -> now (change)."""
+    rows = [("throughput (jobs/min)", ("passes", 0, "throughput_jobs_per_min")),
+            ("e2e p50 (s)", ("passes", 0, "e2e_s", "p50")),
+            ("e2e p90 (s)", ("passes", 0, "e2e_s", "p90")),
+            ("peak RSS app (MB)", ("peak_rss_mb", "app")),
+            ("peak RSS workers (MB)", ("peak_rss_mb", "workers"))]
+    print(f"vs {baseline.get('commit') or 'baseline'}:")
+    for label, path in rows:
+        before, now = _lookup(baseline, path), _lookup(results, path)
+        if before and now is not None:
+            print(f"  {label:24} {before:10} -> {now:10}  ({(now - before) / before * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--passes", type=int, default=1,
+                        help="repeat the same URLs (later passes hit the caches)")
+    parser.add_argument("--audio-seconds", type=float, default=120)
+    parser.add_argument("--rtf", type=float, default=0.02,
+                        help="fake engine: seconds of work per second of audio")
+    parser.add_argument("--ttft", type=float, default=0.3, help="mock LLM time to first token")
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="mock LLM: fraction of 429/503 answers")
+    parser.add_argument("--concurrency", type=json.loads, default=None,
+                        help='per-stage workers as JSON, e.g. \'{"download": 4}\'')
+    parser.add_argument("--timeout", type=float, default=600, help="per job, seconds")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary home")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="copysight-bench-")
+    media_dir = os.path.join(home, "media")
+    os.makedirs(media_dir)
+    for i in range(args.jobs):
+        write_wav(os.path.join(media_dir, f"episode-{i + 1:03d}.wav"), args.audio_seconds)
+    media_server, media_url = serve_media(media_dir)
+    llm_server, llm_url = mock_openai.serve(ttft=args.ttft, token_delay=args.token_delay,
+                                            error_rate=args.error_rate)
+
+    # Must be in place before app (and analyzer/vault) are imported
+    os.environ.update({
+        "COPYSIGHT_HOME": home,
+        "COPYSIGHT_LLM_BASE_URL": llm_url,
+        "COPYSIGHT_PRELOAD": "benchmarks.fake_engine",
+        "COPYSIGHT_FAKE_RTF": str(args.rtf),
+    })
+    import app
+
+    api = app.Api()
+    settings = {"api_key": "sk-or-bench", "backend": "fake", "model": "tiny",
+                "language": "en"}
+    if args.concurrency:
+        settings["concurrency"] = {**app.jobs.DEFAULT_LIMITS, **args.concurrency}
+    api.save_settings(settings)
+
+    urls = [f"{media_url}/episode-{i + 1:03d}.wav" for i in range(args.jobs)]
+    try:
+        passes = [run_pass(api, urls, args.timeout) for _ in range(max(1, args.passes))]
+    finally:
+        # Workers must exit before their peak RSS shows up in RUSAGE_CHILDREN
+        api._workers.close()
+        media_server.shutdown()
+        llm_server.shutdown()
+        if not args.keep:
+            shutil.rmtree(home, ignore_errors=True)
+
+    results = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": f"{sys.platform}-{platform.machine()}",
+        "config": {k: v for k, v in vars(args).items()
+                   if k not in ("out", "baseline", "keep")},
+        "passes": passes,
+        "llm_http": app.analyzer.http_metrics(),
+        "peak_rss_mb": {"app": _max_rss_mb(resource.RUSAGE_SELF),
+                        "workers": _max_rss_mb(resource.RUSAGE_CHILDREN)},
+    }
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+    if any(p["failed"] for p in passes):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Cold-start time: import cost per module and time to window.
+
+Each measurement runs in a fresh interpreter (``python -X importtime``)
+against a throwaway COPYSIGHT_HOME, so nothing is cached between runs
+except the OS page cache; the median of --runs is reported.
+
+  import     ``import app`` — the time before any window code runs, with
+             each module app imports directly and its cumulative cost
+  api        ``import app`` + ``app.Api()`` — everything before create_window
+  window     launch app.py until the window's "shown" event, and until the
+             background warm-up finishes (needs a display; --window)
+
+The api and window runs also check that downloads/ does not exist yet when
+Api() returns and when the window is shown: the SQLite stores open on first
+use and the folders are created by the warm-up.
+
+Exits with status 1 when a median exceeds its threshold or startup touched
+downloads/, so it can guard against regressions (e.g. a new top-level
+``import yt_dlp``, or a store opened in Api.__init__).
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --window --runs 5 --max-window-ms 2000
+    python benchmarks/bench_startup.py --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_API_SNIPPET = ("import os, time; t = time.perf_counter(); import app; app.Api(); "
+                "print(f'api-ms {(time.perf_counter() - t) * 1000:.1f}'); "
+                "print(f'api-disk {int(os.path.exists(app.DOWNLOADS_DIR))}')")
+
+
+def _importtime(code):
+    """Run code under -X importtime. Returns (stdout, {module: (self_us, cum_us, depth)})."""
+    with tempfile.TemporaryDirectory() as home:
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                              env={**os.environ, "COPYSIGHT_HOME": home},
+                              capture_output=True, text=True, check=True)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|")
+            self_us, cum_us = int(self_us), int(cum_us)
+        except ValueError:
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (self_us, cum_us, depth)
+    return proc.stdout, modules
+
+
+def measure_imports():
+    """Cumulative ms of `import app` and of each module it imports directly."""
+    _, modules = _importtime("import app")
+    app_depth = modules["app"][2]
+    # -X importtime prints children before their parent, one level deeper
+    names = list(modules)
+    children, start = {}, names.index("app")
+    for name in reversed(names[:start]):
+        depth = modules[name][2]
+        if depth <= app_depth:
+            break
+        if depth == app_depth + 1:
+            children[name] = modules[name][1] / 1000
+    return modules["app"][1] / 1000, children
+
+
+def measure_api():
+    """Returns (ms, touched): touched is True if Api() created downloads/."""
+    out, _ = _importtime(_API_SNIPPET)
+    fields = dict(line.split(None, 1) for line in out.splitlines() if " " in line)
+    if "api-ms" not in fields:
+        raise RuntimeError("app.Api() did not report a time")
+    return float(fields["api-ms"]), fields.get("api-disk", "").strip() == "1"
+
+
+def measure_window(timeout):
+    """Launch app.py with the startup probe; returns (shown_ms, warm_ms,
+    touched) — touched: downloads/ existed when the window was shown."""
+    home = tempfile.TemporaryDirectory()
+    env = {**os.environ, "COPYSIGHT_STARTUP_PROBE": "1", "COPYSIGHT_HOME": home.name}
+    t0 = time.time()
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "app.py")], cwd=ROOT,
+                            env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            text=True)
+    stamps, touched = {}, False
+    try:
+        for line in proc.stdout:
+            if line.startswith("startup-probe "):
+                fields = line.split()
+                event, ts = fields[1], fields[2]
+                stamps[event] = (float(ts) - t0) * 1000
+                if event == "shown":
+                    touched = fields[3:] == ["1"]
+                if event == "warm":
+                    break
+            if time.time() - t0 > timeout:
+                break
+    finally:
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        home.cleanup()
+    if "shown" not in stamps:
+        raise RuntimeError("window never reported 'shown' (no display?)")
+    return stamps["shown"], stamps.get("warm"), touched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--window", action="store_true",
+                        help="also launch the app and time the window (needs a display)")
+    parser.add_argument("--max-import-ms", type=float, default=600)
+    parser.add_argument("--max-api-ms", type=float, default=900)
+    parser.add_argument("--max-window-ms", type=float, default=2500)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--top", type=int, default=10, help="modules listed per run")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    import_runs, api_runs, shown_runs, warm_runs = [], [], [], []
+    touched = set()
+    per_module = {}
+    for _ in range(args.runs):
+        total, children = measure_imports()
+        import_runs.append(total)
+        for name, ms in children.items():
+            per_module.setdefault(name, []).append(ms)
+        api_ms, api_touched = measure_api()
+        api_runs.append(api_ms)
+        if api_touched:
+            touched.add("api")
+        if args.window:
+            shown, warm, window_touched = measure_window(args.timeout)
+            if window_touched:
+                touched.add("window")
+            shown_runs.append(shown)
+            if warm is not None:
+                warm_runs.append(warm)
+
+    median = lambda values: round(statistics.median(values), 1) if values else None  # noqa: E731
+    modules = sorted(((name, median(v)) for name, v in per_module.items()),
+                     key=lambda item: -item[1])
+    results = {
+        "runs": args.runs,
+        "import_ms": median(import_runs),
+        "api_ms": median(api_runs),
+        "window_shown_ms": median(shown_runs),
+        "warm_ms": median(warm_runs),
+        "modules_ms": dict(modules[:args.top]),
+        # Startup phases that found downloads/ already created
+        "touched_disk": sorted(touched),
+    }
+    limits = {"import_ms": args.max_import_ms, "api_ms": args.max_api_ms,
+              "window_shown_ms": args.max_window_ms}
+    over = {key: results[key] for key, limit in limits.items()
+            if results[key] is not None and results[key] > limit}
+    results["over_threshold"] = over
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"import app      {results['import_ms']:8.1f} ms")
+        for name, ms in modules[:args.top]:
+            print(f"  {name:28} {ms:8.1f} ms")
+        print(f"app.Api()       {results['api_ms']:8.1f} ms")
+        if args.window:
+            print(f"window shown    {results['window_shown_ms']:8.1f} ms")
+            if results["warm_ms"] is not None:
+                print(f"warm-up done    {results['warm_ms']:8.1f} ms")
+        for key, value in over.items():
+            print(f"REGRESSION: {key} {value} ms > {limits[key]} ms")
+        for phase in sorted(touched):
+            print(f"REGRESSION: downloads/ created before {phase} returned")
+    sys.exit(1 if over or touched else 0)
+
+
+if __name__ == "__main__":
+    main()
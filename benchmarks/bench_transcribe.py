@@ -0,0 +1,84 @@
+"""Real-time factor per model size and engine.
+
+RTF = transcription wall time / audio duration (lower is better; 0.1 means
+ten minutes of audio in one minute). Model loading is timed separately so
+the numbers reflect steady-state throughput of a warm worker.
+
+Usage:
+    python benchmarks/bench_transcribe.py sample.mp3
+    python benchmarks/bench_transcribe.py sample.mp3 --backend cpu \\
+        --models tiny base small --compute-types int8 float32 --threads 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import transcriber  # noqa: E402
+
+
+def bench(audio_path, backend, model, compute_type, threads, language):
+    engine = {"backend": backend, "compute_type": compute_type, "cpu_threads": threads}
+    t0 = time.time()
+    transcriber.load_model(model, **engine)
+    load_s = time.time() - t0
+
+    t0 = time.time()
+    result = transcriber.transcribe_segments(audio_path, language=language, model_size=model,
+                                             log_fn=lambda msg: None, **engine)
+    wall_s = time.time() - t0
+    return {
+        "backend": backend,
+        "model": model,
+        "compute_type": compute_type if backend == "cpu" else "fp16",
+        "threads": threads if backend == "cpu" else None,
+        "load_s": round(load_s, 2),
+        "wall_s": round(wall_s, 2),
+        "segments": len(result["segments"]) if result else None,
+        "ok": bool(result),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("audio_file")
+    parser.add_argument("--backend", choices=transcriber.BACKENDS,
+                        default=transcriber.default_backend())
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small", "turbo"])
+    parser.add_argument("--compute-types", nargs="+", choices=transcriber.COMPUTE_TYPES,
+                        default=["int8"])
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    duration = transcriber._get_audio_duration(args.audio_file)
+    if not duration:
+        sys.exit(f"Could not read duration: {args.audio_file}")
+
+    # Compute type only varies the cpu engine
+    compute_types = args.compute_types if args.backend == "cpu" else ["fp16"]
+    rows = []
+    for model in args.models:
+        for compute_type in compute_types:
+            row = bench(args.audio_file, args.backend, model, compute_type,
+                        args.threads, args.language)
+            row["audio_s"] = round(duration, 1)
+            row["rtf"] = round(row["wall_s"] / duration, 3)
+            rows.append(row)
+            if not args.json:
+                print(f"{row['backend']:4} {model:7} {row['compute_type']:8} "
+                      f"load {row['load_s']:6.1f}s  wall {row['wall_s']:7.1f}s  "
+                      f"RTF {row['rtf']:.3f}" + ("" if row["ok"] else "  FAILED"),
+                      flush=True)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Deterministic stand-in transcription engine, registered as backend "fake".
+
+Produces one segment per SEGMENT_S seconds of audio with fixed text (the file
+name is part of it, so different files give different transcripts) and
+sleeps to simulate a real-time factor. No model, no GPU — lets the pipeline
+benchmark measure everything around transcription.
+
+Used by benchmarks/bench_pipeline.py: the worker process imports it via
+COPYSIGHT_PRELOAD=benchmarks.fake_engine, and the app is configured with
+backend "fake".
+
+    COPYSIGHT_FAKE_RTF   seconds of work per second of audio (default 0.02)
+"""
+
+import os
+import subprocess
+import time
+import wave
+
+import transcriber
+
+SEGMENT_S = 5.0
+
+
+def _duration(audio_path):
+    try:
+        with wave.open(audio_path, "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except (wave.Error, EOFError, OSError):
+        pass
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", audio_path],
+            capture_output=True, text=True, timeout=10).stdout
+        return float(out.strip())
+    except (OSError, ValueError, subprocess.SubprocessError):
+        # Rough guess from size (~128 kbps)
+        return os.path.getsize(audio_path) / 16000
+
+
+def run(audio_path, model_label, decode_options, on_segment, log_fn):
+    rtf = float(os.environ.get("COPYSIGHT_FAKE_RTF", "0.02"))
+    name = os.path.splitext(os.path.basename(audio_path))[0]
+    duration = _duration(audio_path)
+    start = float((decode_options.get("clip_timestamps") or [0.0])[0])
+    log_fn(f"Engine: fake · {model_label} · RTF {rtf}")
+
+    segments = []
+    t = start
+    while t < duration:
+        end = min(duration, t + SEGMENT_S)
+        time.sleep((end - t) * rtf)
+        text = f" {name} segment {len(segments) + 1} from {t:.0f} to {end:.0f} seconds."
+        segments.append({"start": t, "end": end, "text": text,
+                         "avg_logprob": -0.2, "no_speech_prob": 0.01})
+        on_segment(t, end, text)
+        t = end
+    return {
+        "text": "".join(seg["text"] for seg in segments),
+        "language": decode_options.get("language") or "en",
+        "duration": duration,
+        "segments": segments,
+    }
+
+
+transcriber.register_backend("fake", run)
@@ -0,0 +1,229 @@
+"""Local OpenAI-compatible stand-in for the analysis API.
+
+Serves POST /v1/chat/completions (streaming SSE and plain JSON) with a
+canned markdown answer, a configurable time-to-first-token, per-token
+delay and prompt-processing rate — enough to exercise analyzer.py offline
+and measure the streaming and map-reduce paths without an API key or network.
+
+Usage:
+    python benchmarks/mock_openai.py --port 8099            # serve
+    python benchmarks/mock_openai.py --bench                # serve + run analyzer once
+    python benchmarks/mock_openai.py --bench --long 4       # + single call vs map-reduce
+                                                            #   on a 4-hour transcript
+    python benchmarks/mock_openai.py --bench --error-rate 0.3  # exercise retry/backoff
+
+Point the app at it with COPYSIGHT_LLM_BASE_URL=http://127.0.0.1:8099/v1
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_ANSWER = """## Praktyczne tipy
+
+**Record in short takes.** Short takes are easier to edit and re-record.
+
+**Name files by date.** Sorting by name then sorts by time.
+
+**Keep one master copy.** Everything else is an export.
+
+## Inspiracje
+
+**Patina as a metaphor.** Old notes gain value the way paper gains colour.
+
+**Editorial restraint.** Fewer, sharper points beat exhaustive summaries.
+
+**Analog rituals.** A physical button makes a digital habit stick.
+
+## Ciekawostki
+
+**Whisper was trained on 680k hours.** Most of it weakly supervised.
+
+**MP3 dates from 1993.** Its patents expired in 2017.
+
+**Silence is data.** Pauses mark topic boundaries surprisingly well.
+"""
+
+
+def _tokens(text):
+    """Split into word-ish tokens, keeping whitespace attached."""
+    out, word = [], ""
+    for ch in text:
+        word += ch
+        if ch in " \n":
+            out.append(word)
+            word = ""
+    if word:
+        out.append(word)
+    return out
+
+
+def make_handler(ttft=0.3, token_delay=0.01, prefill_tps=0, error_rate=0.0,
+                 answer=CANNED_ANSWER):
+    rng = random.Random(42)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+            # Injected transient failures (rate limit / overload) with Retry-After
+            if error_rate and rng.random() < error_rate:
+                status = rng.choice((429, 503))
+                payload = json.dumps({"error": {"message": "mock overload",
+                                                "code": status}}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Retry-After", "0.2")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            model = body.get("model", "mock")
+            prompt_tokens = sum(len(m.get("content", "")) // 4
+                                for m in body.get("messages", []))
+            tokens = _tokens(answer)
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                     "total_tokens": prompt_tokens + len(tokens)}
+            base = {"id": "chatcmpl-mock", "created": int(time.time()), "model": model}
+
+            # Prompt processing grows with input length, like a real server
+            time.sleep(ttft + (prompt_tokens / prefill_tps if prefill_tps else 0))
+            if not body.get("stream"):
+                time.sleep(token_delay * len(tokens))
+                payload = json.dumps({
+                    **base, "object": "chat.completion",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": answer}}],
+                    "usage": usage,
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            # Chunked transfer keeps the connection reusable after the stream
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def write_chunk(data):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def event(obj):
+                write_chunk(f"data: {json.dumps(obj)}\n\n".encode("utf-8"))
+
+            chunk = {**base, "object": "chat.completion.chunk"}
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(token_delay)
+                delta = {"content": token}
+                if i == 0:
+                    delta["role"] = "assistant"
+                event({**chunk, "choices": [{"index": 0, "delta": delta,
+                                             "finish_reason": None}]})
+            event({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if (body.get("stream_options") or {}).get("include_usage"):
+                event({**chunk, "choices": [], "usage": usage})
+            write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def serve(port=0, ttft=0.3, token_delay=0.01, prefill_tps=0, error_rate=0.0):
+    """Start the server on a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port),
+                                 make_handler(ttft, token_delay, prefill_tps, error_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--ttft", type=float, default=0.3, help="seconds before first token")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="seconds per token")
+    parser.add_argument("--prefill-tps", type=float, default=20000,
+                        help="prompt tokens processed per second (0 = instant)")
+    parser.add_argument("--bench", action="store_true",
+                        help="run analyzer.analyze_text against the server and exit")
+    parser.add_argument("--long", type=float, metavar="HOURS", default=0,
+                        help="with --bench: also compare a single call with map-reduce "
+                             "on a transcript of this many hours")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests answered 429/503 with Retry-After")
+    args = parser.parse_args()
+
+    server, base_url = serve(args.port, args.ttft, args.token_delay, args.prefill_tps,
+                             args.error_rate)
+    if not args.bench:
+        print(f"Mock OpenAI API on {base_url} (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import analyzer
+
+    results = {}
+    for mode in ("blocking", "streaming"):
+        stats = {}
+        first_update = []
+        t0 = time.time()
+
+        def on_partial(partial):
+            if not first_update:
+                first_update.append(time.time() - t0)
+
+        analyzer.analyze_text("transcript " * 200, "Analyze.", "sk-or-mock",
+                              log_fn=lambda msg: None, base_url=base_url,
+                              stats_fn=stats.update,
+                              stream_fn=on_partial if mode == "streaming" else None)
+        stats["first_text_s"] = round(first_update[0] if first_update else stats["total_s"], 3)
+        results[mode] = stats
+
+    if args.long:
+        # ~150 spoken words per minute
+        sentence = "So the next thing we tried was recording every take twice. "
+        words = int(args.long * 60 * 150)
+        long_text = sentence * (words // len(sentence.split()))
+        for mode in ("single_call", "map_reduce"):
+            stats = {}
+            fn = analyzer.analyze_text if mode == "single_call" else analyzer.analyze_long
+            kwargs = {"concurrency": args.concurrency} if mode == "map_reduce" else {}
+            fn(long_text, "Analyze.", "sk-or-mock", log_fn=lambda msg: None,
+               base_url=base_url, stats_fn=stats.update, **kwargs)
+            stats["input_tokens"] = analyzer.estimate_tokens(long_text)
+            results[mode] = stats
+    results["http"] = analyzer.http_metrics()
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""Persistent caches backed by SQLite (see store.py).
+
+TranscriptCache maps a media identity plus transcription settings to a saved
+transcript file. UrlCache maps a normalized URL to the metadata and audio
+file of its last download, so a repeat job needs no network at all.
+AnalysisCache maps (transcript hash, system prompt hash, model) to the
+LLM's answer, evicting least-recently-used entries past a size bound. Lookups
+are a single primary-key read, so they stay constant-time no matter how large
+downloads/ grows.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+from store import HitCounter, Store
+
+
+DEFAULT_URL_TTL = 7 * 86400  # seconds a resolved URL is trusted without re-extracting
+DEFAULT_ANALYSIS_CACHE_BYTES = 50 * 1024 * 1024  # total cached analysis text
+
+
+def text_hash(text):
+    """SHA-256 of a string (UTF-8)."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content (streamed, constant memory)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def media_identity(meta, audio_path=None):
+    """Return (extractor, media_id) for a download.
+
+    Uses the yt-dlp extractor + video ID when known; otherwise falls back to
+    a content hash of the audio so different videos sharing a title never
+    collide. A time-range download (meta "section") gets the range appended
+    to the ID ("<id>@2400-4200", "<id>@2400-end").
+    """
+    meta = meta or {}
+    if meta.get("source") and meta.get("id"):
+        media_id = str(meta["id"])
+        if meta.get("section"):
+            start, end = meta["section"]
+            media_id += f"@{start:g}-" + (f"{end:g}" if end is not None else "end")
+        return meta["source"].lower(), media_id
+    if audio_path and os.path.exists(audio_path):
+        return "sha256", file_hash(audio_path)
+    return None, None
+
+
+class TranscriptCache(HitCounter, Store):
+    """(extractor, media_id, model, language, initial_prompt) -> transcript path."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS transcripts (
+        key        TEXT PRIMARY KEY,
+        extractor  TEXT NOT NULL,
+        media_id   TEXT NOT NULL,
+        model      TEXT NOT NULL,
+        language   TEXT NOT NULL,
+        prompt     TEXT NOT NULL,
+        path       TEXT NOT NULL,
+        created    REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_transcripts_media ON transcripts (extractor, media_id);
+    """
+
+    @staticmethod
+    def make_key(extractor, media_id, model, language=None, prompt=None):
+        parts = [extractor, media_id, model, language or "auto", prompt or ""]
+        return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def lookup(self, extractor, media_id, model, language=None, prompt=None):
+        """Return {"text", "path"} for a cached transcript, or None.
+        Rows pointing at deleted files are dropped on the way.
+        """
+        row = None
+        if extractor and media_id:
+            key = self.make_key(extractor, media_id, model, language, prompt)
+            row = self.query_one("SELECT path FROM transcripts WHERE key = ?", (key,))
+        if row:
+            try:
+                with open(row["path"], "r", encoding="utf-8") as f:
+                    text = f.read()
+                if text.strip():
+                    self._count(hit=True)
+                    return {"text": text, "path": row["path"]}
+            except OSError:
+                pass
+            self.execute("DELETE FROM transcripts WHERE key = ?", (key,))
+        self._count(hit=False)
+        return None
+
+    def put(self, extractor, media_id, model, language, prompt, path):
+        if not (extractor and media_id):
+            return
+        key = self.make_key(extractor, media_id, model, language, prompt)
+        self.execute(
+            "INSERT OR REPLACE INTO transcripts"
+            " (key, extractor, media_id, model, language, prompt, path, created)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, extractor, media_id, model, language or "auto", prompt or "",
+             path, time.time()),
+        )
+
+    def has_media(self, extractor, media_id):
+        """True if any transcript of this media item is cached and on disk."""
+        if not (extractor and media_id):
+            return False
+        rows = self.query(
+            "SELECT path FROM transcripts WHERE extractor = ? AND media_id = ?",
+            (extractor, str(media_id)),
+        )
+        return any(os.path.exists(row["path"]) for row in rows)
+
+    def invalidate(self, extractor=None, media_id=None, path=None):
+        """Drop entries for one media item (extractor and media_id) or one
+        transcript file. Returns the number of entries removed (0 without a
+        complete key — see clear())."""
+        if path:
+            return self.execute("DELETE FROM transcripts WHERE path = ?", (path,))
+        if extractor and media_id:
+            return self.execute(
+                "DELETE FROM transcripts WHERE extractor = ? AND media_id = ?",
+                (extractor, media_id),
+            )
+        return 0
+
+    def clear(self):
+        """Drop every entry. Returns the number removed."""
+        return self.execute("DELETE FROM transcripts")
+
+    def stats(self):
+        row = self.query_one("SELECT COUNT(*) AS n FROM transcripts")
+        return {"entries": row["n"], **self._counts()}
+
+
+class UrlCache(HitCounter, Store):
+    """normalized URL -> (extractor, media_id, title, channel, duration, path).
+
+    path is the downloaded audio (kind "audio") or, for a video transcribed
+    from its captions, the saved captions transcript (kind "captions").
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS urls (
+        url          TEXT PRIMARY KEY,
+        extractor    TEXT NOT NULL,
+        media_id     TEXT NOT NULL,
+        title        TEXT NOT NULL DEFAULT '',
+        channel      TEXT NOT NULL DEFAULT '',
+        duration     TEXT NOT NULL DEFAULT '',
+        webpage_url  TEXT NOT NULL DEFAULT '',
+        path         TEXT NOT NULL,
+        kind         TEXT NOT NULL DEFAULT 'audio',
+        created      REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_urls_media ON urls (extractor, media_id);
+    """
+
+    def __init__(self, path, ttl=DEFAULT_URL_TTL):
+        super().__init__(path)
+        self.ttl = ttl
+
+    def _setup(self, db):
+        # Databases from before captions entries lack the kind column
+        if "kind" not in {row["name"] for row in db.execute("PRAGMA table_info(urls)")}:
+            db.execute("ALTER TABLE urls ADD COLUMN kind TEXT NOT NULL DEFAULT 'audio'")
+
+    def lookup(self, url, now=None):
+        """Return {"audio", "captions", "meta"} for a URL resolved within the
+        TTL whose file is still on disk, or None. One of audio / captions (the
+        captions transcript path) is set, the other None. Stale rows are
+        dropped.
+        """
+        row = self.query_one("SELECT * FROM urls WHERE url = ?", (url,)) if url else None
+        if row:
+            fresh = not self.ttl or (now or time.time()) - row["created"] <= self.ttl
+            if fresh and os.path.exists(row["path"]):
+                self._count(hit=True)
+                from_captions = row["kind"] == "captions"
+                return {
+                    "audio": None if from_captions else row["path"],
+                    "captions": row["path"] if from_captions else None,
+                    "meta": {
+                        "title": row["title"],
+                        "channel": row["channel"],
+                        "duration": row["duration"],
+                        "url": row["webpage_url"] or url,
+                        "source": row["extractor"],
+                        "id": row["media_id"],
+                    },
+                }
+            self.execute("DELETE FROM urls WHERE url = ?", (url,))
+        self._count(hit=False)
+        return None
+
+    def put(self, url, meta, path, kind="audio"):
+        meta = meta or {}
+        if not (url and path and meta.get("source") and meta.get("id")):
+            return
+        self.execute(
+            "INSERT OR REPLACE INTO urls"
+            " (url, extractor, media_id, title, channel, duration, webpage_url, path, kind,"
+            " created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, meta["source"], str(meta["id"]), meta.get("title") or "",
+             meta.get("channel") or "", meta.get("duration") or "",
+             meta.get("url") or "", path, kind, time.time()),
+        )
+
+    def invalidate(self, url=None, extractor=None, media_id=None):
+        """Drop one URL, or every URL of one media item (extractor and
+        media_id). Returns the number of entries removed (0 without a
+        complete key — see clear())."""
+        if url:
+            return self.execute("DELETE FROM urls WHERE url = ?", (url,))
+        if extractor and media_id:
+            return self.execute(
+                "DELETE FROM urls WHERE extractor = ? AND media_id = ?",
+                (extractor, media_id),
+            )
+        return 0
+
+    def clear(self):
+        """Drop every entry. Returns the number removed."""
+        return self.execute("DELETE FROM urls")
+
+    def stats(self):
+        row = self.query_one("SELECT COUNT(*) AS n FROM urls")
+        return {"entries": row["n"], **self._counts()}
+
+
+class AnalysisCache(HitCounter, Store):
+    """(transcript sha, system prompt sha, model) -> analysis text, LRU-bounded."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS analyses (
+        key              TEXT PRIMARY KEY,
+        transcript_sha   TEXT NOT NULL,
+        prompt_sha       TEXT NOT NULL,
+        model            TEXT NOT NULL,
+        text             TEXT NOT NULL,
+        path             TEXT NOT NULL DEFAULT '',
+        size             INTEGER NOT NULL,
+        created          REAL NOT NULL,
+        last_used        REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_analyses_last_used ON analyses (last_used);
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_ANALYSIS_CACHE_BYTES):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(transcript_sha, prompt_sha, model):
+        parts = [transcript_sha, prompt_sha, model]
+        return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def lookup(self, transcript_sha, prompt_sha, model):
+        """Return {"text", "path"} for a cached analysis, or None.
+        path is the saved analysis file ("" if it no longer exists).
+        """
+        key = self.make_key(transcript_sha, prompt_sha, model)
+        row = self.query_one("SELECT text, path FROM analyses WHERE key = ?", (key,))
+        if not row:
+            self._count(hit=False)
+            return None
+        self.execute("UPDATE analyses SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._count(hit=True)
+        path = row["path"] if row["path"] and os.path.exists(row["path"]) else ""
+        return {"text": row["text"], "path": path}
+
+    def put(self, transcript_sha, prompt_sha, model, text, path=""):
+        """Store an analysis, then evict least-recently-used entries until the
+        total cached text fits in max_bytes."""
+        key = self.make_key(transcript_sha, prompt_sha, model)
+        size = len(text.encode("utf-8"))
+        now = time.time()
+        with self.transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO analyses (key, transcript_sha, prompt_sha, model,"
+                " text, path, size, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, transcript_sha, prompt_sha, model, text, path or "", size, now, now),
+            )
+            self._evict(db)
+
+    def invalidate(self, transcript_sha=None):
+        """Drop analyses of one transcript, or (no args) all. Returns the count."""
+        if transcript_sha:
+            return self.execute("DELETE FROM analyses WHERE transcript_sha = ?",
+                                (transcript_sha,))
+        return self.execute("DELETE FROM analyses")
+
+    def stats(self):
+        row = self.query_one("SELECT COUNT(*) AS n, COALESCE(SUM(size), 0) AS bytes"
+                             " FROM analyses")
+        return {"entries": row["n"], "bytes": row["bytes"], "max_bytes": self.max_bytes,
+                **self._counts()}
+
+    def _evict(self, db):
+        if not self.max_bytes or self.max_bytes <= 0:
+            return
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM analyses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in db.execute("SELECT key, size FROM analyses ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        db.executemany("DELETE FROM analyses WHERE key = ?", doomed)
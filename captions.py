@@ -0,0 +1,212 @@
+"""Captions — use a video's own subtitles instead of transcribing its audio.
+
+Many videos already carry captions: uploaded by the author (`subtitles` in
+the yt-dlp info dict) or generated by the site (`automatic_captions`, e.g.
+YouTube's ASR). select_track() picks the best track for the requested
+language, fetch() downloads it through the same YoutubeDL session (cookies,
+proxy, headers) and parse() turns JSON3/WebVTT/SRT into plain segments:
+markup stripped, the rolling duplicate lines of auto-captions collapsed,
+sound tags like [Music] dropped.
+
+Policies (setting "captions_policy"):
+    captions_first         captions when available, else download + Whisper
+    whisper_only           always download + Whisper (the old behaviour)
+    captions_then_upgrade  captions now, Whisper transcript in the background
+"""
+
+import html
+import json
+import re
+import sys
+import time
+
+
+POLICIES = ("captions_first", "whisper_only", "captions_then_upgrade")
+DEFAULT_POLICY = "captions_first"
+
+# Track formats we can parse, best first (json3: exact word timing, no
+# rolling duplicates; srv*/ttml are XML variants of the same data)
+_FORMATS = ("json3", "vtt", "srt")
+
+# Caption "languages" that are not speech
+_SKIP_TRACKS = {"live_chat", "rechat", "danmaku"}
+
+_TIMESTAMP = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})")
+_TAG = re.compile(r"<[^>]*>")
+_SOUND_TAG = re.compile(r"^\s*[\[(][^\])]*[\])]\s*$")
+
+
+def resolve_policy(value):
+    """Known policy name, or DEFAULT_POLICY."""
+    return value if value in POLICIES else DEFAULT_POLICY
+
+
+def _lang_matches(code, language):
+    code = code.lower()
+    language = language.lower()
+    return code == language or code.startswith(language + "-")
+
+
+def _pick_format(formats):
+    by_ext = {f.get("ext"): f for f in formats or [] if f.get("url") or f.get("data")}
+    for ext in _FORMATS:
+        if ext in by_ext:
+            return by_ext[ext]
+    return None
+
+
+def select_track(info, language=None):
+    """Best caption track of a yt-dlp info dict for `language` (None: the
+    video's own language). Returns {"language", "kind", "ext", "url"/"data"}
+    or None.
+
+    Uploaded subtitles win over automatic captions. Automatic captions are
+    only used in the language actually spoken — sites offer machine
+    translations of them into dozens of languages, which are worse than a
+    Whisper transcript.
+    """
+    spoken = (info.get("language") or "").lower() or None
+    language = (language or spoken or "").lower() or None
+    uploaded = {k: v for k, v in (info.get("subtitles") or {}).items()
+                if k not in _SKIP_TRACKS}
+    automatic = {k: v for k, v in (info.get("automatic_captions") or {}).items()
+                 if k not in _SKIP_TRACKS}
+
+    candidates = []
+    if language:
+        candidates += [("subtitles", code, uploaded[code]) for code in sorted(uploaded)
+                       if _lang_matches(code, language)]
+    elif len(uploaded) == 1:
+        # Unknown language, a single uploaded track: most likely the original
+        candidates += [("subtitles", code, fmts) for code, fmts in uploaded.items()]
+
+    # "<lang>-orig" marks YouTube's ASR track in the spoken language
+    for code in sorted(automatic, key=lambda c: not c.endswith("-orig")):
+        original = code.endswith("-orig") or (spoken and _lang_matches(code, spoken))
+        if original and (not language or _lang_matches(code, language)):
+            candidates.append(("automatic", code, automatic[code]))
+
+    for kind, code, formats in candidates:
+        fmt = _pick_format(formats)
+        if fmt:
+            track = {"language": code.split("-")[0] if kind == "automatic" else code,
+                     "kind": kind, "ext": fmt["ext"]}
+            track.update({k: fmt[k] for k in ("url", "data") if fmt.get(k)})
+            return track
+    return None
+
+
+def _seconds(stamp):
+    match = _TIMESTAMP.search(stamp)
+    if not match:
+        return None
+    h, m, s, frac = match.groups()
+    return int(h or 0) * 3600 + int(m) * 60 + int(s) + int(frac.ljust(3, "0")) / 1000
+
+
+def _parse_json3(data):
+    cues = []
+    for event in json.loads(data).get("events") or []:
+        text = "".join(seg.get("utf8", "") for seg in event.get("segs") or [])
+        if not text.strip():
+            continue  # line-break and styling events
+        start = event.get("tStartMs", 0) / 1000
+        cues.append((start, start + event.get("dDurationMs", 0) / 1000, text))
+    return cues
+
+
+def _parse_cues(data):
+    """WebVTT and SRT: blocks separated by blank lines, with a "-->" line."""
+    cues = []
+    for block in re.split(r"\n{2,}", data.replace("\r\n", "\n").replace("\r", "\n")):
+        lines = block.strip("\n").split("\n")
+        for i, line in enumerate(lines):
+            if "-->" in line:
+                start_s, _, end_s = line.partition("-->")
+                start, end = _seconds(start_s), _seconds(end_s)
+                if start is not None and end is not None:
+                    cues.append((start, end, "\n".join(lines[i + 1:])))
+                break
+    return cues
+
+
+def parse(data, ext):
+    """Caption file -> [{"start", "end", "text"}] with clean, non-repeating
+    text ("text" starts with a space, like Whisper segments)."""
+    cues = _parse_json3(data) if ext == "json3" else _parse_cues(data)
+    segments = []
+    recent = []  # last lines emitted: rolling captions repeat them
+    for start, end, text in cues:
+        lines = []
+        for line in html.unescape(_TAG.sub("", text)).replace("\xa0", " ").split("\n"):
+            line = " ".join(line.split())
+            if not line or _SOUND_TAG.match(line) or line in recent:
+                continue
+            lines.append(line)
+            recent = (recent + [line])[-3:]
+        if lines:
+            segments.append({"start": round(start, 3), "end": round(end, 3),
+                             "text": " " + " ".join(lines)})
+    return segments
+
+
+def fetch(ydl, track, log_fn=print):
+    """Download and parse a track from select_track() with an open YoutubeDL.
+    Returns {"text", "segments", "language", "kind", "ext", "bytes",
+    "fetch_s"}, or None if the track is empty or cannot be fetched."""
+    t0 = time.time()
+    try:
+        data = track.get("data")
+        if data is None:
+            with ydl.urlopen(track["url"]) as response:
+                data = response.read().decode("utf-8", "replace")
+        segments = parse(data, track["ext"])
+    except Exception as e:
+        log_fn(f"Warning: captions ({track['language']}, {track['kind']}) failed: {e}")
+        return None
+    text = "".join(seg["text"] for seg in segments).strip()
+    if not text:
+        return None
+    return {
+        "text": text,
+        "segments": segments,
+        "language": track["language"],
+        "kind": track["kind"],
+        "ext": track["ext"],
+        "bytes": len(data.encode("utf-8")),
+        "fetch_s": round(time.time() - t0, 3),
+    }
+
+
+def clip(result, start, end=None):
+    """fetch() result cut to the window start..end (end None: to the end),
+    segment times shifted to start at 0. None if nothing is left."""
+    segments = [
+        {**seg, "start": round(max(seg["start"], start) - start, 3),
+         "end": round((min(seg["end"], end) if end is not None else seg["end"]) - start, 3)}
+        for seg in result["segments"]
+        if seg["end"] > start and (end is None or seg["start"] < end)
+    ]
+    text = "".join(seg["text"] for seg in segments).strip()
+    if not text:
+        return None
+    return {**result, "segments": segments, "text": text}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python captions.py <URL> [language]")
+        sys.exit(1)
+
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL({"quiet": True, "no_warnings": True, "noplaylist": True}) as ydl:
+        info = ydl.extract_info(sys.argv[1], download=False)
+        track = select_track(info, sys.argv[2] if len(sys.argv) > 2 else None)
+        result = fetch(ydl, track) if track else None
+    if not result:
+        print("No usable captions.")
+        sys.exit(1)
+    print(f"[{result['language']} · {result['kind']} · {result['ext']} · "
+          f"{len(result['segments'])} segments · {result['fetch_s']}s]")
+    print(result["text"])
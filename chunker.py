@@ -0,0 +1,198 @@
+"""Chunked parallel transcription for long recordings.
+
+The audio is cut at silence boundaries into ~chunk_seconds pieces. Each
+piece is padded with a little overlap on both sides, transcribed on its own
+worker, and the results are stitched back in order: a segment belongs to the
+chunk whose cut range contains its midpoint, so the overlap is decoded twice
+but kept once.
+"""
+
+import concurrent.futures
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import audio
+import transcriber
+
+
+DEFAULT_CHUNK_SECONDS = 600
+DEFAULT_OVERLAP = 2.0
+
+
+def plan_chunks(duration, silences, chunk_seconds=DEFAULT_CHUNK_SECONDS,
+                overlap=DEFAULT_OVERLAP):
+    """Choose cut points near every chunk_seconds, snapped to the middle of
+    the closest silence within a quarter-chunk window (hard cut otherwise).
+
+    Returns [{"index", "start", "end", "keep_start", "keep_end", "last"}, ...]
+    where start/end is the padded clip and keep_* the range this chunk owns.
+    """
+    mids = [(a + b) / 2 for a, b in silences]
+    window = chunk_seconds / 4
+    cuts = [0.0]
+    target = chunk_seconds
+    while target < duration - window:
+        near = [m for m in mids if cuts[-1] + window < m < duration
+                and abs(m - target) <= window]
+        cut = min(near, key=lambda m: abs(m - target)) if near else target
+        cuts.append(cut)
+        target = cut + chunk_seconds
+    cuts.append(duration)
+
+    chunks = []
+    for i in range(len(cuts) - 1):
+        chunks.append({
+            "index": i,
+            "start": max(0.0, cuts[i] - overlap),
+            "end": min(duration, cuts[i + 1] + overlap),
+            "keep_start": cuts[i],
+            "keep_end": cuts[i + 1],
+            "last": i == len(cuts) - 2,
+        })
+    return chunks
+
+
+def _norm(text):
+    return re.sub(r"\W+", " ", text).strip().lower()
+
+
+def stitch(chunks, results):
+    """Merge per-chunk segment lists (chunk-relative times) into one ordered
+    list on the original timeline, dropping overlap duplicates."""
+    merged = []
+    for chunk, result in zip(chunks, results):
+        for seg in (result or {}).get("segments", []):
+            start = seg["start"] + chunk["start"]
+            end = seg["end"] + chunk["start"]
+            mid = (start + end) / 2
+            if not (chunk["keep_start"] <= mid < chunk["keep_end"] or
+                    (chunk["last"] and mid >= chunk["keep_start"])):
+                continue
+            # Same words decoded on both sides of a cut
+            if merged and _norm(merged[-1]["text"]) == _norm(seg["text"]) \
+                    and start - merged[-1]["end"] < DEFAULT_OVERLAP * 2:
+                continue
+            merged.append({**seg, "start": start, "end": end})
+    return merged
+
+
+def _transcribe_chunk(args):
+    """Process-pool entry point: transcribe one clip, return its segments."""
+    clip_path, options = args
+    t0 = time.time()
+    result = transcriber.transcribe_segments(clip_path, log_fn=lambda msg: None, **options)
+    if result:
+        result["elapsed"] = time.time() - t0
+    return result
+
+
+def _timed(run_chunk, clip_path):
+    t0 = time.time()
+    result = run_chunk(clip_path)
+    if result:
+        result.setdefault("elapsed", time.time() - t0)
+    return result
+
+
+def transcribe_chunked(audio_path, workers=2, language=None, model_size="turbo",
+                       initial_prompt=None, chunk_seconds=DEFAULT_CHUNK_SECONDS,
+                       overlap=DEFAULT_OVERLAP, log_fn=print, segment_fn=None,
+                       run_chunk=None, cancel=None, engine_options=None):
+    """
+    Transcribe a long recording as parallel chunks.
+
+    :param workers: Number of chunks transcribed at once.
+    :param run_chunk: Optional callable(clip_path) -> transcribe_segments()-style
+                      dict. Default: a process pool calling transcriber directly.
+    :param segment_fn: Optional callback(segment) for stitched segments, emitted
+                       in order as soon as every earlier chunk has finished.
+    :param cancel: Optional threading.Event; pending chunks are skipped once set.
+    :param engine_options: backend/compute_type/cpu_threads for the default
+                           process pool (see transcriber.transcribe_segments).
+    :return: {"text", "language", "segments", "stats"} or None on error.
+             stats: chunks, workers, wall_s, serial_s (sum of per-chunk times,
+             i.e. the single-pass estimate) and speedup = serial_s / wall_s.
+    """
+    duration = transcriber._get_audio_duration(audio_path)
+    if not duration:
+        log_fn(f"Could not read duration: {audio_path}")
+        return None
+
+    t0 = time.time()
+    silences = audio.detect_silences(audio_path)
+    chunks = plan_chunks(duration, silences, chunk_seconds, overlap)
+    log_fn(f"Chunked: {len(chunks)} chunks · {len(silences)} silences · {workers} workers")
+
+    tmp_dir = tempfile.mkdtemp(prefix="copysight_chunks_")
+    options = {"language": language, "model_size": model_size,
+               "initial_prompt": initial_prompt, **(engine_options or {})}
+    pool = None
+    try:
+        if run_chunk is None:
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+            submit = lambda clip: pool.submit(_transcribe_chunk, (clip, options))
+        else:
+            pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+            submit = lambda clip: pool.submit(_timed, run_chunk, clip)
+
+        futures = {}
+        for chunk in chunks:
+            clip = os.path.join(tmp_dir, f"chunk_{chunk['index']:04d}.wav")
+            if not audio.extract_clip(audio_path, clip, chunk["start"], chunk["end"]):
+                log_fn(f"Could not cut chunk {chunk['index']}")
+                return None
+            futures[submit(clip)] = chunk
+
+        results = [None] * len(chunks)
+        serial_s = 0.0
+        ready = 0
+        emitted = 0
+        for future in concurrent.futures.as_completed(futures):
+            chunk = futures[future]
+            if cancel is not None and cancel.is_set():
+                for f in futures:
+                    f.cancel()
+                return None
+            result = future.result()
+            if not result:
+                log_fn(f"Chunk {chunk['index']} failed")
+                return None
+            results[chunk["index"]] = result
+            serial_s += result.get("elapsed", 0.0)
+
+            # Stream the contiguous finished prefix
+            while ready < len(chunks) and results[ready] is not None:
+                ready += 1
+            if segment_fn and ready:
+                prefix = stitch(chunks[:ready], results[:ready])
+                progress = min(100.0, chunks[ready - 1]["keep_end"] / duration * 100)
+                for seg in prefix[emitted:]:
+                    segment_fn({**seg, "progress": progress})
+                emitted = len(prefix)
+    finally:
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    segments = stitch(chunks, results)
+    wall_s = time.time() - t0
+    languages = [r.get("language") for r in results if r.get("language")]
+    stats = {
+        "chunks": len(chunks),
+        "workers": workers,
+        "audio_s": round(duration, 1),
+        "wall_s": round(wall_s, 2),
+        "serial_s": round(serial_s, 2),
+        "speedup": round(serial_s / wall_s, 2) if wall_s else None,
+    }
+    log_fn(f"Chunked done: {stats['wall_s']}s wall vs ~{stats['serial_s']}s single-pass "
+           f"({stats['speedup']}x)")
+    return {
+        "text": "".join(seg["text"] for seg in segments),
+        "language": max(set(languages), key=languages.count) if languages else None,
+        "segments": segments,
+        "stats": stats,
+    }
@@ -1,8 +1,18 @@
-import yt_dlp
 import sys
 import os
 import re
 import time
+import urllib.parse
+
+import captions
+
+
+def warmup():
+    """Import yt-dlp and its extractor table ahead of the first download.
+    yt-dlp is imported lazily (it is the slowest import in the app); the
+    app calls this on a background thread once the window is up."""
+    import yt_dlp
+    yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}).close()
 
 
 def _normalize_youtube_url(url):
@@ -17,6 +27,90 @@ def _normalize_youtube_url(url):
     return url
 
 
+# Query parameters that never change what a URL points at
+_TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "si", "feature",
+                    "ref", "ref_src", "share", "trk", "pp"}
+
+
+def normalize_url(url):
+    """Canonical form of a media URL, used as the cache key for resolved URLs.
+    YouTube links become a plain watch URL; for other sites the scheme and
+    host are lower-cased, a leading "www."/"m." and the fragment are dropped,
+    tracking parameters (utm_*, fbclid, ...) are removed and the rest sorted.
+    """
+    url = _normalize_youtube_url(url)
+    if "youtube.com/watch?v=" in url:
+        return url
+    parts = urllib.parse.urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return url
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    query = sorted(
+        (k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    return urllib.parse.urlunsplit((
+        parts.scheme.lower(), host, parts.path.rstrip("/") or "/",
+        urllib.parse.urlencode(query), "",
+    ))
+
+
+def parse_clock(value):
+    """Seconds from "SS", "MM:SS", "H:MM:SS" or a number; None if empty or invalid."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value >= 0 else None
+    try:
+        seconds = 0.0
+        for part in str(value).strip().split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+    return seconds if seconds >= 0 else None
+
+
+def split_section(url):
+    """Split a time range off a URL, written as a media fragment:
+    "...#t=40:00,1:10:00" -> (url, (2400.0, 4200.0)). The end may be left
+    out ("#t=40:00": to the end of the video, end None).
+    Returns (url without the fragment, None) when there is no valid range.
+    """
+    base, sep, fragment = (url or "").strip().partition("#")
+    match = re.fullmatch(r"t=([^,]*)(?:,(.*))?", fragment) if sep else None
+    if not match:
+        return (url or "").strip(), None
+    start, end = parse_clock(match.group(1)) or 0.0, parse_clock(match.group(2))
+    if end is not None and end <= start:
+        return base, None
+    if not start and end is None:
+        return base, None
+    return base, (start, end)
+
+
+def with_section(url, section):
+    """URL with a time range attached as a "#t=start,end" fragment."""
+    url, _ = split_section(url)
+    if not section:
+        return url
+    start, end = section
+    return f"{url}#t={start:g}" + (f",{end:g}" if end is not None else "")
+
+
+def section_label(section):
+    """File-name-safe form of a range: (2400, 4200) -> "40m00s-1h10m00s"."""
+    def clock(seconds):
+        h, rest = divmod(int(seconds), 3600)
+        m, s = divmod(rest, 60)
+        return f"{h}h{m:02d}m{s:02d}s" if h else f"{m}m{s:02d}s"
+
+    start, end = section
+    return f"{clock(start)}-{clock(end) if end is not None else 'end'}"
+
+
 def _format_duration(seconds):
     """Format seconds as M:SS or H:MM:SS."""
     if not seconds or seconds <= 0:
@@ -40,19 +134,73 @@ def _extract_meta(info, url):
         "duration": _format_duration(info.get("duration")),
         "url": info.get("webpage_url") or url,
         "source": info.get("extractor", ""),
+        "id": info.get("id", ""),
     }
 
 
-def download_audio_as_mp3(url, output_path="downloads", log_fn=print, progress_fn=None):
+# Bytes per second of the 192 kbps MP3 the old pipeline always wrote
+_MP3_BYTES_PER_S = 192_000 // 8
+# Typical decode + libmp3lame encode speed on one core (x realtime), used to
+# estimate the time saved when the re-encode is skipped
+_MP3_ENCODE_X_REALTIME = 50
+
+# DASH/HLS fragments fetched in parallel (setting "download_fragments")
+DEFAULT_FRAGMENTS = 4
+# Plain HTTP files are requested in ranges of this size: a throttled
+# connection is replaced every chunk instead of crawling to the end
+_HTTP_CHUNK_SIZE = 10 * 1024 * 1024
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def download_audio(url, output_path="downloads", log_fn=print, progress_fn=None,
+                   keep_mp3=False, ratelimit=None, use_captions=False, language=None,
+                   section=None, fragments=DEFAULT_FRAGMENTS, cancel=None):
     """
-    Download audio from a given URL and convert it to MP3.
-    Returns {"mp3": path, "meta": {...}} on success, or None on error.
+    Download the best audio stream of a URL in its native container
+    (m4a/webm/opus — no re-encode). The transcriber decodes it once,
+    straight to 16 kHz mono PCM.
 
-    Meta dict contains: title, channel, duration, url, source.
+    Returns {"audio": path, "mp3": path or None, "meta": {...}, "stats": {...}}
+    on success, or None on error.
+
+    Meta dict contains: title, channel, duration, url, source, id.
     Works with any yt-dlp supported site (YouTube, Vimeo, LinkedIn, etc.).
 
     :param progress_fn: Optional callback(percent, msg) for live progress.
                         percent: 0-100 float, msg: human-readable status string.
+    :param keep_mp3: Also convert to a 192 kbps MP3 (the old behaviour); the
+                     MP3 is then the returned audio file.
+    :param ratelimit: Optional download speed cap in bytes per second.
+    :param use_captions: If the video has captions in `language` (None: its
+                         own language), return those instead and skip the
+                         audio download: "audio" is None, "captions" holds
+                         captions.fetch() output plus "name" (the file name
+                         the audio would have had).
+    :param section: Optional (start, end) in seconds (end None: to the end).
+                    Only that window is downloaded (yt-dlp download_ranges:
+                    ffmpeg seeks, so just the needed bytes/fragments are
+                    fetched); the file name carries section_label() and
+                    meta gets "section". Captions are clipped to the window,
+                    with times relative to its start like the audio.
+    :param fragments: DASH/HLS fragments downloaded in parallel (1: one by one).
+    :param cancel: Optional threading.Event; when set, the transfer stops at
+                   the next progress report and None is returned. The .part
+                   file stays, and the next download of the URL resumes from
+                   it (a time range is always fetched from its start).
+    Stats: audio_bytes (file on disk), duration_s (media length), extract_s
+    (page/format resolution, done once per download), download_s (transfer),
+    postprocess_s (all ffmpeg post-processing), encode_s (the part of it spent
+    converting to MP3, 0 when skipped), mp3_bytes_saved / encode_s_saved (MP3
+    not written and the estimated conversion time avoided, 0 when keep_mp3
+    or when an earlier download's file is reused),
+    downloaded_bytes / resumed_bytes (transferred now / taken over from an
+    earlier interrupted attempt), fragments (parallel fragment downloads).
     """
     if not os.path.exists(output_path):
         os.makedirs(output_path)
@@ -61,7 +209,12 @@ def download_audio_as_mp3(url, output_path="downloads", log_fn=print, progress_f
     url = _normalize_youtube_url(url)
     log_fn(f"Starting audio download from: {url}")
 
+    post = {"start": {}, "s": 0.0, "encode_s": 0.0}
+    transfer = {"bytes": 0}
+
     def progress_hook(d):
+        if cancel is not None and cancel.is_set():
+            raise yt_dlp.utils.DownloadCancelled("Cancelled")
         try:
             if d['status'] == 'downloading' and progress_fn:
                 total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
@@ -72,11 +225,23 @@ def download_audio_as_mp3(url, output_path="downloads", log_fn=print, progress_f
                     speed_str = f" · {speed / 1024 / 1024:.1f} MB/s" if speed else ""
                     progress_fn(pct, f"{pct:.0f}%{speed_str}")
             elif d['status'] == 'finished':
+                transfer["bytes"] += d.get('total_bytes') or d.get('downloaded_bytes') or 0
                 if progress_fn:
-                    progress_fn(100, "Converting to MP3...")
+                    progress_fn(100, "Converting to MP3..." if keep_mp3 else "Download finished")
         except Exception as e:
             log_fn(f"Progress hook error: {e}")
 
+    def postprocessor_hook(d):
+        # Time every post-processor (container fixups, the MP3 conversion)
+        name = d.get('postprocessor')
+        if d['status'] == 'started':
+            post["start"][name] = time.time()
+        elif d['status'] == 'finished' and name in post["start"]:
+            elapsed = time.time() - post["start"].pop(name)
+            post["s"] += elapsed
+            if name == 'ExtractAudio':
+                post["encode_s"] += elapsed
+
     # Custom logger to route yt-dlp messages through log_fn
     class YdlLogger:
         def debug(self, msg):
@@ -88,85 +253,273 @@ def download_audio_as_mp3(url, output_path="downloads", log_fn=print, progress_f
         def error(self, msg):
             log_fn(f"Error: {msg}")
 
+    name = '%(title)s.%(ext)s'
+    if section:
+        name = f'%(title)s [{section_label(section)}].%(ext)s'
+
     ydl_opts = {
         'format': 'bestaudio/best',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
-        'outtmpl': os.path.join(output_path, '%(title)s.%(ext)s'),
+        'outtmpl': os.path.join(output_path, name),
         'quiet': True,
         'no_warnings': True,
         'logger': YdlLogger(),
         'noplaylist': True,
         'progress_hooks': [progress_hook],
+        'postprocessor_hooks': [postprocessor_hook],
         'retries': 5,
         'fragment_retries': 10,
         'socket_timeout': 30,
+        # Resume a .part file (and a fragmented stream's .ytdl state) left by
+        # a cancelled or crashed download instead of starting over
+        'continuedl': True,
+        'concurrent_fragment_downloads': max(1, int(fragments or 1)),
+        'http_chunk_size': _HTTP_CHUNK_SIZE,
         'extractor_args': {'youtube': {'player_client': ['default']}},
     }
+    if ratelimit:
+        ydl_opts['ratelimit'] = int(ratelimit)
+    if keep_mp3:
+        ydl_opts['postprocessors'] = [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }]
+
+    import yt_dlp
+
+    if section:
+        start, end = section
+        ydl_opts['download_ranges'] = yt_dlp.utils.download_range_func(
+            None, [(start, end if end is not None else float('inf'))])
 
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Step 1: Extract info to get the expected filename
+            # Step 1: Resolve page, player and formats once
+            t0 = time.time()
             info = ydl.extract_info(url, download=False)
             if not info:
                 log_fn("Error: Could not extract video info")
                 return None
+            extract_s = time.time() - t0
 
-            # Compute the expected mp3 path (yt-dlp sanitizes the filename)
-            info['ext'] = 'mp3'
-            expected_mp3 = ydl.prepare_filename(info)
+            # Compute the expected path (yt-dlp sanitizes the filename);
+            # without post-processing the extension is the selected format's
+            expected_path = ydl.prepare_filename({**info, 'ext': 'mp3'} if keep_mp3 else info)
 
             meta = _extract_meta(info, url)
+            duration = info.get("duration") or 0
+            if section:
+                start, end = section
+                if duration and start >= duration:
+                    log_fn(f"Error: Range starts after the end of the video "
+                           f"({_format_duration(duration)})")
+                    return None
+                meta["section"] = [start, end]
+                if end is not None or duration:
+                    duration = min(end or duration, duration or end) - start
 
-            # Step 2: If mp3 already exists → return it (same video, same file)
-            if os.path.exists(expected_mp3):
-                log_fn(f"Already downloaded: {os.path.basename(expected_mp3)}")
-                return {"mp3": expected_mp3, "meta": meta}
+            # Step 1b: Captions already on the page → no audio needed
+            if use_captions:
+                result = _captions_result(ydl, info, language, expected_path, meta,
+                                          duration, extract_s, log_fn, section)
+                if result:
+                    return result
 
-            # Step 3: Download and convert
-            error_code = ydl.download([url])
-            if error_code != 0:
-                log_fn(f"Error: yt-dlp returned error code {error_code}")
-                return None
+            # Step 2: If the file already exists → return it (same video, same file)
+            if os.path.exists(expected_path):
+                log_fn(f"Already downloaded: {os.path.basename(expected_path)}")
+                # Nothing transferred or encoded: no savings to report
+                return _result(expected_path, keep_mp3, meta, duration, 0.0, extract_s,
+                               reused=True)
 
-            # Step 4: Find the resulting mp3
-            mp3_path = None
-            if os.path.exists(expected_mp3):
-                mp3_path = expected_mp3
-            else:
-                # Fallback: scan for recently created mp3
-                for f in os.listdir(output_path):
-                    if f.endswith('.mp3'):
-                        fpath = os.path.join(output_path, f)
-                        if time.time() - os.path.getmtime(fpath) < 120:
-                            mp3_path = fpath
-                            break
-
-            if not mp3_path:
-                log_fn("Error: Download finished but mp3 file not found")
+            # Step 2b: An interrupted earlier attempt left a .part file —
+            # yt-dlp continues it (a range is re-cut by ffmpeg, no resume)
+            resumed = 0 if section else _file_size(ydl.prepare_filename(info) + ".part")
+            if resumed:
+                log_fn(f"Resuming download at {resumed / 1024 / 1024:.1f} MB")
+
+            # Step 3: Download (and convert when keep_mp3) from the info dict
+            # already extracted — no second page/player/format resolution.
+            # Drop the dry-run selection so the real download records its own.
+            info.pop('requested_downloads', None)
+            t0 = time.time()
+            result_info = ydl.process_ie_result(info, download=True)
+            download_s = time.time() - t0 - post["s"]
+
+            # Step 4: yt-dlp reports the final path (after post-processing)
+            downloads = (result_info or {}).get('requested_downloads') or []
+            audio_path = downloads[-1].get('filepath') if downloads else None
+            if not audio_path and os.path.exists(expected_path):
+                audio_path = expected_path
+
+            if not audio_path or not os.path.exists(audio_path):
+                log_fn("Error: Download finished but audio file not found")
                 return None
 
-            log_fn(f"Download complete: {mp3_path}")
-            return {"mp3": mp3_path, "meta": meta}
+            result = _result(audio_path, keep_mp3, meta, duration, post["encode_s"], extract_s,
+                             download_s, post["s"])
+            stats = result["stats"]
+            stats.update({
+                "downloaded_bytes": max(0, (transfer["bytes"] or stats["audio_bytes"]) - resumed),
+                "resumed_bytes": resumed,
+                "fragments": ydl_opts['concurrent_fragment_downloads'],
+            })
+            if keep_mp3:
+                log_fn(f"Download complete: {audio_path} (MP3 encode {stats['encode_s']:.1f}s)")
+            else:
+                log_fn(f"Download complete: {audio_path} — kept native audio, skipped "
+                       f"~{stats['mp3_bytes_saved'] / 1024 / 1024:.1f} MB / "
+                       f"~{stats['encode_s_saved']:.0f}s MP3 re-encode")
+            return result
 
+    except yt_dlp.utils.DownloadCancelled:
+        log_fn("Download cancelled")
+        return None
     except Exception as e:
         log_fn(f"Error: {e}")
         return None
 
 
+def _captions_result(ydl, info, language, expected_path, meta, duration, extract_s,
+                     log_fn, section=None):
+    track = captions.select_track(info, language)
+    if not track:
+        return None
+    found = captions.fetch(ydl, track, log_fn)
+    if found and section:
+        found = captions.clip(found, *section)
+    if not found:
+        return None
+    found["name"] = os.path.basename(expected_path)
+    log_fn(f"Captions: {found['language']} ({found['kind']}, {found['ext']}) — "
+           f"skipped ~{duration * _MP3_BYTES_PER_S / 1024 / 1024:.1f} MB audio download")
+    return {
+        "audio": None,
+        "mp3": None,
+        "meta": meta,
+        "captions": found,
+        "stats": {
+            "captions": found["kind"],
+            "caption_bytes": found["bytes"],
+            "duration_s": duration,
+            "extract_s": round(extract_s, 2),
+            "captions_s": found["fetch_s"],
+        },
+    }
+
+
+def _result(audio_path, keep_mp3, meta, duration, encode_s, extract_s,
+            download_s=0.0, postprocess_s=0.0, reused=False):
+    size = _file_size(audio_path)
+    # Savings only when this download kept native audio instead of encoding
+    skipped_encode = not keep_mp3 and not reused
+    return {
+        "audio": audio_path,
+        "mp3": audio_path if keep_mp3 else None,
+        "meta": meta,
+        "stats": {
+            "audio_bytes": size,
+            "duration_s": duration,
+            "extract_s": round(extract_s, 2),
+            "download_s": round(download_s, 2),
+            "postprocess_s": round(postprocess_s, 2),
+            "encode_s": round(encode_s, 2),
+            "mp3_bytes_saved": int(duration * _MP3_BYTES_PER_S) if skipped_encode else 0,
+            "encode_s_saved": (round(duration / _MP3_ENCODE_X_REALTIME, 2)
+                               if skipped_encode else 0.0),
+        },
+    }
+
+
+def expand_playlist(url, log_fn=print, limit=None):
+    """
+    List the entries of a playlist or channel with one flat extraction
+    (no per-video page loads). Nested tabs (e.g. a channel's Videos/Shorts)
+    are expanded one level.
+
+    Returns {"title", "entries": [{"url", "id", "title", "source"}, ...]},
+    None if the URL is not a playlist, or {"error": message} if extraction
+    fails (network, removed or private playlist...).
+    """
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': 'in_playlist',
+        'noplaylist': False,
+        'socket_timeout': 30,
+        'playlistend': limit or None,
+    }
+
+    def flatten(info, depth=0):
+        for entry in info.get('entries') or []:
+            if not entry:
+                continue
+            nested = entry.get('_type') == 'playlist' or entry.get('ie_key') == 'YoutubeTab'
+            if nested and depth < 1:
+                if entry.get('_type') != 'playlist':
+                    entry = ydl.extract_info(entry['url'], download=False) or {}
+                yield from flatten(entry, depth + 1)
+            elif not nested:
+                yield entry
+
+    import yt_dlp
+
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url.strip(), download=False)
+            if not info or info.get('_type') != 'playlist':
+                return None
+            entries = []
+            seen = set()
+            for entry in flatten(info):
+                entry_url = entry.get('webpage_url') or entry.get('url')
+                if not entry_url or entry_url in seen:
+                    continue
+                seen.add(entry_url)
+                entries.append({
+                    "url": entry_url,
+                    "id": entry.get('id', ""),
+                    "title": entry.get('title') or "",
+                    "source": (entry.get('ie_key') or "").lower(),
+                })
+                if limit and len(entries) >= limit:
+                    break
+    except Exception as e:
+        log_fn(f"Error: {e}")
+        return {"error": str(e)}
+
+    log_fn(f"Playlist: {info.get('title') or url} · {len(entries)} entries")
+    return {"title": info.get('title') or "", "entries": entries}
+
+
+def download_audio_as_mp3(url, output_path="downloads", log_fn=print, progress_fn=None):
+    """
+    Download audio from a given URL and convert it to MP3.
+    Returns {"mp3": path, "audio": path, "meta": {...}, "stats": {...}} on
+    success, or None on error. See download_audio().
+    """
+    return download_audio(url, output_path, log_fn, progress_fn, keep_mp3=True)
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python downloader.py <YouTube_URL>")
+        print("Usage: python downloader.py <YouTube_URL>[#t=start,end] [--mp3] [--captions]")
         print("Example: python downloader.py https://www.youtube.com/watch?v=dQw4w9WgXcQ")
         sys.exit(1)
 
-    url = sys.argv[1]
-    result = download_audio_as_mp3(url, progress_fn=lambda pct, msg: print(f"  [{msg}]"))
-    if result:
-        print(f"File: {result['mp3']}")
+    url, section = split_section(sys.argv[1])
+    result = download_audio(url, keep_mp3="--mp3" in sys.argv[2:],
+                            progress_fn=lambda pct, msg: print(f"  [{msg}]"),
+                            use_captions="--captions" in sys.argv[2:], section=section)
+    if result and result.get("captions"):
+        found = result["captions"]
+        print(f"Captions: {found['language']} ({found['kind']}) · "
+              f"{len(found['segments'])} segments, no audio downloaded")
+    elif result:
+        print(f"File: {result['audio']}")
+        stats = result['stats']
+        print(f"  MP3 encode: {stats['encode_s']:.1f}s · saved: "
+              f"{stats['mp3_bytes_saved'] / 1024 / 1024:.1f} MB, ~{stats['encode_s_saved']:.0f}s")
         for k, v in result['meta'].items():
             if v:
                 print(f"  {k}: {v}")
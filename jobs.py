@@ -0,0 +1,311 @@
+"""Job queue — pipelined Download -> Transcribe -> Analyze stages.
+
+Every submitted URL becomes a Job with its own ID and status dict. Each stage
+has its own worker pool fed by a queue, so video N+1 can download while
+video N transcribes and video N-1 is analyzed. Per-stage concurrency limits
+can be changed at runtime via Pipeline.set_limits().
+"""
+
+import itertools
+import queue
+import threading
+import time
+
+
+# Default number of concurrent workers per stage.
+# Transcription stays at 1 — a single GPU/CPU engine is already saturated.
+DEFAULT_LIMITS = {
+    "download": 2,
+    "transcribe": 1,
+    "analyze": 2,
+}
+
+# Status keys that change many times per second (progress callbacks). Their
+# updates are coalesced: a waiter gets them at most every COALESCE_INTERVAL.
+_MINOR_KEYS = {"progress", "phase", "partial_analysis"}
+COALESCE_INTERVAL = 0.25
+
+_MISSING = object()
+
+# Finished jobs kept in memory for status/result lookups
+_MAX_FINISHED_JOBS = 100
+
+_job_ids = itertools.count(1)
+
+
+class Job:
+    """One URL moving through the pipeline. Thread-safe status updates."""
+
+    def __init__(self, url, settings=None):
+        self.id = f"job-{next(_job_ids)}"
+        self.url = url
+        self.settings = settings or {}
+        self.created = time.time()
+        self.cancel = threading.Event()
+        self.transcript = ""
+        self.analysis = ""
+        self.audio = ""
+        self.captions = None  # captions.fetch() result when used instead of audio
+        self.meta = {}
+        self.entry_path = ""
+        self.transcript_path = ""  # entry_path moves on to the analysis
+        self.timings = {}
+        # Per stage: {"wait_s": queued before a worker took it, "run_s": ...}
+        self.stage_times = {}
+        self.queued_at = self.created
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._status = {
+            "step": "queued",
+            "stamps": [],
+            "progress": 0,
+            "error": None,
+            "done": False,
+        }
+        # Versioned deltas: every change bumps version; per key (and per
+        # stamp index) we remember the version of its last change. The initial
+        # status is version 1, so since=0 always means "everything".
+        self._version = 1
+        self._key_versions = {}
+        self._stamp_versions = []
+        self._major_version = 1
+
+    # ── Status ──
+
+    def add_stamp(self, text):
+        with self._lock:
+            self._status["stamps"].append(text)
+            self._stamp_versions.append(self._bump(major=True))
+
+    def update_stamp(self, text):
+        """Replace the last stamp in place (progress callbacks)."""
+        with self._lock:
+            stamps = self._status["stamps"]
+            if stamps and text and stamps[-1] != text:
+                stamps[-1] = text
+                self._stamp_versions[-1] = self._bump(major=False)
+
+    def set_status(self, **kwargs):
+        with self._lock:
+            changed = [k for k, v in kwargs.items() if self._status.get(k, _MISSING) != v]
+            if not changed:
+                return
+            self._status.update(kwargs)
+            version = self._bump(major=not set(changed) <= _MINOR_KEYS)
+            for key in changed:
+                self._key_versions[key] = version
+
+    def fail(self, detail):
+        self.set_status(step="error", error=detail[:120])
+        self.add_stamp(f"Error: {detail[:80]}")
+
+    def mark_cancelled(self):
+        self.add_stamp("Cancelled.")
+        self.set_status(step="idle")
+
+    def _bump(self, major):
+        """New version (caller holds the lock); wakes waiters."""
+        self._version += 1
+        if major:
+            self._major_version = self._version
+        self._changed.notify_all()
+        return self._version
+
+    def wait_for_changes(self, since=0, timeout=25.0):
+        """Block until the status has changed after version `since` (or the
+        timeout passes) and return the delta:
+        {"job_id", "title", "version", "changes": {key: value}, "stamps_from": i,
+         "stamps": [...]} — stamps[stamps_from:] replace the client's list
+        from that index. since=0 returns the full status at once.
+
+        Stamps and step changes answer immediately; progress-only changes are
+        held for up to COALESCE_INTERVAL so they go out in one batch.
+        """
+        now = time.time()
+        deadline, batch_at = now + timeout, now + COALESCE_INTERVAL
+        with self._lock:
+            while since > 0 and self._major_version <= since:
+                now = time.time()
+                if self._version > since:
+                    if now >= batch_at:
+                        break
+                    self._changed.wait(batch_at - now)
+                elif now >= deadline:
+                    break
+                else:
+                    self._changed.wait(deadline - now)
+            if since <= 0:
+                changes = {k: v for k, v in self._status.items() if k != "stamps"}
+                stamps_from = 0
+            else:
+                changes = {k: self._status[k] for k, v in self._key_versions.items()
+                           if v > since}
+                stamps_from = next((i for i, v in enumerate(self._stamp_versions)
+                                    if v > since), len(self._stamp_versions))
+            return {
+                "job_id": self.id,
+                "title": self.meta.get("title", ""),
+                "version": self._version,
+                "changes": changes,
+                "stamps_from": stamps_from,
+                "stamps": self._status["stamps"][stamps_from:],
+            }
+
+    @property
+    def step(self):
+        with self._lock:
+            return self._status["step"]
+
+    @property
+    def finished(self):
+        with self._lock:
+            return self._status["done"] or self._status["step"] in ("error", "idle")
+
+    def snapshot(self):
+        """Copy of the status dict, safe to hand across the JS bridge."""
+        with self._lock:
+            status = self._status.copy()
+            status["stamps"] = list(status["stamps"])
+        status["job_id"] = self.id
+        status["url"] = self.url
+        status["title"] = self.meta.get("title", "")
+        return status
+
+
+class Pipeline:
+    """Chain of named stages, each served by its own pool of worker threads.
+
+    A stage is a callable(job) -> bool. True hands the job to the next stage,
+    False ends it (the stage is responsible for setting the final status).
+    A stage may also return the name of a later stage to skip ahead to it.
+    on_finish(job) is called once a job leaves the pipeline; if it raises,
+    the error lands in the job's status as "finish_error".
+    """
+
+    def __init__(self, stages, limits=None, on_finish=None):
+        self._stages = list(stages)
+        self._on_finish = on_finish
+        self._names = [name for name, _ in self._stages]
+        self._queues = {name: queue.Queue() for name in self._names}
+        self._lock = threading.Lock()
+        self._limits = {}
+        self._slots = {name: set() for name in self._names}
+        self.set_limits({**DEFAULT_LIMITS, **(limits or {})})
+
+    def submit(self, job):
+        job.queued_at = time.time()
+        self._queues[self._names[0]].put(job)
+
+    def set_limits(self, limits):
+        """Update per-stage concurrency. Extra workers exit after their current job."""
+        with self._lock:
+            for name in self._names:
+                if name not in limits:
+                    continue
+                try:
+                    self._limits[name] = max(1, int(limits[name]))
+                except (TypeError, ValueError):
+                    continue
+                for slot in range(self._limits[name]):
+                    if slot not in self._slots[name]:
+                        self._slots[name].add(slot)
+                        threading.Thread(
+                            target=self._worker,
+                            args=(name, slot),
+                            name=f"{name}-{slot}",
+                            daemon=True,
+                        ).start()
+
+    def get_limits(self):
+        with self._lock:
+            return dict(self._limits)
+
+    def queue_depths(self):
+        return {name: q.qsize() for name, q in self._queues.items()}
+
+    def _worker(self, name, slot):
+        q = self._queues[name]
+        while True:
+            with self._lock:
+                if slot >= self._limits[name]:
+                    self._slots[name].discard(slot)
+                    return
+            try:
+                job = q.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            try:
+                self._run(name, job)
+            finally:
+                q.task_done()
+
+    def _run(self, name, job):
+        if job.cancel.is_set():
+            job.mark_cancelled()
+            self._finish(job)
+            return
+        idx = self._names.index(name)
+        fn = self._stages[idx][1]
+        started = time.time()
+        try:
+            advance = fn(job)
+        except Exception as exc:
+            job.fail(str(exc))
+            advance = False
+        job.stage_times[name] = {"wait_s": round(started - job.queued_at, 3),
+                                 "run_s": round(time.time() - started, 3)}
+        if isinstance(advance, str) and advance in self._names[idx + 1:]:
+            job.queued_at = time.time()
+            self._queues[advance].put(job)
+        elif advance and idx + 1 < len(self._names):
+            job.queued_at = time.time()
+            self._queues[self._names[idx + 1]].put(job)
+        else:
+            self._finish(job)
+
+    def _finish(self, job):
+        """The job left the pipeline (done, failed or cancelled)."""
+        if self._on_finish:
+            try:
+                self._on_finish(job)
+            except Exception as exc:
+                # The job itself is finished: report it next to its result
+                job.set_status(finish_error=str(exc)[:120])
+
+
+class JobRegistry:
+    """ID -> Job lookup with bounded retention of finished jobs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._latest = None
+
+    def add(self, job, latest=True):
+        """Register a job; latest=False keeps it from becoming the default
+        of get() (background jobs the user did not submit)."""
+        with self._lock:
+            self._jobs[job.id] = job
+            if latest:
+                self._latest = job.id
+            self._prune()
+
+    def get(self, job_id=None):
+        """Return the job by ID, or the most recently submitted one."""
+        with self._lock:
+            return self._jobs.get(job_id or self._latest)
+
+    def all(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active(self):
+        return [job for job in self.all() if not job.finished]
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        excess = len(finished) - _MAX_FINISHED_JOBS
+        if excess > 0:
+            finished.sort(key=lambda j: j.created)
+            for job in finished[:excess]:
+                del self._jobs[job.id]
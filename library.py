@@ -0,0 +1,384 @@
+"""Library index — SQLite table of saved transcripts and analyses.
+
+The pipeline adds a row whenever it writes a file, and reconcile() syncs the
+table with downloads/transcripts and downloads/analyses once at startup
+(files added or deleted by hand). Listing, age-bracket counts and sorting
+are then indexed queries instead of directory scans.
+
+The text of every file is also kept in an FTS5 full-text index, updated in
+the same add()/remove() calls, so search() is an index lookup ranked by
+BM25 with highlighted snippets — no file is opened at query time.
+"""
+
+import os
+import re
+import sqlite3
+import time
+
+from store import Store
+
+
+# Age brackets: (name, max age in whole days) — same cut-offs as the UI tabs
+BRACKETS = [
+    ("fresh", 7),
+    ("recent", 30),
+    ("settled", 180),
+    ("gold", None),
+]
+
+_DAY = 86400
+
+
+def parse_base(filename):
+    """Video base name from a saved file name (strip suffix and timestamp)."""
+    base = re.sub(r"_analiza_\d{8}_\d{4}\.txt$", "", filename)
+    return re.sub(r"_\d{8}_\d{4}\.txt$", "", base)
+
+
+def _read_source_url(path):
+    """Source URL from the <!-- source: ... --> header of an analysis file."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            first = f.readline()
+    except OSError:
+        return ""
+    match = re.match(r"<!-- source: (.+?) -->", first)
+    return match.group(1) if match else ""
+
+
+# Full-text index: search_docs gives each file a stable integer id (the FTS
+# rowid) and the mtime/size it was indexed at; library_fts holds title, text
+# and kind (a column, so a kind filter is part of the MATCH).
+# unicode61 with remove_diacritics makes "dzien" match "dzień".
+_SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    id      INTEGER PRIMARY KEY,
+    path    TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL DEFAULT 0,
+    size    INTEGER NOT NULL DEFAULT 0
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS library_fts USING fts5(
+    title, body, kind, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Files indexed per transaction when catching up (keeps the lock short)
+_INDEX_BATCH = 100
+
+# BM25 with title hits weighing 5x body hits (kind does not score)
+_RANK = "bm25(5.0, 1.0, 0.0)"
+
+# Snippet highlight markers (control characters: "**" would collide with
+# markdown bold in analyses) and length (tokens)
+SNIPPET_OPEN, SNIPPET_CLOSE = "\x02", "\x03"
+_SNIPPET_TOKENS = 16
+
+
+def _read_text(path):
+    """File text for the search index (minus the analysis source header)."""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        return None
+    return re.sub(r"^<!-- source: .*? -->\n", "", text, count=1)
+
+
+def fts_query(query):
+    """User input -> FTS5 MATCH expression: every word must occur (AND),
+    the last one as a prefix so results appear while typing. Quoting each
+    word keeps FTS5 operators and punctuation in the input harmless."""
+    words = re.findall(r"\w+", query or "")
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+# Transcripts are hidden when an analysis of the same video exists.
+# `visible` is kept up to date on every write so listings need no subquery.
+_REFRESH_VISIBLE = """
+UPDATE library SET visible = (
+    kind = 'analysis' OR NOT EXISTS (
+        SELECT 1 FROM library a WHERE a.base = library.base AND a.kind = 'analysis'))
+"""
+
+
+class LibraryIndex(Store):
+    """path -> (base, title, kind, source_url, created, size, visible)."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS library (
+        path        TEXT PRIMARY KEY,
+        base        TEXT NOT NULL,
+        title       TEXT NOT NULL,
+        kind        TEXT NOT NULL,
+        source_url  TEXT NOT NULL DEFAULT '',
+        created     REAL NOT NULL,
+        size        INTEGER NOT NULL DEFAULT 0,
+        visible     INTEGER NOT NULL DEFAULT 1
+    );
+    CREATE INDEX IF NOT EXISTS idx_library_visible_created ON library (visible, created);
+    CREATE INDEX IF NOT EXISTS idx_library_base_kind ON library (base, kind);
+    """
+
+    def _setup(self, db):
+        try:
+            db.executescript(_SEARCH_SCHEMA)
+            self._searchable = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: listing works, search() returns []
+            self._searchable = False
+
+    @property
+    def searchable(self):
+        """True when the full-text index is available (SQLite with FTS5)."""
+        self.open()
+        return self._searchable
+
+    def add(self, path, kind, source_url="", text=None):
+        """Index a file just written by the pipeline. text: its content
+        (saves re-reading the file for the search index)."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        row = self._row(path, kind, source_url, st)
+        if text is None and self.searchable:
+            text = _read_text(path)
+        with self.transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO library (path, base, title, kind, source_url, created, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+            db.execute(_REFRESH_VISIBLE + " WHERE base = ?", (row[1],))
+            self._index_text(db, row, text)
+
+    def remove(self, path):
+        row = self.query_one("SELECT base FROM library WHERE path = ?", (path,))
+        if not row:
+            return
+        with self.transaction() as db:
+            db.execute("DELETE FROM library WHERE path = ?", (path,))
+            db.execute(_REFRESH_VISIBLE + " WHERE base = ?", (row["base"],))
+            self._unindex_text(db, path)
+
+    def reconcile(self, dirs):
+        """Sync the index with the folders. dirs: list of (directory, kind).
+        Returns {"added": n, "removed": n}.
+        """
+        known = {row["path"]: (row["created"], row["size"])
+                 for row in self.query("SELECT path, created, size FROM library")}
+        seen = set()
+        upserts = []
+        for scan_dir, kind in dirs:
+            if not os.path.isdir(scan_dir):
+                continue
+            for item in os.scandir(scan_dir):
+                if not item.name.endswith(".txt") or not item.is_file():
+                    continue
+                try:
+                    st = item.stat()
+                except OSError:
+                    continue
+                seen.add(item.path)
+                if known.get(item.path) == (st.st_mtime, st.st_size):
+                    continue
+                source_url = _read_source_url(item.path) if kind == "analysis" else ""
+                upserts.append(self._row(item.path, kind, source_url, st))
+
+        removed = [path for path in known if path not in seen]
+        with self.transaction() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO library"
+                " (path, base, title, kind, source_url, created, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                upserts,
+            )
+            db.executemany("DELETE FROM library WHERE path = ?", [(p,) for p in removed])
+            if upserts or removed:
+                db.execute(_REFRESH_VISIBLE)
+            for path in removed:
+                self._unindex_text(db, path)
+        return {"added": len(upserts), "removed": len(removed)}
+
+    # ── Full-text index ──
+
+    def update_search_index(self):
+        """Index files whose text is not in the search index yet or changed
+        since (edited by hand, or a library from before search existed).
+        The pipeline indexes its own writes in add(), so after the first run
+        this finds nothing. Returns the number of files indexed."""
+        if not self.searchable:
+            return 0
+        rows = self.query(
+            "SELECT l.path, l.base, l.title, l.kind, l.source_url, l.created, l.size"
+            " FROM library l LEFT JOIN search_docs d ON d.path = l.path"
+            " WHERE d.id IS NULL OR d.created != l.created OR d.size != l.size")
+        done = 0
+        for i in range(0, len(rows), _INDEX_BATCH):
+            batch = [(tuple(row), _read_text(row["path"])) for row in rows[i:i + _INDEX_BATCH]]
+            with self.transaction() as db:
+                for row, text in batch:
+                    self._index_text(db, row, text)
+            done += sum(1 for _, text in batch if text is not None)
+        return done
+
+    def _index_text(self, db, row, text):
+        """(Re)index one file; row as built by _row()."""
+        if not self.searchable or text is None:
+            return
+        path, _, title, kind, _, created, size = row
+        db.execute("INSERT INTO search_docs (path, created, size) VALUES (?, ?, ?)"
+                   " ON CONFLICT(path) DO UPDATE SET created = excluded.created,"
+                   " size = excluded.size", (path, created, size))
+        doc_id = db.execute("SELECT id FROM search_docs WHERE path = ?", (path,)).fetchone()[0]
+        db.execute("DELETE FROM library_fts WHERE rowid = ?", (doc_id,))
+        db.execute("INSERT INTO library_fts (rowid, title, body, kind) VALUES (?, ?, ?, ?)",
+                   (doc_id, title, text, kind))
+
+    def _unindex_text(self, db, path):
+        if not self.searchable:
+            return
+        row = db.execute("SELECT id FROM search_docs WHERE path = ?", (path,)).fetchone()
+        if row:
+            db.execute("DELETE FROM library_fts WHERE rowid = ?", (row[0],))
+            db.execute("DELETE FROM search_docs WHERE id = ?", (row[0],))
+
+    # ── Queries ──
+
+    def entries(self, bracket=None, now=None, limit=None, offset=0):
+        """Entries newest first, optionally limited to one age bracket.
+        Transcripts are hidden when an analysis of the same video exists.
+        """
+        if bracket and bracket not in dict(BRACKETS):
+            return []
+        now = now or time.time()
+        cutoffs = self._cutoffs(now)
+        sql = ("SELECT path, title, kind, source_url, created, size FROM library"
+               " WHERE visible = 1")
+        params = []
+        if bracket:
+            lower, upper = self._bracket_range(bracket, cutoffs)
+            if lower is not None:
+                sql += " AND created > ?"
+                params.append(lower)
+            if upper is not None:
+                sql += " AND created <= ?"
+                params.append(upper)
+        sql += " ORDER BY created DESC"
+        if limit:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+
+        result = []
+        for path, title, kind, source_url, created, size in self.query(sql, params):
+            result.append({
+                "title": title,
+                "date_str": time.strftime("%d %b", time.localtime(created)),
+                "path": path,
+                "bracket": bracket or self._bracket_of(created, cutoffs),
+                "kind": kind,
+                "source_url": source_url,
+                "size": size,
+            })
+        return result
+
+    def search(self, query, limit=20, kind=None):
+        """Files matching every word of query (last word as a prefix), best
+        BM25 match first; title hits weigh more than body hits.
+        Returns [{"path", "title", "kind", "source_url", "date_str", "created",
+        "snippet", "score"}]; snippet marks hits with SNIPPET_OPEN/CLOSE.
+        """
+        match = fts_query(query)
+        if not match or not self.searchable:
+            return []
+        if kind:
+            match = f'kind : "{kind}" AND ({match})' if kind.isalpha() else ""
+        # Rank first (BM25 only needs the index), then build snippets for the
+        # top rows alone — a snippet re-tokenizes its whole document
+        top = ("SELECT rowid FROM library_fts WHERE library_fts MATCH ? AND rank MATCH ?"
+               " ORDER BY rank LIMIT ?")
+        top_params = [match, _RANK, max(1, int(limit or 20))]
+        sql = ("SELECT l.path, l.title, l.kind, l.source_url, l.created,"
+               " snippet(library_fts, 1, ?, ?, '…', ?) AS snippet, rank"
+               " FROM library_fts"
+               " JOIN search_docs d ON d.id = library_fts.rowid"
+               " JOIN library l ON l.path = d.path"
+               f" WHERE library_fts MATCH ? AND rank MATCH ? AND library_fts.rowid IN ({top})"
+               " ORDER BY rank")
+        params = [SNIPPET_OPEN, SNIPPET_CLOSE, _SNIPPET_TOKENS, match, _RANK] + top_params
+        try:
+            rows = self.query(sql, params)
+        except sqlite3.OperationalError:
+            return []
+        return [{
+            "path": row["path"],
+            "title": row["title"],
+            "kind": row["kind"],
+            "source_url": row["source_url"],
+            "created": row["created"],
+            "date_str": time.strftime("%d %b", time.localtime(row["created"])),
+            "snippet": row["snippet"],
+            "score": round(-row["rank"], 3),
+        } for row in rows]
+
+    def counts(self, now=None):
+        """Entry count per age bracket (same visibility rules as entries())."""
+        cutoffs = self._cutoffs(now or time.time())
+        case = "CASE"
+        params = []
+        for name, _ in BRACKETS[:-1]:
+            case += f" WHEN created > ? THEN '{name}'"
+            params.append(cutoffs[name])
+        case += f" ELSE '{BRACKETS[-1][0]}' END"
+        rows = self.query(
+            f"SELECT {case} AS bracket, COUNT(*) AS n FROM library"
+            " WHERE visible = 1 GROUP BY bracket",
+            params,
+        )
+        counts = {name: 0 for name, _ in BRACKETS}
+        for row in rows:
+            counts[row["bracket"]] = row["n"]
+        return counts
+
+    def transcript_for(self, path):
+        """Newest transcript of the same video as `path` (an analysis), or
+        None."""
+        base = parse_base(os.path.basename(path))
+        row = self.query_one(
+            "SELECT path FROM library WHERE base = ? AND kind = 'transcript'"
+            " ORDER BY created DESC LIMIT 1", (base,))
+        return row["path"] if row else None
+
+    # ── Helpers ──
+
+    @staticmethod
+    def _row(path, kind, source_url, st):
+        base = parse_base(os.path.basename(path))
+        return (path, base, base.replace("_", " "), kind, source_url or "",
+                st.st_mtime, st.st_size)
+
+    @staticmethod
+    def _cutoffs(now):
+        """Oldest mtime (exclusive) per bracket. Age in whole days <= N
+        means mtime > now - (N + 1) days."""
+        return {name: now - (days + 1) * _DAY for name, days in BRACKETS if days is not None}
+
+    @staticmethod
+    def _bracket_range(bracket, cutoffs):
+        """(lower_exclusive, upper_inclusive) created bounds for a bracket."""
+        names = [name for name, _ in BRACKETS]
+        idx = names.index(bracket)
+        lower = cutoffs.get(bracket)
+        upper = cutoffs[names[idx - 1]] if idx > 0 else None
+        return lower, upper
+
+    @staticmethod
+    def _bracket_of(created, cutoffs):
+        for name, days in BRACKETS:
+            if days is None or created > cutoffs[name]:
+                return name
+        return BRACKETS[-1][0]
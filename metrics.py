@@ -0,0 +1,237 @@
+"""Per-job metrics log — one JSON line per finished job, plus aggregates.
+
+The pipeline hands every finished job to MetricsLog.record(), which flattens
+its timings into a structured record (download bytes and throughput,
+post-processing, audio length, transcription wall time and real-time factor,
+analysis latency and token counts, per-stage queue wait and run time) and
+appends it to downloads/metrics.jsonl. Past max_bytes the file is rotated
+(metrics.jsonl.1, .2, ...), so the log stays bounded. summary() reduces the
+most recent records to percentiles for spotting regressions and the stage
+that limits throughput.
+"""
+
+import json
+import os
+import threading
+import time
+
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024  # rotate the log past this size
+DEFAULT_BACKUPS = 3                  # rotated files kept
+
+# Record fields summarized as percentiles (dotted paths into a record)
+SUMMARY_FIELDS = [
+    "total_s",
+    "download.extract_s",
+    "download.download_s",
+    "download.mb_per_s",
+    "download.postprocess_s",
+    "transcribe.wall_s",
+    "transcribe.rtf",
+    "transcribe.vad_skipped_fraction",
+    "transcribe.vad_speedup_est",
+    "analysis.total_s",
+    "analysis.ttft_s",
+    "analysis.tokens_per_s",
+    "analysis.prompt_tokens",
+    "analysis.completion_tokens",
+    "stages.download.wait_s",
+    "stages.transcribe.wait_s",
+    "stages.analyze.wait_s",
+]
+
+
+def percentiles(values):
+    """Nearest-rank p50/p90/p99 plus count, mean and max of a list of numbers."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+    return {
+        "count": len(ordered),
+        "p50": round(rank(50), 3),
+        "p90": round(rank(90), 3),
+        "p99": round(rank(99), 3),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def _field(record, path):
+    for key in path.split("."):
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    return record if isinstance(record, (int, float)) and not isinstance(record, bool) else None
+
+
+def job_record(job, now=None):
+    """Structured metrics of a finished jobs.Job (see module docstring)."""
+    now = now or time.time()
+    status = job.snapshot()
+    timings = job.timings
+    settings = job.settings
+
+    dl = timings.get("download") or {}
+    download = {"cached": bool(dl.get("url_cache"))}
+    if not download["cached"] and dl:
+        moved = dl.get("downloaded_bytes") or dl.get("audio_bytes")
+        download.update({
+            "extract_s": dl.get("extract_s"),
+            "download_s": dl.get("download_s"),
+            "postprocess_s": dl.get("postprocess_s"),
+            "bytes": dl.get("audio_bytes"),
+            # Transferred in this run: a resumed download only counts the rest
+            "downloaded_bytes": dl.get("downloaded_bytes"),
+            "resumed_bytes": dl.get("resumed_bytes"),
+            "fragments": dl.get("fragments"),
+            "mb_per_s": (round(moved / dl["download_s"] / 1e6, 2)
+                         if moved and dl.get("download_s") else None),
+        })
+
+    tr = timings.get("transcribe") or {}
+    chunked = timings.get("chunked") or {}
+    audio_s = tr.get("audio_s") or chunked.get("audio_s") or dl.get("duration_s")
+    wall_s = tr.get("total_s") or chunked.get("wall_s")
+    transcribe = {
+        "cached": bool(tr.get("cached")),
+        "captions": tr.get("captions"),  # "subtitles"/"automatic" when Whisper was skipped
+        "model": settings.get("model", "turbo"),
+        "backend": settings.get("backend", "auto"),
+        "audio_s": audio_s,
+    }
+    if wall_s:
+        transcribe.update({
+            "wall_s": wall_s,
+            "rtf": round(wall_s / audio_s, 3) if audio_s else None,
+            "cold_start": tr.get("cold_start"),
+            "first_segment_s": tr.get("first_segment_s"),
+            "chunked": bool(chunked),
+        })
+    vad = tr.get("vad") or {}
+    if vad:
+        transcribe.update({
+            "vad_skipped_fraction": vad.get("skipped_fraction"),
+            "vad_s": vad.get("vad_s"),
+            "vad_speedup_est": vad.get("speedup_est"),
+        })
+
+    an = timings.get("analysis") or {}
+    analysis = {"cached": bool(an.get("cached"))}
+    if an and not analysis["cached"]:
+        analysis.update({key: an.get(key) for key in (
+            "total_s", "ttft_s", "tokens_per_s", "prompt_tokens", "completion_tokens",
+            "chunks")})
+
+    step = status["step"]
+    return {
+        "ts": round(now, 3),
+        "job_id": job.id,
+        "url": job.meta.get("url") or job.url,
+        "source": job.meta.get("source", ""),
+        "status": "done" if status["done"] else ("cancelled" if step == "idle" else step),
+        "error": status.get("error"),
+        "total_s": round(now - job.created, 3),
+        "stages": job.stage_times,
+        "download": download,
+        "transcribe": transcribe,
+        "analysis": analysis,
+    }
+
+
+def summarize(records):
+    """Aggregates over records: counts by status, cache hit counts, jobs
+    transcribed from captions, percentiles of SUMMARY_FIELDS, and
+    transcription RTF per model."""
+    status_counts = {}
+    cached = {"download": 0, "transcribe": 0, "analysis": 0}
+    from_captions = 0
+    rtf_by_model = {}
+    for rec in records:
+        if (rec.get("transcribe") or {}).get("captions"):
+            from_captions += 1
+        status_counts[rec.get("status")] = status_counts.get(rec.get("status"), 0) + 1
+        for stage in cached:
+            if (rec.get(stage) or {}).get("cached"):
+                cached[stage] += 1
+        rtf = _field(rec, "transcribe.rtf")
+        if rtf is not None:
+            rtf_by_model.setdefault(rec["transcribe"].get("model"), []).append(rtf)
+    fields = {}
+    for path in SUMMARY_FIELDS:
+        values = [v for v in (_field(rec, path) for rec in records) if v is not None]
+        fields[path] = percentiles(values)
+    return {
+        "jobs": len(records),
+        "status": status_counts,
+        "cached": cached,
+        "captions": from_captions,
+        "fields": fields,
+        "rtf_by_model": {model: percentiles(v) for model, v in rtf_by_model.items()},
+    }
+
+
+class MetricsLog:
+    """Append-only JSONL file with size-based rotation. Thread-safe."""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def record(self, job):
+        """Append the metrics of a finished job. Returns the record."""
+        rec = job_record(job)
+        self.append(rec)
+        return rec
+
+    def append(self, rec):
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            try:
+                if os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    self._rotate()
+            except OSError:
+                pass
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.unlink(self.path)
+
+    def read(self, limit=500):
+        """Most recent records, oldest first (reads rotated files as needed)."""
+        records = []
+        with self._lock:
+            for i in range(self.backups + 1):
+                path = self.path if i == 0 else f"{self.path}.{i}"
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        lines = f.readlines()
+                except OSError:
+                    continue
+                older = []
+                for line in lines:
+                    try:
+                        older.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # torn line after a crash
+                records = older + records
+                if limit and len(records) >= limit:
+                    break
+        return records[-limit:] if limit else records
+
+    def summary(self, limit=500):
+        return summarize(self.read(limit))
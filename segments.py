@@ -0,0 +1,277 @@
+"""Segment index — timestamped transcript segments stored next to the .txt.
+
+A transcript's segments (start, end, text, avg_logprob, no_speech_prob) are
+written once to `<transcript>.seg`, a small columnar binary file:
+
+    header   magic "CPSG", version, flags, count n, text bytes, lead, origin
+    start    n x float32      seconds, on the transcribed audio's timeline
+    end      n x float32
+    chars    (n+1) x uint32   segment i is text[chars[i]:chars[i+1]]
+    bytes    (n+1) x uint32   ... and blob[bytes[i]:bytes[i+1]] in UTF-8
+    logprob  n x float32
+    nospeech n x float32
+    blob     UTF-8 text of all segments, concatenated
+
+SegmentFile maps the file and reads the columns in place, so a time range
+or a text offset is a binary search plus the handful of segments returned —
+the rest of the file is never decoded. to_srt()/to_vtt()/to_json() build
+subtitle files from it in one pass.
+
+Times are float32: about 4 ms resolution at 10 hours, finer than SRT needs.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+
+MAGIC = b"CPSG"
+VERSION = 1
+SUFFIX = ".seg"
+FORMATS = ("srt", "vtt", "json")
+
+# magic, version, flags, count, text bytes, lead, origin (+ pad to 32 bytes)
+_HEADER = struct.Struct("<4sHHIIId4x")
+# Ends never decrease: a range lookup can bisect them
+_FLAG_ENDS_SORTED = 1
+
+
+def path_for(transcript_path):
+    """Segment file belonging to a transcript file."""
+    return os.path.splitext(transcript_path)[0] + SUFFIX
+
+
+def _column(typecode, values):
+    col = array(typecode, values)
+    if sys.byteorder != "little":
+        col.byteswap()
+    return col.tobytes()
+
+
+def write(path, segments, text=None, origin=0.0):
+    """Write segments ([{"start", "end", "text", "avg_logprob"?,
+    "no_speech_prob"?}]) to `path` atomically.
+
+    text: the transcript as saved, when it is the segments' text with the
+    leading whitespace stripped — offsets returned by SegmentFile are then
+    offsets into it. origin: where the audio starts in the source video
+    (a time-range job), kept for callers that need absolute times.
+    """
+    texts = [seg.get("text", "") for seg in segments]
+    joined = "".join(texts)
+    lead = 0
+    if text is not None and not text[:1].isspace():
+        lead = len(joined) - len(joined.lstrip())
+
+    chars, byte_offs, blobs = [0], [0], []
+    for t in texts:
+        data = t.encode("utf-8")
+        blobs.append(data)
+        chars.append(chars[-1] + len(t))
+        byte_offs.append(byte_offs[-1] + len(data))
+
+    starts = [float(seg.get("start", 0.0)) for seg in segments]
+    ends = [float(seg.get("end", 0.0)) for seg in segments]
+    flags = _FLAG_ENDS_SORTED if all(a <= b for a, b in zip(ends, ends[1:])) else 0
+    header = _HEADER.pack(MAGIC, VERSION, flags, len(segments), byte_offs[-1],
+                          lead, float(origin or 0.0))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(_column("f", starts))
+        f.write(_column("f", ends))
+        f.write(_column("I", chars))
+        f.write(_column("I", byte_offs))
+        f.write(_column("f", (float(seg.get("avg_logprob", 0.0)) for seg in segments)))
+        f.write(_column("f", (float(seg.get("no_speech_prob", 0.0)) for seg in segments)))
+        f.write(b"".join(blobs))
+    os.replace(tmp, path)
+    return path
+
+
+class SegmentFile:
+    """Read-only view of a .seg file. Use as a context manager (or close()).
+
+    Raises ValueError for a file that is not a segment file.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        try:
+            if len(self._mm) < _HEADER.size:
+                raise ValueError("not a segment file")
+            magic, version, flags, n, text_bytes, lead, origin = \
+                _HEADER.unpack_from(self._mm)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("not a segment file")
+            if len(self._mm) != _HEADER.size + 4 * (6 * n + 2) + text_bytes:
+                raise ValueError("truncated segment file")
+        except ValueError:
+            self._mm.close()
+            raise
+        self.count = n
+        self.origin = origin
+        self.lead = lead
+        self._ends_sorted = bool(flags & _FLAG_ENDS_SORTED)
+
+        pos = _HEADER.size
+        self.starts, pos = self._read("f", pos, n)
+        self.ends, pos = self._read("f", pos, n)
+        self._chars, pos = self._read("I", pos, n + 1)
+        self._bytes, pos = self._read("I", pos, n + 1)
+        self._logprob, pos = self._read("f", pos, n)
+        self._nospeech, pos = self._read("f", pos, n)
+        self._blob = pos
+
+    def _read(self, typecode, pos, count):
+        """Column of `count` 4-byte values at `pos`: a zero-copy view on
+        little-endian machines, a swapped copy elsewhere."""
+        end = pos + 4 * count
+        if sys.byteorder == "little":
+            view = memoryview(self._mm)[pos:end].cast(typecode)
+            self._views.append(view)
+            return view, end
+        col = array(typecode, self._mm[pos:end])
+        col.byteswap()
+        return col, end
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def duration(self):
+        return self.ends[-1] if self.count else 0.0
+
+    def text(self, i):
+        return self.text_span(i, i + 1)
+
+    def text_span(self, lo, hi):
+        """Text of segments lo..hi-1, decoded in one go."""
+        pos = self._blob
+        return self._mm[pos + self._bytes[lo]:pos + self._bytes[hi]].decode("utf-8")
+
+    def chars(self, lo, hi):
+        """Character offsets of segments lo..hi in the segments' joined text."""
+        return self._chars[lo:hi + 1].tolist()
+
+    def segment(self, i):
+        """Segment i as {"index", "start", "end", "text", "offset",
+        "avg_logprob", "no_speech_prob"}; offset is where its text starts in
+        the transcript."""
+        return {
+            "index": i,
+            "start": round(self.starts[i], 3),
+            "end": round(self.ends[i], 3),
+            "text": self.text(i),
+            "offset": max(0, self._chars[i] - self.lead),
+            "avg_logprob": round(self._logprob[i], 4),
+            "no_speech_prob": round(self._nospeech[i], 4),
+        }
+
+    def span(self, start=None, end=None):
+        """Index range (lo, hi) of the segments overlapping [start, end)."""
+        hi = self.count if end is None else bisect.bisect_left(self.starts, end)
+        if start is None:
+            return 0, hi
+        if self._ends_sorted:
+            return min(bisect.bisect_right(self.ends, start), hi), hi
+        lo = 0
+        while lo < hi and self.ends[lo] <= start:
+            lo += 1
+        return lo, hi
+
+    def range(self, start=None, end=None):
+        """Segments overlapping the window [start, end) in seconds (None: open)."""
+        lo, hi = self.span(start, end)
+        return [self.segment(i) for i in range(lo, hi)]
+
+    def at_offset(self, offset):
+        """Segment containing character `offset` of the transcript, or None."""
+        pos = offset + self.lead
+        if not self.count or pos < 0 or pos >= self._chars[self.count]:
+            return None
+        return self.segment(bisect.bisect_right(self._chars, pos) - 1)
+
+
+# ── Exporters ──
+
+def _clock(seconds, sep):
+    ms = int(round(max(0.0, seconds) * 1000))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def _cues(segfile, start, end):
+    """(start, end, text) of the non-empty segments in the window, times
+    shifted so the window starts at 0. The window's text is decoded once."""
+    shift = start or 0.0
+    lo, hi = segfile.span(start, end)
+    if lo >= hi:
+        return
+    chars = segfile.chars(lo, hi)
+    text = segfile.text_span(lo, hi)
+    base = chars[0]
+    for t0, t1, a, b in zip(segfile.starts[lo:hi].tolist(), segfile.ends[lo:hi].tolist(),
+                            chars, chars[1:]):
+        cue = text[a - base:b - base].strip()
+        if cue:
+            yield t0 - shift, t1 - shift, cue
+
+
+def to_srt(segfile, start=None, end=None):
+    parts = []
+    for n, (t0, t1, text) in enumerate(_cues(segfile, start, end), 1):
+        parts.append(f"{n}\n{_clock(t0, ',')} --> {_clock(t1, ',')}\n{text}\n")
+    return "\n".join(parts)
+
+
+def to_vtt(segfile, start=None, end=None):
+    parts = ["WEBVTT\n"]
+    for t0, t1, text in _cues(segfile, start, end):
+        parts.append(f"{_clock(t0, '.')} --> {_clock(t1, '.')}\n{text}\n")
+    return "\n".join(parts)
+
+
+def to_json(segfile, start=None, end=None):
+    return json.dumps({"origin": segfile.origin, "segments": segfile.range(start, end)},
+                      ensure_ascii=False)
+
+
+_EXPORTERS = {"srt": to_srt, "vtt": to_vtt, "json": to_json}
+
+
+def export(seg_path, fmt, start=None, end=None):
+    """Render a .seg file as "srt", "vtt" or "json" text."""
+    if fmt not in _EXPORTERS:
+        raise ValueError(f"unknown format: {fmt}")
+    with SegmentFile(seg_path) as segfile:
+        return _EXPORTERS[fmt](segfile, start, end)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[2] not in FORMATS:
+        print("Usage: python segments.py <file.seg> srt|vtt|json [start] [end]")
+        sys.exit(1)
+    window = [float(v) for v in sys.argv[3:5]] + [None, None]
+    sys.stdout.write(export(sys.argv[1], sys.argv[2], window[0], window[1]))
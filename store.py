@@ -0,0 +1,105 @@
+"""SQLite store shared by the caches and the library index.
+
+One connection per Store, shared across threads behind a lock. WAL mode lets
+several Store instances (different tables, same file) read while another
+writes.
+"""
+
+import contextlib
+import os
+import sqlite3
+import threading
+
+
+class Store:
+    """Thread-safe wrapper around one SQLite connection.
+    Subclasses set SCHEMA; it is executed (idempotently) on open. The
+    connection is opened on first use, so creating a Store touches no disk.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = None
+
+    @property
+    def _db(self):
+        if self._conn is None:
+            self.open()
+        return self._conn
+
+    def open(self):
+        """Connect and apply SCHEMA now (otherwise done on first use)."""
+        with self._lock:
+            if self._conn is not None:
+                return
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # isolation_level=None: autocommit, explicit BEGIN in transaction()
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None,
+                                 timeout=10)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            if self.SCHEMA:
+                db.executescript(self.SCHEMA)
+            self._setup(db)
+            self._conn = db
+
+    def _setup(self, db):
+        """Subclass hook run once after SCHEMA (migrations, optional tables)."""
+
+    def query(self, sql, params=()):
+        """Run a statement and return all rows (list of sqlite3.Row)."""
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchone()
+
+    def execute(self, sql, params=()):
+        """Run a write statement. Returns the number of affected rows."""
+        with self._lock:
+            return self._db.execute(sql, params).rowcount
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Group several writes into one commit (much faster for bulk updates)."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class HitCounter:
+    """Mixin for caches: thread-safe hit/miss counters (process lifetime)."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, hit):
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _counts(self):
+        with self._counter_lock:
+            return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,52 @@
+"""Library index: full-text search."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+
+
+class SearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = library.LibraryIndex(os.path.join(self.tmp.name, "index.db"))
+        if not self.index.searchable:
+            self.skipTest("SQLite built without FTS5")
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def _add(self, name, kind, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        self.index.add(path, kind, text=text)
+        return path
+
+    def test_snippet_markers_survive_markdown_bold(self):
+        self._add("Wideo_analiza_20260101_1200.txt", "analysis",
+                  "Wnioski: **Planuj tydzien** zawsze w niedziele.")
+        results = self.index.search("planuj", kind="analysis")
+        self.assertEqual(len(results), 1)
+        snippet = results[0]["snippet"]
+        hit = library.SNIPPET_OPEN + "Planuj" + library.SNIPPET_CLOSE
+        self.assertIn("**" + hit + " tydzien**", snippet)
+        self.assertEqual(snippet.count(library.SNIPPET_OPEN), 1)
+        self.assertEqual(snippet.count(library.SNIPPET_CLOSE), 1)
+
+    def test_kind_filter(self):
+        self._add("Wideo_20260101_1200.txt", "transcript", "planuj tydzien")
+        self._add("Wideo_analiza_20260101_1200.txt", "analysis", "**Planuj** tydzien")
+        self.assertEqual([r["kind"] for r in self.index.search("planuj", kind="transcript")],
+                         ["transcript"])
+        self.assertEqual(len(self.index.search("planuj")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Api segment access: timing of the transcript behind the current entry."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_HOME = tempfile.TemporaryDirectory()
+os.environ["COPYSIGHT_HOME"] = _HOME.name
+
+try:
+    import app
+except ImportError as exc:  # pywebview / app dependencies missing
+    raise unittest.SkipTest(f"app not importable: {exc}")
+
+import segments
+
+
+class SegmentsWithAnalysisTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        app._ensure_output_dirs()
+        cls.transcript = os.path.join(app.TRANSCRIPTS_DIR, "Wideo_20260101_1200.txt")
+        cls.analysis = os.path.join(app.ANALYSES_DIR, "Wideo_analiza_20260101_1205.txt")
+        text = "Pierwsze zdanie. Drugie zdanie."
+        with open(cls.transcript, "w", encoding="utf-8") as f:
+            f.write(text)
+        segments.write(segments.path_for(cls.transcript), [
+            {"start": 0.0, "end": 2.0, "text": "Pierwsze zdanie."},
+            {"start": 2.0, "end": 4.5, "text": " Drugie zdanie."},
+        ], text=text)
+        with open(cls.analysis, "w", encoding="utf-8") as f:
+            f.write("<!-- source: https://example.com/v -->\n**Wniosek** jeden.")
+        cls.api = app.Api()
+
+    def test_export_srt_from_analysis_entry(self):
+        self.assertIn("content", self.api.get_entry(self.analysis))
+        result = self.api.export_segments("srt")
+        self.assertEqual(result.get("filename"), "Wideo_20260101_1200.srt")
+        with open(result["path"], encoding="utf-8") as f:
+            self.assertIn("00:00:02,000 --> 00:00:04,500\nDrugie zdanie.", f.read())
+
+    def test_segments_for_analysis_path(self):
+        result = self.api.get_segments(self.analysis, start=3.0)
+        self.assertEqual([seg["text"] for seg in result["segments"]], [" Drugie zdanie."])
+
+    def test_transcript_entry_and_outside_path(self):
+        self.api.get_entry(self.transcript)
+        self.assertEqual(self.api.get_segments()["count"], 2)
+        self.assertEqual(self.api.get_segments(os.path.join(_HOME.name, "x.txt")),
+                         {"error": "Access denied"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,357 @@
+"""Persistent transcription worker — warm model, crash-isolated.
+
+The parent (app.py) talks to a long-lived child interpreter over a JSON-lines
+pipe protocol instead of spawning `python -c` per job. The child imports
+transcriber and the engine (mlx-whisper or faster-whisper) once and keeps
+loaded model weights resident, so the second and later jobs skip interpreter
+start-up and model loading.
+
+If Metal SIGABRTs (or anything else kills the child), only the child dies;
+the next request respawns it. Idle children exit after a timeout to free
+GPU/RAM.
+
+COPYSIGHT_PRELOAD (comma-separated module names) is imported by the child
+after transcriber, so modules that call transcriber.register_backend() —
+e.g. benchmarks.fake_engine — can add engines to the worker.
+
+Protocol (one JSON object per line):
+    parent -> child  {"id": 1, "cmd": "transcribe", "audio": ..., "language": ...,
+                      "model": ..., "prompt": ..., "start": seconds-or-null,
+                      "options": {"backend", "compute_type", "cpu_threads", "vad"}}
+                     {"cmd": "shutdown"}
+    child -> parent  {"event": "ready"}
+                     {"id": 1, "event": "phase", "msg": ...}
+                     {"id": 1, "event": "segment", "start": ..., "end": ...,
+                      "text": ..., "progress": ...}
+                     {"id": 1, "event": "result", "text": ..., "language": ...,
+                      "segments": [...], "timings": {...}}
+                     {"id": 1, "event": "error", "error": ...}
+"""
+
+import collections
+import importlib
+import itertools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+
+DEFAULT_IDLE_TIMEOUT = 300  # seconds before an idle worker exits
+
+_WORKER_SCRIPT = os.path.abspath(__file__)
+
+
+class TranscribeWorker:
+    """Parent-side handle for one worker process. Serves one job at a time."""
+
+    def __init__(self, cwd=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self._cwd = cwd or os.path.dirname(_WORKER_SCRIPT)
+        self.idle_timeout = idle_timeout
+        self._proc = None
+        self._events = None
+        self._stderr_tail = collections.deque(maxlen=40)
+        self._lock = threading.Lock()
+        self._idle_timer = None
+        self._ids = itertools.count(1)
+        self._models_loaded = set()
+        self.jobs_served = 0
+        self.restarts = 0
+
+    @property
+    def alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def transcribe(self, audio, language=None, model="turbo", prompt=None,
+                   cancel=None, on_event=None, start=None, options=None):
+        """Run one transcription in the worker. Phase and segment events are
+        passed to on_event(msg) as they arrive; start resumes at an offset.
+        options: engine settings passed to transcribe_segments() (backend,
+        compute_type, cpu_threads, vad).
+
+        Returns {"text", "language", "segments", "timings"} on success, {"error", "signal"?}
+        on failure, or None if cancelled (the worker is killed in that case).
+        """
+        with self._lock:
+            self._cancel_idle_timer()
+            t_start = time.time()
+            cold = not self.alive
+            if cold:
+                self._spawn()
+            options = options or {}
+            model_key = (model, json.dumps(options, sort_keys=True))
+            warm_model = model_key in self._models_loaded
+
+            req_id = next(self._ids)
+            request = {"id": req_id, "cmd": "transcribe", "audio": audio,
+                       "language": language, "model": model, "prompt": prompt,
+                       "start": start, "options": options}
+            try:
+                self._send(request)
+            except OSError:
+                return self._crashed()
+
+            first_event = None
+            first_segment = None
+            while True:
+                if cancel is not None and cancel.is_set():
+                    self._kill()
+                    return None
+                try:
+                    msg = self._events.get(timeout=0.5)
+                except queue.Empty:
+                    if not self.alive:
+                        return self._crashed()
+                    continue
+                if msg is None:  # stdout closed: the child died
+                    return self._crashed()
+                if msg.get("id") != req_id:
+                    continue
+                event = msg.get("event")
+                if first_event is None:
+                    first_event = time.time() - t_start
+                if event == "segment" and first_segment is None:
+                    first_segment = time.time() - t_start
+
+                if event == "result":
+                    self._models_loaded.add(model_key)
+                    self.jobs_served += 1
+                    self._start_idle_timer()
+                    timings = msg.get("timings", {})
+                    timings.update({
+                        "total_s": round(time.time() - t_start, 3),
+                        "first_event_s": round(first_event, 3),
+                        "first_segment_s": round(first_segment, 3) if first_segment else None,
+                        "cold_start": cold,
+                        "warm_model": warm_model,
+                    })
+                    return {"text": msg.get("text"), "language": msg.get("language"),
+                            "segments": msg.get("segments", []), "timings": timings}
+                if event == "error":
+                    self._start_idle_timer()
+                    return {"error": msg.get("error") or "Transcription failed"}
+                if on_event:
+                    on_event(msg)
+
+    def close(self):
+        """Ask the worker to exit; kill it if it does not."""
+        with self._lock:
+            self._cancel_idle_timer()
+            self._shutdown()
+
+    # ── Process management ──
+
+    def _spawn(self):
+        if self._proc is not None:
+            self.restarts += 1
+        self._models_loaded.clear()
+        self._stderr_tail.clear()
+        self._proc = subprocess.Popen(
+            [sys.executable, _WORKER_SCRIPT],
+            cwd=self._cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=os.environ.copy(),
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        self._events = queue.Queue()
+        threading.Thread(target=self._read_events, args=(self._proc, self._events),
+                         daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(self._proc,),
+                         daemon=True).start()
+
+    def _send(self, obj):
+        self._proc.stdin.write(json.dumps(obj) + "\n")
+        self._proc.stdin.flush()
+
+    @staticmethod
+    def _read_events(proc, events):
+        for line in proc.stdout:
+            try:
+                events.put(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        events.put(None)
+
+    def _read_stderr(self, proc):
+        for line in proc.stderr:
+            line = line.strip()
+            if line:
+                self._stderr_tail.append(line)
+
+    def _crashed(self):
+        """Collect exit details from a dead worker. It is respawned on next use."""
+        proc = self._proc
+        try:
+            returncode = proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._kill()
+            returncode = proc.returncode
+        result = {"error": " ".join(list(self._stderr_tail)[-3:])[:200] or "Worker exited"}
+        if returncode is not None and returncode < 0:
+            # Negative return = killed by signal (e.g. -6 = SIGABRT)
+            result["signal"] = -returncode
+        self._models_loaded.clear()
+        return result
+
+    def _kill(self):
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            return
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        self._models_loaded.clear()
+
+    def _shutdown(self):
+        if not self.alive:
+            return
+        try:
+            self._send({"cmd": "shutdown"})
+            self._proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._kill()
+        self._models_loaded.clear()
+
+    # ── Idle timeout ──
+
+    def _start_idle_timer(self):
+        if not self.idle_timeout or self.idle_timeout <= 0:
+            return
+        self._idle_timer = threading.Timer(self.idle_timeout, self._on_idle)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _cancel_idle_timer(self):
+        if self._idle_timer:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _on_idle(self):
+        # Skip if a job grabbed the worker in the meantime
+        if self._lock.acquire(blocking=False):
+            try:
+                self._idle_timer = None
+                self._shutdown()
+            finally:
+                self._lock.release()
+
+
+class WorkerPool:
+    """Hands out idle TranscribeWorkers, creating new ones on demand.
+
+    The pool never grows past the transcribe stage's concurrency because
+    each stage thread holds at most one worker at a time.
+    """
+
+    def __init__(self, cwd=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self._cwd = cwd
+        self._idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle = []
+        self._all = []
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                # Prefer a worker that is still running (model already loaded)
+                self._idle.sort(key=lambda w: w.alive)
+                return self._idle.pop()
+            worker = TranscribeWorker(self._cwd, self._idle_timeout)
+            self._all.append(worker)
+            return worker
+
+    def release(self, worker):
+        with self._lock:
+            self._idle.append(worker)
+
+    def set_idle_timeout(self, seconds):
+        with self._lock:
+            self._idle_timeout = seconds
+            for worker in self._all:
+                worker.idle_timeout = seconds
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": len(self._all),
+                "alive": sum(1 for w in self._all if w.alive),
+                "jobs_served": sum(w.jobs_served for w in self._all),
+                "restarts": sum(w.restarts for w in self._all),
+            }
+
+    def close(self):
+        with self._lock:
+            workers = list(self._all)
+        for worker in workers:
+            worker.close()
+
+
+# ══════════════════════════════════════════
+#  Child process
+# ══════════════════════════════════════════
+
+def _serve():
+    # Keep the protocol channel private: anything printed by libraries
+    # (including native code writing to fd 1) goes to stderr instead.
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    def send(obj):
+        proto.write(json.dumps(obj) + "\n")
+        proto.flush()
+
+    import transcriber
+
+    for name in filter(None, os.environ.get("COPYSIGHT_PRELOAD", "").split(",")):
+        importlib.import_module(name.strip())
+
+    send({"event": "ready"})
+    for line in sys.stdin:
+        try:
+            req = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if req.get("cmd") == "shutdown":
+            break
+        if req.get("cmd") != "transcribe":
+            continue
+
+        req_id = req.get("id")
+        t0 = time.time()
+        try:
+            result = transcriber.transcribe_segments(
+                req["audio"],
+                language=req.get("language"),
+                model_size=req.get("model") or "turbo",
+                initial_prompt=req.get("prompt"),
+                log_fn=lambda msg: print(msg, file=sys.stderr),
+                phase_fn=lambda msg: send({"id": req_id, "event": "phase", "msg": msg}),
+                segment_fn=lambda seg: send({"id": req_id, "event": "segment", **seg}),
+                start_offset=req.get("start"),
+                **(req.get("options") or {}),
+            )
+        except Exception as exc:
+            send({"id": req_id, "event": "error", "error": str(exc)[:200]})
+            continue
+        if not result:
+            send({"id": req_id, "event": "error", "error": "Transcription failed"})
+            continue
+        timings = {"transcribe_s": round(time.time() - t0, 3),
+                   "audio_s": result.get("duration")}
+        if result.get("vad"):
+            timings["vad"] = result.pop("vad")
+        send({"id": req_id, "event": "result", **result, "timings": timings})
+
+
+if __name__ == "__main__":
+    _serve()
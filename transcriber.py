@@ -1,6 +1,14 @@
 import sys
 import os
+import re
+import platform
 import subprocess
+import contextlib
+import importlib.util
+import tempfile
+import time
+
+import audio
 
 
 # Model name mapping: UI key → HuggingFace repo (MLX-optimized)
@@ -13,6 +21,25 @@ _MLX_MODELS = {
     "turbo": "mlx-community/whisper-large-v3-turbo",
 }
 
+# Same UI keys → faster-whisper (CTranslate2) model names for the CPU backend
+_CPU_MODELS = {
+    "tiny": "tiny",
+    "base": "base",
+    "small": "small",
+    "medium": "medium",
+    "large": "large-v3",
+    "turbo": "large-v3-turbo",
+}
+
+BACKENDS = ("mlx", "cpu")
+COMPUTE_TYPES = ("int8", "float32")
+
+# Loaded CPU models, keyed by (model, compute_type, threads)
+_cpu_models = {}
+
+# Extra engines added with register_backend() (e.g. benchmarks/fake_engine.py)
+_extra_backends = {}
+
 
 def _get_audio_duration(audio_path):
     """Get audio duration in seconds using ffprobe. Returns None on failure."""
@@ -38,11 +65,154 @@ def _format_duration(seconds):
     return f"{m}:{s:02d}"
 
 
+# mlx-whisper verbose output: "[00:05.000 --> 00:09.320]  text" (hours optional)
+_SEGMENT_LINE = re.compile(
+    r"^\[((?:\d+:)?\d+:\d+\.\d+) --> ((?:\d+:)?\d+:\d+\.\d+)\]\s?(.*)$")
+
+
+def _parse_timestamp(ts):
+    seconds = 0.0
+    for part in ts.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+class _SegmentTap:
+    """Stand-in for sys.stdout that turns mlx-whisper's verbose segment lines
+    into segment_fn calls as soon as each segment is decoded."""
+
+    def __init__(self, on_segment, passthrough):
+        self._on_segment = on_segment
+        self._passthrough = passthrough
+        self._buf = ""
+
+    def write(self, data):
+        self._buf += data
+        while "\n" in self._buf:
+            line, self._buf = self._buf.split("\n", 1)
+            match = _SEGMENT_LINE.match(line)
+            if match:
+                self._on_segment(_parse_timestamp(match.group(1)),
+                                 _parse_timestamp(match.group(2)), match.group(3))
+            elif line.strip():
+                self._passthrough.write(line + "\n")
+        return len(data)
+
+    def flush(self):
+        self._passthrough.flush()
+
+
+def _clean_segment(seg):
+    """Keep the per-segment fields we persist (drops tokens, temperature...)."""
+    return {
+        "start": float(seg.get("start", 0.0)),
+        "end": float(seg.get("end", 0.0)),
+        "text": seg.get("text", ""),
+        "avg_logprob": float(seg.get("avg_logprob", 0.0)),
+        "no_speech_prob": float(seg.get("no_speech_prob", 0.0)),
+    }
+
+
+def default_backend():
+    """mlx on Apple Silicon with mlx-whisper installed, otherwise cpu."""
+    if (sys.platform == "darwin" and platform.machine() == "arm64"
+            and importlib.util.find_spec("mlx_whisper")):
+        return "mlx"
+    return "cpu"
+
+
+def resolve_backend(backend):
+    if backend in BACKENDS or backend in _extra_backends:
+        return backend
+    return default_backend()
+
+
+def register_backend(name, run_fn):
+    """Add an engine selectable as backend=name. run_fn(audio_path, model_label,
+    decode_options, on_segment, log_fn) returns the same dict as
+    transcribe_segments(). In the transcription worker, list the module that
+    registers it in COPYSIGHT_PRELOAD (see transcribe_worker)."""
+    _extra_backends[name] = run_fn
+
+
+def load_model(model_size="turbo", backend=None, compute_type="int8", cpu_threads=0):
+    """Load (or fetch from the in-process cache) the model for a backend.
+    Long-lived processes such as transcribe_worker keep it resident.
+    """
+    backend = resolve_backend(backend)
+    if backend in _extra_backends:
+        return None
+    if backend == "mlx":
+        import mlx.core as mx
+        from mlx_whisper.transcribe import ModelHolder
+        repo = _MLX_MODELS.get(model_size, _MLX_MODELS["turbo"])
+        return ModelHolder.get_model(repo, mx.float16)
+
+    from faster_whisper import WhisperModel
+    name = _CPU_MODELS.get(model_size, _CPU_MODELS["turbo"])
+    compute_type = compute_type if compute_type in COMPUTE_TYPES else "int8"
+    key = (name, compute_type, int(cpu_threads or 0))
+    if key not in _cpu_models:
+        _cpu_models[key] = WhisperModel(name, device="cpu", compute_type=compute_type,
+                                        cpu_threads=int(cpu_threads or 0))
+    return _cpu_models[key]
+
+
+# VAD pre-pass: below this fraction of silence nothing is cut
+VAD_MIN_SKIP = 0.05
+
+
+def _vad_trim(audio_path, duration, log_fn):
+    """VAD pre-pass: find speech with ffmpeg silencedetect and decode just
+    those spans to a temporary WAV. Returns (wav path or None, Timeline or
+    None, stats). Nothing is cut when under VAD_MIN_SKIP of the audio is
+    silence — not worth the extra decode."""
+    t0 = time.time()
+    silences = audio.detect_silences(audio_path, min_silence=audio.VAD_MIN_SILENCE)
+    regions = audio.speech_regions(silences, duration)
+    speech_s = sum(end - start for start, end in regions)
+    stats = {"speech_s": round(speech_s, 2), "skipped_s": round(duration - speech_s, 2),
+             "skipped_fraction": round(1 - speech_s / duration, 3), "regions": len(regions)}
+    if not regions or speech_s > duration * (1 - VAD_MIN_SKIP):
+        stats.update({"trimmed": False, "vad_s": round(time.time() - t0, 2)})
+        return None, None, stats
+
+    fd, trimmed_path = tempfile.mkstemp(prefix="copysight-vad-", suffix=".wav")
+    os.close(fd)
+    ok = audio.extract_speech(audio_path, trimmed_path, regions)
+    stats.update({"trimmed": ok, "vad_s": round(time.time() - t0, 2)})
+    if not ok:
+        log_fn("VAD: speech extraction failed, transcribing everything")
+        os.unlink(trimmed_path)
+        return None, None, stats
+    log_fn(f"VAD: {len(regions)} speech regions, skipping "
+           f"{stats['skipped_fraction'] * 100:.0f}% ({_format_duration(stats['skipped_s'])})")
+    return trimmed_path, audio.Timeline(regions), stats
+
+
 def transcribe_audio(audio_path, language=None, model_size="turbo", initial_prompt=None,
-                     log_fn=print, phase_fn=None):
+                     log_fn=print, phase_fn=None, segment_fn=None, start_offset=None,
+                     **engine_options):
+    """
+    Transcribe an audio file and return the plain text (None on error).
+    Same parameters as transcribe_segments().
+    """
+    result = transcribe_segments(audio_path, language=language, model_size=model_size,
+                                 initial_prompt=initial_prompt, log_fn=log_fn,
+                                 phase_fn=phase_fn, segment_fn=segment_fn,
+                                 start_offset=start_offset, **engine_options)
+    return result["text"] if result else None
+
+
+def transcribe_segments(audio_path, language=None, model_size="turbo", initial_prompt=None,
+                        log_fn=print, phase_fn=None, segment_fn=None, start_offset=None,
+                        backend=None, compute_type="int8", cpu_threads=0, vad=False):
     """
-    Transcribe an audio file using mlx-whisper (Apple Silicon GPU via MLX).
-    Runs in fp16 on the M-series GPU — ~3-4x faster than openai-whisper on CPU.
+    Transcribe an audio file with the selected engine:
+      - "mlx": mlx-whisper on the Apple Silicon GPU, fp16 (~3-4x faster than
+        openai-whisper on CPU).
+      - "cpu": faster-whisper (CTranslate2) for Linux servers, int8 or float32,
+        with a configurable thread count.
 
     Models are downloaded on first use and cached in ~/.cache/huggingface/hub/.
 
@@ -52,9 +222,24 @@ def transcribe_audio(audio_path, language=None, model_size="turbo", initial_prom
     :param initial_prompt: Context hint to reduce hallucinations.
     :param log_fn: Logging callback (default: print).
     :param phase_fn: Optional callback(phase_str) for live UI updates.
+    :param segment_fn: Optional callback(segment_dict) called as each segment is decoded.
+                       Segment: {"start", "end", "text", "progress"} — progress is
+                       percent of the audio covered (segment end / duration).
+    :param start_offset: Seconds to skip (resume a partial transcript).
+    :param backend: 'mlx', 'cpu' or None/'auto' (see default_backend()).
+    :param compute_type: cpu backend only — 'int8' (default) or 'float32'.
+    :param cpu_threads: cpu backend only — worker threads, 0 = library default.
+    :param vad: Transcribe only the speech: silences of VAD_MIN_SILENCE s or
+                more are cut out before decoding (_vad_trim) and segment times
+                mapped back to the original timeline. Also keeps Whisper from
+                hallucinating text into dead air.
+    :return: {"text", "language", "duration" (seconds, None if unknown),
+             "segments": [{"start", "end", "text", "avg_logprob",
+             "no_speech_prob"}, ...], "vad"?: {...}} or None on error.
+             vad: speech_s, skipped_s, skipped_fraction, regions, trimmed,
+             vad_s (detection + extraction), engine_s and speedup_est
+             (estimated full-length engine time / (engine_s + vad_s)).
     """
-    import mlx_whisper
-
     def phase(msg):
         if phase_fn:
             phase_fn(msg)
@@ -64,8 +249,7 @@ def transcribe_audio(audio_path, language=None, model_size="turbo", initial_prom
         log_fn(f"Audio file not found: {audio_path}")
         return None
 
-    # Resolve model HF repo
-    model_repo = _MLX_MODELS.get(model_size, _MLX_MODELS["turbo"])
+    backend = resolve_backend(backend)
     model_label = model_size if model_size in _MLX_MODELS else "turbo"
 
     # Audio duration for progress display
@@ -89,34 +273,179 @@ def transcribe_audio(audio_path, language=None, model_size="turbo", initial_prom
     if initial_prompt:
         decode_options["initial_prompt"] = initial_prompt
 
-    log_fn(f"Engine: mlx-whisper · {model_repo} · fp16")
+    # Cut silences out first; the engine then sees only the speech
+    source_path, timeline, vad_stats = audio_path, None, None
+    if vad and duration:
+        trimmed_path, timeline, vad_stats = _vad_trim(audio_path, duration, log_fn)
+        if trimmed_path:
+            source_path = trimmed_path
+            phase(f"Transcribing {_format_duration(vad_stats['speech_s'])} of speech "
+                  f"({vad_stats['skipped_fraction'] * 100:.0f}% silence skipped)")
+
+    if start_offset:
+        clip_start = timeline.to_trimmed(start_offset) if timeline else start_offset
+        decode_options["clip_timestamps"] = [float(clip_start)]
+        log_fn(f"Resuming at {_format_duration(start_offset)}")
+
+    def on_segment(start, end, text):
+        if timeline:
+            start, end = timeline.to_original(start), timeline.to_original(end, end=True)
+        if segment_fn:
+            progress = min(100.0, end / duration * 100) if duration else None
+            segment_fn({"start": start, "end": end, "text": text, "progress": progress})
 
     try:
+        t0 = time.time()
+        if backend in _extra_backends:
+            result = _extra_backends[backend](source_path, model_label, decode_options,
+                                              on_segment, log_fn)
+        elif backend == "mlx":
+            result = _run_mlx(source_path, model_label, decode_options, on_segment,
+                              bool(segment_fn), log_fn)
+        else:
+            result = _run_cpu(source_path, model_label, decode_options, on_segment,
+                              compute_type, cpu_threads, log_fn)
+        engine_s = time.time() - t0
+        if timeline:
+            for seg in result["segments"]:
+                seg["start"] = timeline.to_original(seg["start"])
+                seg["end"] = timeline.to_original(seg["end"], end=True)
+            result["duration"] = duration
+        else:
+            result["duration"] = result.get("duration") or duration
+        if vad_stats:
+            # Engine time scales with audio length: what the full file would have cost
+            full_s = engine_s * duration / vad_stats["speech_s"] if timeline else engine_s
+            vad_stats["engine_s"] = round(engine_s, 2)
+            vad_stats["speedup_est"] = round(full_s / (engine_s + vad_stats["vad_s"]), 2) \
+                if engine_s + vad_stats["vad_s"] > 0 else None
+            result["vad"] = vad_stats
+        phase(f"Done — {result.get('language') or '?'}")
+        return result
+    except Exception as e:
+        log_fn(f"Transcription error: {e}")
+        return None
+    finally:
+        if source_path != audio_path:
+            try:
+                os.unlink(source_path)
+            except OSError:
+                pass
+
+
+def _run_mlx(audio_path, model_label, decode_options, on_segment, stream, log_fn):
+    import mlx_whisper
+
+    model_repo = _MLX_MODELS[model_label]
+    log_fn(f"Engine: mlx-whisper · {model_repo} · fp16")
+
+    # Stream segments: mlx-whisper prints each one as it is decoded when verbose
+    tap = contextlib.nullcontext()
+    if stream:
+        tap = contextlib.redirect_stdout(_SegmentTap(on_segment, sys.stderr))
+
+    with tap:
         result = mlx_whisper.transcribe(
             audio_path,
             path_or_hf_repo=model_repo,
             fp16=True,
+            verbose=True if stream else None,
             **decode_options,
         )
-        lang = result.get('language', '?')
-        phase(f"Done — {lang}")
-        return result["text"]
-    except Exception as e:
-        log_fn(f"Transcription error: {e}")
-        return None
+    return {
+        "text": result["text"],
+        "language": result.get("language"),
+        "segments": [_clean_segment(seg) for seg in result.get("segments", [])],
+    }
+
+
+def _run_cpu(audio_path, model_label, decode_options, on_segment, compute_type,
+             cpu_threads, log_fn):
+    model = load_model(model_label, "cpu", compute_type, cpu_threads)
+    log_fn(f"Engine: faster-whisper · {_CPU_MODELS[model_label]} · cpu "
+           f"{compute_type} · {cpu_threads or 'auto'} threads")
+
+    # faster-whisper yields segments lazily as they are decoded
+    segment_iter, info = model.transcribe(audio_path, beam_size=5, **decode_options)
+    segments = []
+    for seg in segment_iter:
+        segments.append(_clean_segment({
+            "start": seg.start, "end": seg.end, "text": seg.text,
+            "avg_logprob": seg.avg_logprob, "no_speech_prob": seg.no_speech_prob,
+        }))
+        on_segment(seg.start, seg.end, seg.text)
+    return {
+        "text": "".join(seg["text"] for seg in segments),
+        "language": info.language,
+        "segments": segments,
+    }
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python transcriber.py <audio_file> [language] [model] [prompt]")
-        sys.exit(1)
+    import argparse
 
-    audio_file = sys.argv[1]
-    lang = sys.argv[2] if len(sys.argv) > 2 else "auto"
-    mod_size = sys.argv[3] if len(sys.argv) > 3 else "turbo"
-    prompt = sys.argv[4] if len(sys.argv) > 4 else None
+    parser = argparse.ArgumentParser(description="Transcribe an audio file.")
+    parser.add_argument("audio_file")
+    parser.add_argument("language", nargs="?", default="auto")
+    parser.add_argument("model", nargs="?", default="turbo")
+    parser.add_argument("prompt", nargs="?", default=None)
+    parser.add_argument("--chunked", type=int, metavar="WORKERS", default=0,
+                        help="split at silences and transcribe on N parallel workers")
+    parser.add_argument("--chunk-seconds", type=int, default=600)
+    parser.add_argument("--compare", action="store_true",
+                        help="with --chunked: also run single-pass; with --vad: also run without VAD")
+    parser.add_argument("--backend", choices=("auto",) + BACKENDS, default="auto",
+                        help="transcription engine (auto: mlx on Apple Silicon, else cpu)")
+    parser.add_argument("--compute-type", choices=COMPUTE_TYPES, default="int8",
+                        help="cpu backend: quantization")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="cpu backend: thread count (0 = auto)")
+    parser.add_argument("--vad", action="store_true",
+                        help="cut silences out before transcribing (with --compare: "
+                             "also run without and report real speedup)")
+    args = parser.parse_args()
+    engine = {"backend": args.backend, "compute_type": args.compute_type,
+              "cpu_threads": args.threads, "vad": args.vad}
 
-    text = transcribe_audio(audio_file, language=lang, model_size=mod_size, initial_prompt=prompt)
+    audio_file = args.audio_file
+    if args.chunked > 1:
+        import chunker
+
+        result = chunker.transcribe_chunked(
+            audio_file, workers=args.chunked, language=args.language,
+            model_size=args.model, initial_prompt=args.prompt,
+            chunk_seconds=args.chunk_seconds, engine_options=engine,
+        )
+        text = result["text"] if result else None
+        if result and args.compare:
+            t0 = time.time()
+            transcribe_segments(audio_file, language=args.language, model_size=args.model,
+                                initial_prompt=args.prompt, log_fn=lambda msg: None,
+                                **engine)
+            single = time.time() - t0
+            chunked_s = result["stats"]["wall_s"]
+            print(f"Single-pass: {single:.1f}s · chunked: {chunked_s:.1f}s · "
+                  f"speedup {single / chunked_s:.2f}x")
+    else:
+        t0 = time.time()
+        result = transcribe_segments(audio_file, language=args.language,
+                                     model_size=args.model, initial_prompt=args.prompt,
+                                     **engine)
+        elapsed = time.time() - t0
+        text = result["text"] if result else None
+        vad_stats = (result or {}).get("vad")
+        if vad_stats:
+            print(f"VAD: skipped {vad_stats['skipped_fraction'] * 100:.0f}% "
+                  f"({vad_stats['skipped_s']:.0f}s) · estimated speedup "
+                  f"{vad_stats['speedup_est']}x")
+        if result and args.vad and args.compare:
+            t0 = time.time()
+            transcribe_segments(audio_file, language=args.language, model_size=args.model,
+                                initial_prompt=args.prompt, log_fn=lambda msg: None,
+                                **{**engine, "vad": False})
+            full = time.time() - t0
+            print(f"Without VAD: {full:.1f}s · with: {elapsed:.1f}s · "
+                  f"speedup {full / elapsed:.2f}x")
 
     if text:
         print("\n--- TRANSCRIPTION RESULT ---")
@@ -5,9 +5,12 @@
 
 // ── State ──
 let currentScreen = 'input';
-let pollInterval = null;
+let watchToken = 0;
+let currentJobId = null;
 let lastStampCount = 0;
 let lastStampTexts = [];
+let lastPartial = '';        // streamed analysis text already rendered
+let readerStreaming = false; // reader opened before the job finished
 
 // ── Typewriter state ──
 let stampQueue = [];
@@ -40,6 +43,7 @@ const dateStamp = document.getElementById('dateStamp');
 const readerArticle = document.getElementById('readerArticle');
 const newBtn = document.getElementById('newBtn');
 const copyBtn = document.getElementById('copyBtn');
+const srtBtn = document.getElementById('srtBtn');
 const exportBtn = document.getElementById('exportBtn');
 const fileList = document.getElementById('fileList');
 const searchBar = document.getElementById('searchBar');
@@ -49,6 +53,9 @@ const apiKeyInput = document.getElementById('apiKeyInput');
 const apiKeyStatus = document.getElementById('apiKeyStatus');
 const langSelect = document.getElementById('langSelect');
 const modelSelect = document.getElementById('modelSelect');
+const backendSelect = document.getElementById('backendSelect');
+const computeSelect = document.getElementById('computeSelect');
+const captionsSelect = document.getElementById('captionsSelect');
 const contextInput = document.getElementById('contextInput');
 const analysisPrompt = document.getElementById('analysisPrompt');
 
@@ -107,15 +114,12 @@ document.addEventListener('keydown', function(e) {
 // ═══════════════════════════════════════
 
 function stopPipeline() {
-  if (pollInterval) {
-    clearInterval(pollInterval);
-    pollInterval = null;
-  }
+  stopWatching();
   stopDots();
   soundWave.classList.remove('active');
   goBtn.classList.remove('busy');
   if (window.pywebview && window.pywebview.api) {
-    window.pywebview.api.cancel_pipeline().catch(function() {});
+    window.pywebview.api.cancel_pipeline(currentJobId).catch(function() {});
   }
 }
 
@@ -133,8 +137,11 @@ function startPipeline() {
     return;
   }
 
-  // Prevent double-start
-  if (goBtn.classList.contains('busy')) return;
+  // Already busy — queue another job behind the one being watched
+  if (goBtn.classList.contains('busy')) {
+    queueBackgroundJob(url);
+    return;
+  }
   goBtn.classList.add('busy');
 
   // Clear previous stamps
@@ -143,6 +150,8 @@ function startPipeline() {
   }
   lastStampCount = 0;
   lastStampTexts = [];
+  lastPartial = '';
+  readerStreaming = false;
   stampQueue = [];
   isTyping = false;
   currentTypingEl = null;
@@ -155,9 +164,10 @@ function startPipeline() {
 
   // Call Python backend
   if (window.pywebview && window.pywebview.api) {
-    window.pywebview.api.start_pipeline(url).then(function(result) {
+    submitUrl(url).then(function(result) {
       if (result && result.started) {
-        pollInterval = setInterval(pollPipelineStatus, 500);
+        currentJobId = result.job_id;
+        watchJob(currentJobId);
       } else {
         queueStampTypewriter('Error: ' + (result && result.reason || 'Unknown'));
         soundWave.classList.remove('active');
@@ -181,65 +191,121 @@ function startPipeline() {
   }
 }
 
-function pollPipelineStatus() {
-  if (!window.pywebview || !window.pywebview.api) return;
+// Playlist / channel links expand into one job per entry
+var BATCH_URL = /youtube\.com\/(playlist\?|@|channel\/|c\/|user\/)/;
 
-  window.pywebview.api.get_pipeline_status().then(function(status) {
-    if (!status) return;
-    var stamps = status.stamps || [];
+function submitUrl(url) {
+  if (BATCH_URL.test(url)) return window.pywebview.api.start_batch(url);
+  return window.pywebview.api.start_pipeline(url);
+}
 
-    // Keep dots alive while pipeline is active (polling proves app is responsive)
-    if (status.step !== 'idle' && status.step !== 'done' && status.step !== 'error') {
-      lastUpdateTime = Date.now();
-    }
+function queueBackgroundJob(url) {
+  if (!window.pywebview || !window.pywebview.api) return;
 
-    // Check if last known stamp was updated in place (progress callbacks)
-    if (lastStampCount > 0 && stamps.length >= lastStampCount) {
-      var lastIdx = lastStampCount - 1;
-      if (stamps[lastIdx] !== lastStampTexts[lastIdx]) {
-        updateLastStampText(stamps[lastIdx]);
-        lastStampTexts[lastIdx] = stamps[lastIdx];
-      }
+  submitUrl(url).then(function(result) {
+    if (result && result.started) {
+      // Stamps belong to the watched job — confirm via the empty input instead
+      urlInput.value = '';
+      urlInput.placeholder = 'Queued.';
+      setTimeout(function() { urlInput.placeholder = ''; }, 2000);
     }
+  }).catch(function() {});
+}
+
+// Long-poll: the backend answers as soon as the job changes, with only the
+// changed keys and stamps. The short timeout doubles as a heartbeat that
+// keeps the dots alive through quiet stretches (stale threshold is 3s).
+var WATCH_TIMEOUT_S = 2;
+
+function watchJob(jobId) {
+  var token = ++watchToken;
+  var status = {stamps: []};
+  var version = 0;
+
+  function next() {
+    window.pywebview.api.wait_for_status(jobId, version, WATCH_TIMEOUT_S).then(function(delta) {
+      if (token !== watchToken || !delta) return;
+      version = delta.version;
+      Object.assign(status, delta.changes);
+      status.title = delta.title;
+      status.stamps = status.stamps.slice(0, delta.stamps_from).concat(delta.stamps);
+      if (handleStatus(status)) next();
+    }).catch(function() {
+      if (token !== watchToken) return;
+      stopPipeline();
+      queueStampTypewriter('Error: bridge failure');
+    });
+  }
+  next();
+}
+
+function stopWatching() {
+  watchToken++;
+}
+
+// Render a job status; returns false once the job has finished
+function handleStatus(status) {
+  var stamps = status.stamps || [];
 
-    // Add new stamps
-    while (lastStampCount < stamps.length) {
-      queueStampTypewriter(stamps[lastStampCount]);
-      lastStampTexts.push(stamps[lastStampCount]);
-      lastStampCount++;
+  // Keep dots alive while pipeline is active (an answer proves app is responsive)
+  if (status.step !== 'idle' && status.step !== 'done' && status.step !== 'error') {
+    lastUpdateTime = Date.now();
+  }
+
+  // Check if last known stamp was updated in place (progress callbacks)
+  if (lastStampCount > 0 && stamps.length >= lastStampCount) {
+    var lastIdx = lastStampCount - 1;
+    if (stamps[lastIdx] !== lastStampTexts[lastIdx]) {
+      updateLastStampText(stamps[lastIdx]);
+      lastStampTexts[lastIdx] = stamps[lastIdx];
     }
+  }
 
-    // Check if done
-    if (status.done) {
-      clearInterval(pollInterval);
-      pollInterval = null;
-      soundWave.classList.remove('active');
-      goBtn.classList.remove('busy');
+  // Add new stamps
+  while (lastStampCount < stamps.length) {
+    queueStampTypewriter(stamps[lastStampCount]);
+    lastStampTexts.push(stamps[lastStampCount]);
+    lastStampCount++;
+  }
 
-      // Fetch result and transition to reader
-      window.pywebview.api.get_result().then(function(result) {
-        if (result) {
-          populateReader(result.analysis || result.transcript || '', result.meta);
-          setTimeout(function() {
-            fadeStamps();
-            setTimeout(function() {
-              navigateTo('reader');
-            }, 400);
-          }, 800);
-        }
-      }).catch(function() {
-        queueStampTypewriter('Error: could not fetch result');
-      });
-    } else if (status.step === 'error' || status.step === 'idle') {
-      clearInterval(pollInterval);
-      pollInterval = null;
-      soundWave.classList.remove('active');
-      goBtn.classList.remove('busy');
+  // Stream the analysis into the reader as tokens arrive
+  if (status.partial_analysis && status.partial_analysis !== lastPartial) {
+    lastPartial = status.partial_analysis;
+    populateReader(lastPartial, {title: status.title});
+    if (!readerStreaming) {
+      readerStreaming = true;
+      fadeStamps();
+      setTimeout(function() { navigateTo('reader'); }, 400);
     }
-  }).catch(function() {
-    stopPipeline();
-    queueStampTypewriter('Error: bridge failure');
-  });
+  }
+
+  // Check if done
+  if (status.done) {
+    soundWave.classList.remove('active');
+    goBtn.classList.remove('busy');
+
+    // Fetch result and transition to reader
+    window.pywebview.api.get_result(currentJobId).then(function(result) {
+      if (result) {
+        populateReader(result.analysis || result.transcript || '', result.meta);
+        if (readerStreaming) return;
+        setTimeout(function() {
+          fadeStamps();
+          setTimeout(function() {
+            navigateTo('reader');
+          }, 400);
+        }, 800);
+      }
+    }).catch(function() {
+      queueStampTypewriter('Error: could not fetch result');
+    });
+    return false;
+  } else if (status.step === 'error' || status.step === 'idle') {
+    soundWave.classList.remove('active');
+    goBtn.classList.remove('busy');
+    return false;
+  }
+  return true;
 }
 
 // ── Typewriter engine ──
@@ -585,6 +651,14 @@ exportBtn.addEventListener('click', function() {
   }
 });
 
+srtBtn.addEventListener('click', function() {
+  if (window.pywebview && window.pywebview.api) {
+    window.pywebview.api.export_segments('srt').then(function(result) {
+      showButtonSuccess(srtBtn, result && result.path ? 'Saved' : 'No timing');
+    }).catch(function() {});
+  }
+});
+
 function getReaderText() {
   return rawReaderMarkdown || '';
 }
@@ -634,7 +708,8 @@ function loadLibrary() {
 
   window.pywebview.api.get_library(activeTab).then(function(entries) {
     libraryCache = entries || [];
-    renderLibrary(libraryCache);
+    // Re-runs an active search, or renders the tab
+    searchBar.dispatchEvent(new Event('input'));
   }).catch(function() {
     libraryCache = [];
     renderLibrary([]);
@@ -653,16 +728,16 @@ function loadLibrary() {
   }).catch(function() {});
 }
 
-function renderLibrary(entries) {
+function renderLibrary(entries, searched) {
   // Clear
   while (fileList.firstChild) {
     fileList.removeChild(fileList.firstChild);
   }
 
-  // Filter by search
+  // Filter by title (full-text results arrive already filtered)
   var query = (searchBar.value || '').trim().toLowerCase();
   var filtered = entries;
-  if (query) {
+  if (query && !searched) {
     filtered = entries.filter(function(e) {
       return e.title.toLowerCase().indexOf(query) >= 0;
     });
@@ -690,7 +765,15 @@ function renderLibrary(entries) {
     date.className = 'file-date';
     date.textContent = entry.date_str;
 
-    row.appendChild(title);
+    if (entry.snippet) {
+      var main = document.createElement('div');
+      main.className = 'file-main';
+      main.appendChild(title);
+      main.appendChild(renderSnippet(entry.snippet));
+      row.appendChild(main);
+    } else {
+      row.appendChild(title);
+    }
     if (entry.kind === 'transcript') {
       var badge = document.createElement('span');
       badge.className = 'file-badge';
@@ -707,9 +790,50 @@ function renderLibrary(entries) {
   });
 }
 
-// Search filtering
+// Snippet text marks matches with \x02 … \x03 (library.SNIPPET_OPEN/CLOSE);
+// control characters, so markdown bold in an analysis cannot be mistaken
+// for a hit (its "**" is dropped for display)
+function renderSnippet(snippet) {
+  var el = document.createElement('div');
+  el.className = 'file-snippet';
+  snippet.replace(/\*\*/g, '').split(/[\x02\x03]/).forEach(function(part, i) {
+    if (i % 2) {
+      var mark = document.createElement('mark');
+      mark.textContent = part;
+      el.appendChild(mark);
+    } else {
+      el.appendChild(document.createTextNode(part));
+    }
+  });
+  return el;
+}
+
+// Search: full-text over all transcripts and analyses (any age bracket);
+// falls back to filtering titles of the current tab
+var SEARCH_DELAY_MS = 150;
+var searchTimer = null;
+var searchSeq = 0;
+
 searchBar.addEventListener('input', function() {
-  renderLibrary(libraryCache);
+  clearTimeout(searchTimer);
+  var query = (searchBar.value || '').trim();
+  var seq = ++searchSeq;
+  if (query.length < 2 || !window.pywebview || !window.pywebview.api) {
+    renderLibrary(libraryCache);
+    return;
+  }
+  searchTimer = setTimeout(function() {
+    window.pywebview.api.search(query, 50).then(function(found) {
+      if (seq !== searchSeq) return;  // a newer query is on its way
+      if (found && found.results) {
+        renderLibrary(found.results, true);
+      } else {
+        renderLibrary(libraryCache);
+      }
+    }).catch(function() {
+      if (seq === searchSeq) renderLibrary(libraryCache);
+    });
+  }, SEARCH_DELAY_MS);
 });
 
 function openEntry(entry) {
@@ -750,6 +874,9 @@ function openSettings() {
       apiKeyInput.value = s.api_key || '';
       langSelect.value = s.language || 'auto';
       modelSelect.value = s.model || 'turbo';
+      backendSelect.value = s.backend || 'auto';
+      computeSelect.value = s.compute_type || 'int8';
+      captionsSelect.value = s.captions_policy || 'captions_first';
       contextInput.value = s.context || '';
       analysisPrompt.value = s.analysis_prompt || '';
       updateApiKeyStatus(s.api_key);
@@ -766,6 +893,9 @@ function saveAndCloseSettings() {
     api_key: apiKeyInput.value.trim(),
     language: langSelect.value,
     model: modelSelect.value,
+    backend: backendSelect.value,
+    compute_type: computeSelect.value,
+    captions_policy: captionsSelect.value,
     context: contextInput.value.trim(),
     analysis_prompt: analysisPrompt.value.trim(),
   };
@@ -2,7 +2,9 @@
 
 import os
 
-_ENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+# Same home as app.py's settings (COPYSIGHT_HOME overrides the app folder)
+_ENV_PATH = os.path.join(os.environ.get("COPYSIGHT_HOME")
+                         or os.path.dirname(os.path.abspath(__file__)), ".env")
 
 
 def save_key(key: str) -> None: